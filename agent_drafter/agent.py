@@ -1,64 +1,20 @@
-import sys
-import os
-import logging
-from typing import List
+import log
 
-# Add the project root directory to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
-
-from dataclasses import dataclass
-from datetime import datetime
 from pydantic_ai import RunContext
 
-from firecrawl_tools import tool_deep_research
+from firecrawl_tools import tool_research_vc_partner
 from pydantic_ai import Agent
 
+from models import DrafterDeps
 from openai_model import get_openai_model
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Set up basic logger
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-handler = logging.StreamHandler()
-handler.setFormatter(
-    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-)
-logger.addHandler(handler)
-
-
-@dataclass
-class Founder:
-    name: str
-    background: str
-
+from output_validation import COLD_EMAIL_WORDS, RESULT_RETRIES, check_length
 
-@dataclass
-class Startup:
-    vision: str
-    company_name: str
-    founders: List[Founder]
-    product_description: str
-
-
-@dataclass
-class VCPartner:
-    name: str
-    fund_name: str
-    fund_website: str
-    linkedin_url: str
-
-
-@dataclass
-class DrafterDeps:
-    startup: Startup
-    vc_partner: VCPartner
+logger = log.get_logger(__name__)
 
 
 def make_agent_email_drafter(model_name="o3-mini"):
     agent = Agent(
-        get_openai_model(model_name),
+        get_openai_model(model_name, agent_name="email_drafter"),
         system_prompt="""
         You are an assistant that helps draft emails from founders to VCs.
         Make the email short but personalized, highlight the things about the startup that might interest the VC.
@@ -66,12 +22,18 @@ def make_agent_email_drafter(model_name="o3-mini"):
         deps_type=DrafterDeps,
         retries=3,
         result_type=str,
-        tools=[tool_deep_research],
+        result_retries=RESULT_RETRIES,
+        tools=[tool_research_vc_partner],
     )
     agent.system_prompt(add_context)
+    agent.result_validator(validate_cold_email)
     return agent
 
 
+async def validate_cold_email(result: str) -> str:
+    return check_length(result, COLD_EMAIL_WORDS, "cold email")
+
+
 def add_context(ctx: RunContext[DrafterDeps]) -> str:
     return f"""
     You have the following information about the startup:
@@ -1,48 +1,35 @@
-import sys
-import os
-import logging
-from typing import List
-
-# Add the project root directory to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+import log
+import metrics
 
 from dataclasses import dataclass
+from typing import Optional
 from pydantic_ai import RunContext
 
-from firecrawl_tools import tool_deep_research
+from firecrawl_tools import tool_research_vc_email
 from pydantic_ai import Agent
 
+from models import ResearchContext, VCPartner
 from openai_model import get_openai_model
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Set up basic logger
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-handler = logging.StreamHandler()
-handler.setFormatter(
-    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+from output_validation import (
+    RESULT_RETRIES,
+    FoundEmail,
+    check_email_domain,
+    email_domain_problem,
+    validation_retries,
 )
-logger.addHandler(handler)
 
-
-@dataclass
-class VCPartner:
-    name: str
-    fund_name: str
-    fund_website: str
-    linkedin_url: str
+logger = log.get_logger(__name__)
 
 
 @dataclass
 class EmailFinderDeps:
     vc_partner: VCPartner
+    research: Optional[ResearchContext] = None
 
 
 def make_agent_email_finder(model_name="o3-mini"):
     agent = Agent(
-        get_openai_model(model_name),
+        get_openai_model(model_name, agent_name="email_finder"),
         system_prompt="""
         You are an assistant that helps find email addresses of VC partners.
         Use all available information about the VC partner to search for their professional email address.
@@ -50,13 +37,28 @@ def make_agent_email_finder(model_name="o3-mini"):
         """,
         deps_type=EmailFinderDeps,
         retries=3,
-        result_type=str,
-        tools=[tool_deep_research],
+        result_type=FoundEmail,
+        result_retries=RESULT_RETRIES,
+        tools=[tool_research_vc_email],
     )
     agent.system_prompt(add_context)
+    agent.result_validator(validate_email)
     return agent
 
 
+async def validate_email(
+    ctx: RunContext[EmailFinderDeps], result: FoundEmail
+) -> FoundEmail:
+    # Some funds mail from another domain than their website's, so the last
+    # try keeps an off-domain address; the workflow reports it as a warning
+    rejected, _ = validation_retries(ctx.messages)
+    if rejected < RESULT_RETRIES:
+        check_email_domain(result.email, ctx.deps.vc_partner.fund_website)
+    elif email_domain_problem(result.email, ctx.deps.vc_partner.fund_website):
+        metrics.incr("validation.email_finder.off_domain")
+    return result
+
+
 def add_context(ctx: RunContext[EmailFinderDeps]) -> str:
     return f"""
     You need to find the email address for the following VC partner:
@@ -65,7 +67,7 @@ def add_context(ctx: RunContext[EmailFinderDeps]) -> str:
     VC partner fund website: {ctx.deps.vc_partner.fund_website}.
     VC partner LinkedIn URL: {ctx.deps.vc_partner.linkedin_url}.
     
-    Use the deep_research tool to search for the email address.
-    Try looking at their fund website, LinkedIn profiles, and any other professional sources.
-    Return only the email address, with no additional text.
+    Use the research_vc_email tool to search for the email address.
+    It checks the fund website first and only escalates to wider web research if needed.
+    Return only the email address, or an empty email if you could not find one.
     """
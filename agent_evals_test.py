@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+import pytest
+
+import agent_introducer_finder.agent as introducer_module
+import firecrawl_tools
+import linkedin_scheduler
+from benchmarks import agent_evals
+
+with open(agent_evals.CASES_PATH) as f:
+    CASES = json.load(f)
+with open(agent_evals.BASELINE_PATH) as f:
+    BASELINE = json.load(f)
+
+
+@pytest.fixture
+def canned_backends(monkeypatch):
+    # TestModel answers for OpenAI, canned pages for Firecrawl and canned
+    # connections for the LinkedIn browser, as in benchmarks/agent_evals.py
+    monkeypatch.setattr(firecrawl_tools, "tiered_research", agent_evals.canned_research)
+    monkeypatch.setattr(
+        introducer_module,
+        "smart_linkedin_mutual_connections",
+        agent_evals.canned_connections,
+    )
+    monkeypatch.setattr(linkedin_scheduler, "MIN_SESSION_INTERVAL", 0)
+
+
+@pytest.mark.parametrize("agent_name", sorted(agent_evals.AGENTS))
+def test_agent_stays_within_baseline(agent_name, canned_backends):
+    measured, failures = asyncio.run(agent_evals.evaluate(agent_name, CASES, False))
+
+    assert failures == []
+    assert agent_evals.regressions(agent_name, measured, BASELINE) == []
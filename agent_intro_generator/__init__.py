@@ -1,3 +1,13 @@
-from .agent import make_agent_intro_generator, IntroGeneratorDeps
+from .agent import (
+    make_agent_intro_generator,
+    make_agent_intro_batch_generator,
+    IntroGeneratorDeps,
+    IntroBatchDeps,
+)
 
-__all__ = ["make_agent_intro_generator", "IntroGeneratorDeps"]
+__all__ = [
+    "make_agent_intro_generator",
+    "make_agent_intro_batch_generator",
+    "IntroGeneratorDeps",
+    "IntroBatchDeps",
+]
@@ -1,91 +1,134 @@
-import sys
 import os
-import logging
-from typing import List
 
-# Add the project root directory to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+import log
 
 from dataclasses import dataclass
-from pydantic_ai import RunContext
+from typing import List, Optional, Union
+from pydantic_ai import ModelRetry, RunContext
 
 from pydantic_ai import Agent
 
+from models import ResearchContext, Startup, VCPartner
 from openai_model import get_openai_model
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Set up basic logger
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-handler = logging.StreamHandler()
-handler.setFormatter(
-    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+from output_validation import (
+    INTRO_WORDS,
+    RESULT_RETRIES,
+    ConnectionIntro,
+    check_length,
 )
-logger.addHandler(handler)
 
+logger = log.get_logger(__name__)
 
-@dataclass
-class Founder:
-    name: str
-    background: str
-
+# Most intros written in one batch call; longer lists are split into calls
+INTRO_BATCH_SIZE = int(os.getenv("INTRO_BATCH_SIZE", "4"))
 
-@dataclass
-class Startup:
-    vision: str
-    company_name: str
-    founders: List[Founder]
-    product_description: str
+SYSTEM_PROMPT = """
+        You are an assistant that creates personalized introductions for warm connections between startup founders and VCs.
+        Your task is to draft a brief, personalized message from a mutual connection introducing the startup founders to the VC.
+        The intro should be concise, professional, and highlight why this connection would be valuable for both parties.
+        """
 
 
 @dataclass
-class VCPartner:
-    name: str
-    fund_name: str
-    fund_website: str
-    linkedin_url: str
+class IntroGeneratorDeps:
+    startup: Startup
+    vc_partner: VCPartner
+    mutual_connection: str
+    research: Optional[ResearchContext] = None
 
 
 @dataclass
-class IntroGeneratorDeps:
+class IntroBatchDeps:
     startup: Startup
     vc_partner: VCPartner
-    mutual_connection: str
+    # {"name", "headline"} of each mutual connection to write an intro from
+    mutual_connections: List[dict]
+    research: Optional[ResearchContext] = None
 
 
 def make_agent_intro_generator(model_name="o3-mini"):
     agent = Agent(
-        get_openai_model(model_name),
-        system_prompt="""
-        You are an assistant that creates personalized introductions for warm connections between startup founders and VCs.
-        Your task is to draft a brief, personalized message from a mutual connection introducing the startup founders to the VC.
-        The intro should be concise, professional, and highlight why this connection would be valuable for both parties.
-        """,
+        get_openai_model(model_name, agent_name="intro_generator"),
+        system_prompt=SYSTEM_PROMPT,
         deps_type=IntroGeneratorDeps,
         retries=3,
         result_type=str,
+        result_retries=RESULT_RETRIES,
     )
     agent.system_prompt(add_context)
+    agent.system_prompt(add_research)
+    agent.result_validator(validate_intro)
     return agent
 
 
-def add_context(ctx: RunContext[IntroGeneratorDeps]) -> str:
+async def validate_intro(result: str) -> str:
+    return check_length(result, INTRO_WORDS, "introduction email")
+
+
+def make_agent_intro_batch_generator(model_name="o3-mini"):
+    """
+    Agent that writes one intro per mutual connection in a single call,
+    sharing the startup, partner and research context between them.
+    """
+    agent = Agent(
+        get_openai_model(model_name, agent_name="intro_generator"),
+        system_prompt=SYSTEM_PROMPT,
+        deps_type=IntroBatchDeps,
+        retries=3,
+        result_type=List[ConnectionIntro],
+        result_retries=RESULT_RETRIES,
+    )
+    agent.system_prompt(add_batch_context)
+    agent.system_prompt(add_research)
+    agent.result_validator(validate_intros)
+    return agent
+
+
+async def validate_intros(
+    ctx: RunContext[IntroBatchDeps], result: List[ConnectionIntro]
+) -> List[ConnectionIntro]:
+    # Keyed by the connection's number, as two connections can share a name
+    by_number = {intro.number: intro for intro in result}
+    connections = list(enumerate(ctx.deps.mutual_connections, 1))
+    missing = [
+        f"{i}. {connection['name']}"
+        for i, connection in connections
+        if i not in by_number
+    ]
+    if missing:
+        raise ModelRetry(
+            f"Write one intro for each mutual connection, missing: {', '.join(missing)}. "
+            "Use the numbers exactly as listed."
+        )
+    for i, connection in connections:
+        check_length(
+            by_number[i].intro,
+            INTRO_WORDS,
+            f"introduction from {i}. {connection['name']}",
+        )
+    # In the order they were asked for, without extra entries
+    return [by_number[i] for i, _ in connections]
+
+
+def describe_request(deps: Union[IntroGeneratorDeps, IntroBatchDeps]) -> str:
     return f"""
-    You need to draft a warm introduction from a mutual connection.
-    
     Startup information:
-    Startup name: {ctx.deps.startup.company_name}
-    Vision: {ctx.deps.startup.vision}
-    Product description: {ctx.deps.startup.product_description}
-    Founders: {ctx.deps.startup.founders}
+    Startup name: {deps.startup.company_name}
+    Vision: {deps.startup.vision}
+    Product description: {deps.startup.product_description}
+    Founders: {deps.startup.founders}
 
     VC partner information:
-    VC partner name: {ctx.deps.vc_partner.name}
-    VC partner fund name: {ctx.deps.vc_partner.fund_name}
-    VC partner fund website: {ctx.deps.vc_partner.fund_website}
-    
+    VC partner name: {deps.vc_partner.name}
+    VC partner fund name: {deps.vc_partner.fund_name}
+    VC partner fund website: {deps.vc_partner.fund_website}
+    """
+
+
+def add_context(ctx: RunContext[IntroGeneratorDeps]) -> str:
+    return f"""
+    You need to draft a warm introduction from a mutual connection.
+    {describe_request(ctx.deps)}
     Mutual connection: {ctx.deps.mutual_connection}
     
     Create a brief, personalized email introduction from the mutual connection's perspective that:
@@ -97,3 +140,43 @@ def add_context(ctx: RunContext[IntroGeneratorDeps]) -> str:
 
     Format the email as if it were being sent from the mutual connection to both parties.
     """
+
+
+def add_batch_context(ctx: RunContext[IntroBatchDeps]) -> str:
+    connections = "\n".join(
+        f"    {i}. {connection['name']}"
+        + (f" — {connection['headline']}" if connection.get("headline") else "")
+        for i, connection in enumerate(ctx.deps.mutual_connections, 1)
+    )
+    return f"""
+    You need to draft a warm introduction from each of several mutual connections.
+    {describe_request(ctx.deps)}
+    Mutual connections:
+{connections}
+
+    For each mutual connection, create a brief, personalized email introduction from that connection's perspective that:
+    1. Greets both parties by name
+    2. Explains why they are making the introduction, drawing on their own background
+    3. Introduces the startup founders and highlights their key strengths
+    4. Mentions why this connection would be valuable for both parties
+    5. Offers a polite closing that encourages further discussion
+
+    Return one entry per mutual connection, with the connection's number and name exactly as listed.
+    """
+
+
+def add_research(ctx: RunContext[Union[IntroGeneratorDeps, IntroBatchDeps]]) -> str:
+    research = ctx.deps.research
+    findings = research.get(ctx.deps.vc_partner) if research is not None else None
+    if not findings:
+        return ""
+    facts = "\n".join(
+        f"- {fact}"
+        for fact in findings.get("partner", []) + findings.get("relevant", [])
+    )
+    return f"""
+    Earlier research on the VC partner and their fund:
+    {facts}
+
+    Use these facts to explain why the VC would be interested in the startup.
+    """
@@ -1,34 +1,29 @@
+import asyncio
 import logging
 import os
-import sys
-from typing import List
-from dataclasses import dataclass
-
-from models import DrafterDeps
-
-# Add the project root directory to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
-
-import asyncio
-import json
 import re
 import tempfile
 import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, List, Optional
+from dataclasses import dataclass
 
-from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
 from pydantic_ai import Agent, RunContext
 
+import linkedin_scheduler
 import log
-from firecrawl_tools import tool_deep_research
+import metrics
+from deadline import DeadlineExceeded, with_deadline
 from openai_model import get_openai_model
-
-load_dotenv()
+from output_validation import RESULT_RETRIES, MutualConnection
 
 # Set up basic logger
 logger = log.get_logger(__name__)
 
+# Upper bound for a single browser step, so a wait_for that never matches
+# cannot hang the run even without a request deadline (raises StepTimeout)
+MCP_STEP_TIMEOUT = float(os.getenv("MCP_STEP_TIMEOUT", "60"))
+
 
 @dataclass
 class IntroducerFinderDeps:
@@ -37,62 +32,71 @@ class IntroducerFinderDeps:
     vc_linkedin_url: str
 
 
-async def get_linkedin_mutual_connections(
-    founder_email: str, founder_password: str, vc_linkedin_url: str
-) -> list:
-    server_params = StdioServerParameters(
-        command="npx", args=["@playwright/mcp@latest", "--headless"]
-    )
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-            # 1. Go to LinkedIn login
-            await session.call_tool(
-                "browser_navigate", {"url": "https://www.linkedin.com/login"}
-            )
-            # 2. Type email
-            await session.call_tool(
-                "browser_type", {"element": "Email or Phone", "text": founder_email}
-            )
-            # 3. Type password
-            await session.call_tool(
-                "browser_type",
-                {"element": "Password", "text": founder_password, "submit": True},
-            )
-            # 4. Wait for homepage
-            await session.call_tool("browser_wait_for", {"text": "Home"})
-            # 5. Go to VC profile
-            await session.call_tool("browser_navigate", {"url": vc_linkedin_url})
-            # 6. Try to click Connections
-            try:
-                await session.call_tool("browser_click", {"element": "Connections"})
-            except Exception:
-                # Fallback: click mutual connections
-                await session.call_tool(
-                    "browser_click", {"element": "mutual connections"}
-                )
-            await session.call_tool("browser_wait_for", {"text": "Mutual Connections"})
-            # 7. Get snapshot and extract names (simplified)
-            snapshot = await session.call_tool("browser_snapshot")
-            # This is a placeholder: in practice, parse snapshot.content[0].text for names
-            return [snapshot.content[0].text]
+async def call_tool(session, name: str, arguments: dict = None):
+    with log.span(f"mcp.{name}"):
+        return await with_deadline(
+            session.call_tool(name, arguments),
+            f"browser step {name}",
+            MCP_STEP_TIMEOUT,
+        )
 
 
-def tool_linkedin_mutual_connections(
-    founder_email: str, founder_password: str, vc_linkedin_url: str
-) -> list:
-    return asyncio.run(
-        get_linkedin_mutual_connections(
-            founder_email, founder_password, vc_linkedin_url
+def extract_ref(snapshot_text: str, label: str) -> Optional[str]:
+    # Find all lines with [ref=...]
+    for line in snapshot_text.splitlines():
+        if label in line and "[ref=" in line:
+            m = re.search(r"\[ref=(e\d+)\]", line)
+            if m:
+                return m.group(1)
+    return None
+
+
+def extract_mutual_connections(snapshot_text: str) -> List[dict]:
+    lines = snapshot_text.splitlines()
+    connections = []
+    for i, line in enumerate(lines):
+        m = re.search(
+            r'- link "([^"]+)" \[ref=[^\]]+\] \[cursor=pointer\]:',
+            line,
         )
-    )
+        if m:
+            raw_name = m.group(1)
+            # Clean up the name: take up to first comma, or remove ' Status is reachable' etc.
+            name = raw_name.split(",")[0].strip()
+            # Remove common status suffixes if present
+            for suffix in [
+                "Status is reachable",
+                "Status is online",
+            ]:
+                if name.endswith(suffix):
+                    name = name[: -len(suffix)].strip()
+            url = None
+            for j in range(i + 1, min(i + 5, len(lines))):
+                url_match = re.search(
+                    r"/url: (https://www\.linkedin\.com/in/[^\s]+)",
+                    lines[j],
+                )
+                if url_match:
+                    url = url_match.group(1)
+                    break
+            if name and url:
+                # The rest of the link label is the connection's headline
+                headline = raw_name.split(",", 1)[1].strip() if "," in raw_name else ""
+                connections.append(
+                    {"name": name, "linkedin_url": url, "headline": headline}
+                )
+    return connections[:10]
 
 
-@log.add_logger(logger)
-async def smart_linkedin_mutual_connections(
-    founder_email: str, founder_password: str, vc_linkedin_url: str, max_steps=30
-) -> list:
-    logger: logging.Logger = smart_linkedin_mutual_connections.logger
+@asynccontextmanager
+async def linkedin_session(founder_email: str, founder_password: str):
+    """
+    Start a headless Playwright MCP browser with a throwaway profile, log in
+    to LinkedIn with the founder's credentials and yield the MCP session.
+    """
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
     with tempfile.TemporaryDirectory() as user_data_dir:
         server_params = StdioServerParameters(
             command="npx",
@@ -105,40 +109,36 @@ async def smart_linkedin_mutual_connections(
         )
         async with stdio_client(server_params) as (read, write):
             async with ClientSession(read, write) as session:
+                start = time.perf_counter()
                 await session.initialize()
                 # Start at LinkedIn login
                 logger.info("Navigating to LinkedIn login page...")
-                result = await session.call_tool(
-                    "browser_navigate", {"url": "https://www.linkedin.com/login"}
+                await call_tool(
+                    session,
+                    "browser_navigate",
+                    {"url": "https://www.linkedin.com/login"},
                 )
                 # Take a fresh snapshot after navigation
-                snapshot = await session.call_tool("browser_snapshot")
+                snapshot = await call_tool(session, "browser_snapshot")
                 snapshot_text = snapshot.content[0].text
 
-                def extract_ref(snapshot_text, label):
-                    # Find all lines with [ref=...]
-                    for line in snapshot_text.splitlines():
-                        if label in line and "[ref=" in line:
-                            m = re.search(r"\[ref=(e\d+)\]", line)
-                            if m:
-                                return m.group(1)
-                    return None
-
                 email_ref = extract_ref(snapshot_text, 'textbox "Email or phone"')
                 password_ref = extract_ref(snapshot_text, 'textbox "Password"')
                 signin_ref = extract_ref(snapshot_text, 'button "Sign in"')
                 logger.info(
-                    f"Extracted refs: {email_ref}, {password_ref}, {signin_ref}"
+                    "Extracted refs: %s, %s, %s", email_ref, password_ref, signin_ref
                 )
 
                 # Focus email field
-                await session.call_tool(
+                await call_tool(
+                    session,
                     "browser_click",
                     {"element": "textbox 'Email or phone'", "ref": email_ref},
                 )
                 # Fill email
                 logger.info("Filling email field...")
-                result = await session.call_tool(
+                await call_tool(
+                    session,
                     "browser_type",
                     {
                         "element": "textbox 'Email or phone'",
@@ -147,13 +147,15 @@ async def smart_linkedin_mutual_connections(
                     },
                 )
                 # Focus password field
-                await session.call_tool(
+                await call_tool(
+                    session,
                     "browser_click",
                     {"element": "textbox 'Password'", "ref": password_ref},
                 )
                 # Fill password
                 logger.info("Filling password field...")
-                result = await session.call_tool(
+                await call_tool(
+                    session,
                     "browser_type",
                     {
                         "element": "textbox 'Password'",
@@ -163,120 +165,231 @@ async def smart_linkedin_mutual_connections(
                 )
                 # Click submit
                 logger.info("Clicking sign in button...")
-                result = await session.call_tool(
-                    "browser_click", {"element": "button 'Sign in'", "ref": signin_ref}
+                await call_tool(
+                    session,
+                    "browser_click",
+                    {"element": "button 'Sign in'", "ref": signin_ref},
                 )
                 # Wait for home page to load
                 logger.info("Waiting for home page to load...")
-                await session.call_tool("browser_wait_for", {"text": "Home"})
-                # Navigate to VC partner's LinkedIn page
-                logger.info(f"Navigating to VC partner's page: {vc_linkedin_url}")
-                result = await session.call_tool(
-                    "browser_navigate", {"url": vc_linkedin_url}
+                await call_tool(session, "browser_wait_for", {"text": "Home"})
+                metrics.observe("linkedin.login_seconds", time.perf_counter() - start)
+                yield session
+
+
+async def scrape_mutual_connections(session, vc_linkedin_url: str) -> List[dict]:
+    """
+    Open a VC partner's profile in a logged-in session and parse the mutual
+    connections behind its "mutual connection" link.
+    """
+    # Navigate to VC partner's LinkedIn page
+    logger.info("Navigating to VC partner's page: %s", vc_linkedin_url)
+    await call_tool(session, "browser_navigate", {"url": vc_linkedin_url})
+    # Wait for VC partner's profile to load (look for 'Connect' button or similar)
+    logger.info("Waiting for VC partner's profile to load...")
+    await call_tool(session, "browser_wait_for", {"text": "Connect"})
+
+    # Take a snapshot and try to find the mutual connection link
+    snapshot = await call_tool(session, "browser_snapshot")
+    snapshot_text = snapshot.content[0].text
+    logger.info("Snapshot on VC profile page taken.")
+
+    # Find a link whose label contains 'mutual connection' (case-insensitive)
+    mutual_ref = None
+    mutual_label = None
+    for line in snapshot_text.splitlines():
+        if (
+            "link" in line.lower()
+            and "mutual connection" in line.lower()
+            and "[ref=" in line
+        ):
+            m = re.search(r"\[ref=(e\d+)\]", line)
+            label_match = re.search(r'link "([^"]+)"', line)
+            if m:
+                mutual_ref = m.group(1)
+            if label_match:
+                mutual_label = label_match.group(1)
+            if mutual_ref and mutual_label:
+                logger.info(
+                    "Found mutual connection link with ref: %s and label: %s",
+                    mutual_ref,
+                    mutual_label,
                 )
-                # Wait for VC partner's profile to load (look for 'Connect' button or similar)
-                logger.info("Waiting for VC partner's profile to load...")
-                await session.call_tool("browser_wait_for", {"text": "Connect"})
+                break
+    if not (mutual_ref and mutual_label):
+        logger.info("No mutual connection link found on the page.")
+        return []
+    logger.info("Clicking mutual connection link...")
+    await call_tool(
+        session,
+        "browser_click",
+        {"element": f"link '{mutual_label}'", "ref": mutual_ref},
+    )
+    snapshot = await call_tool(session, "browser_snapshot")
+    return extract_mutual_connections(snapshot.content[0].text)
 
-                # Take a snapshot and try to find the mutual connection link
-                snapshot = await session.call_tool("browser_snapshot")
-                snapshot_text = snapshot.content[0].text
-                logger.info("Snapshot on VC profile page taken.")
-
-                # Find a link whose label contains 'mutual connection' (case-insensitive)
-                mutual_ref = None
-                mutual_label = None
-                for line in snapshot_text.splitlines():
-                    if (
-                        "link" in line.lower()
-                        and "mutual connection" in line.lower()
-                        and "[ref=" in line
-                    ):
-                        m = re.search(r"\[ref=(e\d+)\]", line)
-                        label_match = re.search(r'link "([^"]+)"', line)
-                        if m:
-                            mutual_ref = m.group(1)
-                        if label_match:
-                            mutual_label = label_match.group(1)
-                        if mutual_ref and mutual_label:
-                            logger.info(
-                                f"Found mutual connection link with ref: {mutual_ref} and label: {mutual_label}"
-                            )
-                            break
-                if mutual_ref and mutual_label:
-                    logger.info("Clicking mutual connection link...")
-                    result = await session.call_tool(
-                        "browser_click",
-                        {"element": f"link '{mutual_label}'", "ref": mutual_ref},
-                    )
-                    # logger.info(f"browser_click (mutual connection) result: {result}")
-                    snapshot = await session.call_tool("browser_snapshot")
-                    snapshot_text = snapshot.content[0].text
-
-                    def extract_mutual_connections(snapshot_text):
-                        lines = snapshot_text.splitlines()
-                        connections = []
-                        for i, line in enumerate(lines):
-                            m = re.search(
-                                r'- link "([^"]+)" \[ref=[^\]]+\] \[cursor=pointer\]:',
-                                line,
-                            )
-                            if m:
-                                raw_name = m.group(1)
-                                # Clean up the name: take up to first comma, or remove ' Status is reachable' etc.
-                                name = raw_name.split(",")[0].strip()
-                                # Remove common status suffixes if present
-                                for suffix in [
-                                    "Status is reachable",
-                                    "Status is online",
-                                ]:
-                                    if name.endswith(suffix):
-                                        name = name[: -len(suffix)].strip()
-                                url = None
-                                for j in range(i + 1, min(i + 5, len(lines))):
-                                    url_match = re.search(
-                                        r"/url: (https://www\.linkedin\.com/in/[^\s]+)",
-                                        lines[j],
-                                    )
-                                    if url_match:
-                                        url = url_match.group(1)
-                                        break
-                                if name and url:
-                                    connections.append(
-                                        {"name": name, "linkedin_url": url}
-                                    )
-                        return connections[:10]
-
-                    mutual_connections = extract_mutual_connections(snapshot_text)
-                    return mutual_connections
-                else:
-                    logger.info("No mutual connection link found on the page.")
-                    return []
-
-
-def tool_smart_linkedin_mutual_connections(
+
+@log.add_logger(logger)
+async def smart_linkedin_mutual_connections(
+    founder_email: str, founder_password: str, vc_linkedin_url: str, max_steps=30
+) -> list:
+    async with linkedin_session(founder_email, founder_password) as session:
+        return await scrape_mutual_connections(session, vc_linkedin_url)
+
+
+@dataclass
+class ProfileConnections:
+    vc_linkedin_url: str
+    mutual_connections: List[dict]
+    # Time spent on this profile, and batch time so far per profile done
+    # (login included)
+    seconds: float
+    amortized_seconds: float
+    error: Optional[str] = None
+
+
+async def batch_linkedin_mutual_connections(
+    founder_email: str,
+    founder_password: str,
+    vc_linkedin_urls: Iterable[str],
+    sessions: int = 1,
+) -> AsyncIterator[ProfileConnections]:
+    """
+    Mutual connections for many VC partners with one login per browser
+    session. Profiles are visited one after another by each of `sessions`
+    logged-in browsers and yielded as soon as they are parsed, so with more
+    than one session results arrive in completion order. A profile that
+    fails is yielded with `error` set and does not stop the batch.
+
+        async for profile in batch_linkedin_mutual_connections(email, pw, urls):
+            save(profile.vc_linkedin_url, profile.mutual_connections)
+    """
+    urls = list(dict.fromkeys(vc_linkedin_urls))
+    if not urls:
+        return
+    todo: asyncio.Queue = asyncio.Queue()
+    for url in urls:
+        todo.put_nowait(url)
+    done: asyncio.Queue = asyncio.Queue()
+    login_errors: List[str] = []
+    expired: List[DeadlineExceeded] = []
+    start = time.perf_counter()
+
+    scheduler = linkedin_scheduler.get_scheduler()
+
+    async def worker():
+        try:
+            async with scheduler.session(founder_email):
+                if todo.empty():
+                    return
+                async with linkedin_session(founder_email, founder_password) as session:
+                    while not todo.empty():
+                        url = todo.get_nowait()
+                        profile_start = time.perf_counter()
+                        try:
+                            connections = await scrape_mutual_connections(session, url)
+                            error = None
+                        except DeadlineExceeded:
+                            raise
+                        except Exception as e:
+                            logger.warning("Could not scrape %s: %s", url, e)
+                            connections, error = [], f"{type(e).__name__}: {e}"
+                        seconds = time.perf_counter() - profile_start
+                        metrics.observe("linkedin.profile_seconds", seconds)
+                        await done.put((url, connections, seconds, error))
+        except DeadlineExceeded as e:
+            expired.append(e)
+        except Exception as e:
+            logger.warning("LinkedIn session failed: %s", e)
+            login_errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            await done.put(None)
+
+    workers = [
+        asyncio.create_task(worker()) for _ in range(max(1, min(sessions, len(urls))))
+    ]
+    finished = 0
+    yielded = 0
+    try:
+        # Stop once every profile is in, without waiting for sessions still
+        # queued on the account scheduler
+        while finished < len(workers) and yielded < len(urls):
+            item = await done.get()
+            if item is None:
+                finished += 1
+                continue
+            url, connections, seconds, error = item
+            yielded += 1
+            yield ProfileConnections(
+                vc_linkedin_url=url,
+                mutual_connections=connections,
+                seconds=seconds,
+                amortized_seconds=(time.perf_counter() - start) / yielded,
+                error=error,
+            )
+        if expired:
+            raise expired[0]
+        # Profiles no session got to because every login failed
+        while not todo.empty():
+            yielded += 1
+            yield ProfileConnections(
+                vc_linkedin_url=todo.get_nowait(),
+                mutual_connections=[],
+                seconds=0.0,
+                amortized_seconds=(time.perf_counter() - start) / yielded,
+                error=login_errors[-1] if login_errors else "Not visited",
+            )
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Scraped %d/%d LinkedIn profiles in %.1fs (%.2fs per profile)",
+            yielded,
+            len(urls),
+            elapsed,
+            elapsed / max(yielded, 1),
+        )
+
+
+async def tool_smart_linkedin_mutual_connections(
     ctx: RunContext[IntroducerFinderDeps],
 ) -> list:
+    # Runs on the agent's own event loop so the request deadline carries
+    # through to every browser step
     founder_email = ctx.deps.founder_email
     founder_password = ctx.deps.founder_password
     vc_linkedin_url = ctx.deps.vc_linkedin_url
-    return asyncio.run(
-        smart_linkedin_mutual_connections(
-            founder_email, founder_password, vc_linkedin_url
-        )
+    from llm_cache import cached_call
+
+    # One browser session at a time per LinkedIn account, shared by
+    # concurrent runs asking for the same VC
+    return await cached_call(
+        ctx.model,
+        "linkedin_mutual_connections",
+        {"founder_email": founder_email, "vc_linkedin_url": vc_linkedin_url},
+        lambda: linkedin_scheduler.get_scheduler().run(
+            founder_email,
+            vc_linkedin_url,
+            lambda: smart_linkedin_mutual_connections(
+                founder_email, founder_password, vc_linkedin_url
+            ),
+        ),
     )
 
 
 def make_agent_introducer_finder(model_name="o3-mini"):
     agent = Agent(
-        get_openai_model(model_name),
+        get_openai_model(model_name, agent_name="introducer_finder"),
         system_prompt="""
         You are an agent that helps find introductions for founders to VCs.
         Your goal is to log in to LinkedIn using the founder's credentials, open the VC partner's LinkedIn page using the provided URL, go to their connections (or mutual friends if connections is not clickable), and extract the list of mutual connections.
         """,
         deps_type=IntroducerFinderDeps,
         retries=3,
-        result_type=List[dict],
+        result_type=List[MutualConnection],
+        result_retries=RESULT_RETRIES,
         tools=[tool_smart_linkedin_mutual_connections],
     )
     agent.system_prompt(add_context)
@@ -296,5 +409,5 @@ def add_context(ctx: RunContext[IntroducerFinderDeps]) -> str:
     3. Access the mutual connections section
     4. Extract a list of mutual connections
     
-    Return a list of mutual connections with their names and LinkedIn URLs.
+    Return a list of mutual connections with their names, LinkedIn profile URLs and headlines.
     """
@@ -0,0 +1,337 @@
+"""
+Per-agent performance regression suite, fully offline.
+
+Every agent runs over the startups and partners in
+fixtures/agent_eval_cases.json as a pydantic-evals dataset. Models are
+replaced by pydantic-ai's TestModel (it calls every tool once, then gives a
+canned answer that passes the agent's result validation), Firecrawl by
+canned pages and the LinkedIn browser session by canned connections, so
+runs need no network or API keys and produce the same token counts every
+time.
+
+For each agent the mean prompt tokens, model turns, tool calls, validation
+retries and wall time per case are compared with agent_eval_baselines.json.
+Token, turn, tool call and retry counts must not grow past the stored
+tolerance; wall time only fails well beyond its baseline. Exits with status
+1 on any regression or failed case.
+
+    python benchmarks/agent_evals.py            # check
+    python benchmarks/agent_evals.py --update   # re-baseline
+    python benchmarks/agent_evals.py --report   # also print the eval reports
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+# Agents build their OpenAI clients at construction; the key is never used
+os.environ.setdefault("OPENAI_API_KEY", "offline-eval")
+
+import firecrawl_tools
+import linkedin_scheduler
+from pydantic_ai.messages import ToolCallPart
+from pydantic_ai.models.test import TestModel
+from pydantic_evals import Case, Dataset
+from pydantic_evals.dataset import increment_eval_metric
+from pydantic_evals.evaluators import IsInstance
+
+import agent_introducer_finder.agent as introducer_module
+from agent_drafter import make_agent_email_drafter
+from agent_email_finder import EmailFinderDeps, make_agent_email_finder
+from agent_intro_generator import (
+    IntroBatchDeps,
+    IntroGeneratorDeps,
+    make_agent_intro_batch_generator,
+    make_agent_intro_generator,
+)
+from agent_introducer_finder.agent import (
+    IntroducerFinderDeps,
+    make_agent_introducer_finder,
+)
+from models import DrafterDeps, Founder, ResearchContext, Startup, VCPartner
+from output_validation import domain_of, validation_retries
+
+HERE = os.path.dirname(__file__)
+CASES_PATH = os.path.join(HERE, "fixtures", "agent_eval_cases.json")
+BASELINE_PATH = os.path.join(HERE, "agent_eval_baselines.json")
+METRICS = ("prompt_tokens", "model_turns", "tool_calls", "retries", "wall_ms")
+DEFAULT_TOLERANCE = {
+    "prompt_tokens": 0.05,
+    "model_turns": 0.0,
+    "tool_calls": 0.0,
+    "retries": 0.0,
+    "wall_ms": 2.0,
+}
+# Intros written by one intro_batch_generator call
+INTRO_BATCH = 3
+# Absolute slack so sub-millisecond baselines do not fail on scheduler noise
+WALL_MS_SLACK = 25.0
+
+
+def canned_pages(partner_name: str, fund_website: str) -> Dict[str, Any]:
+    first = partner_name.split()[0].lower()
+    domain = fund_website.split("//")[-1].removeprefix("www.").split("/")[0]
+    page = (
+        f"{partner_name} is a Partner at the fund and leads seed and Series A "
+        f"investments. Reach {partner_name} at {first}@{domain}. The fund backs "
+        "founders building software, healthcare and climate companies across "
+        "its portfolio. "
+    ) * 20
+    return {
+        "tier": "fund_site",
+        "resolved": True,
+        "pages": [{"url": f"{fund_website}/team/{i}", "text": page} for i in range(3)],
+    }
+
+
+async def canned_research(query, partner_name, fund_website, want_email=False, **_):
+    return canned_pages(partner_name, fund_website)
+
+
+def canned_connections_list() -> List[Dict[str, str]]:
+    return [
+        {
+            "name": f"Connection {i}",
+            "linkedin_url": f"https://www.linkedin.com/in/connection-{i}",
+        }
+        for i in range(10)
+    ]
+
+
+async def canned_connections(founder_email, founder_password, vc_linkedin_url, **_):
+    return canned_connections_list()
+
+
+def canned_letter(case) -> str:
+    partner = case["vc_partner"]["name"].split()[0]
+    company = case["startup"]["company_name"]
+    return (
+        f"Hi {partner},\n\n"
+        + (f"{company} is building {case['startup']['product_description']}. ") * 8
+    )
+
+
+def canned_answer(agent_name: str, case: Dict[str, Any]) -> Dict[str, Any]:
+    # TestModel arguments that make the agent answer like a good model would
+    if agent_name == "introducer_finder":
+        return {"custom_result_args": canned_connections_list()}
+    if agent_name == "intro_batch_generator":
+        return {
+            "custom_result_args": [
+                {
+                    "number": i,
+                    "connection": connection["name"],
+                    "intro": canned_letter(case),
+                }
+                for i, connection in enumerate(
+                    canned_connections_list()[:INTRO_BATCH], 1
+                )
+            ]
+        }
+    if agent_name == "email_finder":
+        first = case["vc_partner"]["name"].split()[0].lower()
+        domain = domain_of(case["vc_partner"]["fund_website"])
+        return {"custom_result_args": {"email": f"{first}@{domain}"}}
+    return {"custom_result_text": canned_letter(case)}
+
+
+def startup_from(data: Dict[str, Any]) -> Startup:
+    return Startup(
+        vision=data["vision"],
+        company_name=data["company_name"],
+        founders=[Founder(**f) for f in data["founders"]],
+        product_description=data["product_description"],
+    )
+
+
+def introducer_deps(case):
+    return IntroducerFinderDeps(
+        founder_email="founder@example.com",
+        founder_password="offline",
+        vc_linkedin_url=case["vc_partner"]["linkedin_url"],
+    )
+
+
+def email_finder_deps(case):
+    return EmailFinderDeps(
+        vc_partner=VCPartner(**case["vc_partner"]), research=ResearchContext()
+    )
+
+
+def intro_generator_deps(case):
+    # By the time the intro is written the email finder has researched the
+    # partner, so the prompt carries those findings as in a workflow run
+    vc_partner = VCPartner(**case["vc_partner"])
+    research = ResearchContext()
+    pages = canned_pages(vc_partner.name, vc_partner.fund_website)
+    research.add(
+        vc_partner, firecrawl_tools.summarize_firecrawl_results(pages, vc_partner.name)
+    )
+    return IntroGeneratorDeps(
+        startup=startup_from(case["startup"]),
+        vc_partner=vc_partner,
+        mutual_connection=case["mutual_connection"],
+        research=research,
+    )
+
+
+def intro_batch_deps(case):
+    deps = intro_generator_deps(case)
+    return IntroBatchDeps(
+        startup=deps.startup,
+        vc_partner=deps.vc_partner,
+        mutual_connections=canned_connections_list()[:INTRO_BATCH],
+        research=deps.research,
+    )
+
+
+def drafter_deps(case):
+    return DrafterDeps(
+        startup=startup_from(case["startup"]),
+        vc_partner=VCPartner(**case["vc_partner"]),
+        research=ResearchContext(),
+    )
+
+
+# agent name -> (agent factory, deps builder, expected result type)
+AGENTS: Dict[str, tuple] = {
+    "introducer_finder": (make_agent_introducer_finder, introducer_deps, "list"),
+    "email_finder": (make_agent_email_finder, email_finder_deps, "FoundEmail"),
+    "intro_generator": (make_agent_intro_generator, intro_generator_deps, "str"),
+    "intro_batch_generator": (
+        make_agent_intro_batch_generator,
+        intro_batch_deps,
+        "list",
+    ),
+    "email_drafter": (make_agent_email_drafter, drafter_deps, "str"),
+}
+
+
+def make_task(agent_name: str, agent, build_deps: Callable) -> Callable:
+    async def task(case: Dict[str, Any]) -> Any:
+        deps = build_deps(case)
+        model = TestModel(call_tools="all", **canned_answer(agent_name, case))
+        start = time.perf_counter()
+        with agent.override(model=model):
+            result = await agent.run("", deps=deps)
+        increment_eval_metric("wall_ms", (time.perf_counter() - start) * 1000)
+        usage = result.usage()
+        increment_eval_metric("prompt_tokens", usage.request_tokens or 0)
+        increment_eval_metric("model_turns", usage.requests)
+        increment_eval_metric("retries", validation_retries(result.all_messages())[0])
+        increment_eval_metric(
+            "tool_calls",
+            sum(
+                isinstance(part, ToolCallPart)
+                for message in result.all_messages()
+                for part in message.parts
+            ),
+        )
+        return result.data
+
+    return task
+
+
+async def evaluate(agent_name: str, cases: List[Dict[str, Any]], show: bool):
+    factory, build_deps, type_name = AGENTS[agent_name]
+    dataset = Dataset(
+        cases=[Case(name=case["name"], inputs=case) for case in cases],
+        evaluators=[IsInstance(type_name=type_name)],
+    )
+    report = await dataset.evaluate(
+        make_task(agent_name, factory(), build_deps), name=agent_name, max_concurrency=1
+    )
+    if show:
+        report.print(include_input=False, include_output=True)
+    failures = []
+    for case in report.cases:
+        for name, result in case.assertions.items():
+            if not result.value:
+                failures.append(f"{agent_name}/{case.name}: {name} failed")
+    measured = {
+        metric: sum(case.metrics.get(metric, 0) for case in report.cases)
+        / max(len(report.cases), 1)
+        for metric in METRICS
+    }
+    return measured, failures
+
+
+def regressions(
+    agent_name: str, measured: Dict[str, float], baseline: Dict[str, Any]
+) -> List[str]:
+    expected = baseline.get("agents", {}).get(agent_name)
+    if expected is None:
+        return [f"{agent_name}: no baseline, run with --update"]
+    tolerance = {**DEFAULT_TOLERANCE, **baseline.get("tolerance", {})}
+    found = []
+    for metric in METRICS:
+        limit = expected[metric] * (1 + tolerance[metric])
+        if metric == "wall_ms":
+            limit += WALL_MS_SLACK
+        if measured[metric] > limit:
+            found.append(
+                f"{agent_name} {metric} {measured[metric]:.1f} "
+                f"(baseline {expected[metric]:.1f}, limit {limit:.1f})"
+            )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--report", action="store_true", help="print eval reports")
+    parser.add_argument("--agent", action="append", choices=sorted(AGENTS))
+    args = parser.parse_args()
+
+    firecrawl_tools.tiered_research = canned_research
+    introducer_module.smart_linkedin_mutual_connections = canned_connections
+    # Cases reuse one founder account; pacing would only add idle time
+    linkedin_scheduler.MIN_SESSION_INTERVAL = 0
+
+    with open(CASES_PATH) as f:
+        cases = json.load(f)
+    baseline = {"tolerance": DEFAULT_TOLERANCE, "agents": {}}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    failures = []
+    measured_all: Dict[str, Dict[str, float]] = {}
+    for agent_name in args.agent or AGENTS:
+        measured, failed = asyncio.run(evaluate(agent_name, cases, args.report))
+        measured_all[agent_name] = measured
+        failures.extend(failed)
+        found = regressions(agent_name, measured, baseline) if not args.update else []
+        failures.extend(found)
+        print(
+            f"{agent_name:<22} {measured['prompt_tokens']:>7.0f} prompt tokens "
+            f"{measured['model_turns']:>3.0f} turns {measured['tool_calls']:>3.0f} tool calls "
+            f"{measured['retries']:>3.0f} retries "
+            f"{measured['wall_ms']:>8.1f} ms  {'REGRESSED' if found else 'ok'}"
+        )
+
+    if args.update:
+        baseline.setdefault("agents", {}).update(
+            {
+                name: {metric: round(value, 1) for metric, value in measured.items()}
+                for name, measured in measured_all.items()
+            }
+        )
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"Updated {BASELINE_PATH}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
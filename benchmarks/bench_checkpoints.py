@@ -0,0 +1,130 @@
+"""
+Checkpoint bytes per workflow run.
+
+Runs the full workflow with stubbed backends: a FunctionModel that answers
+with email-sized texts instead of OpenAI, and canned research pages instead
+of Firecrawl. Then sums everything the MemorySaver holds for the thread:
+checkpoints, channel blobs and pending writes.
+
+    python benchmarks/bench_checkpoints.py --runs 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+# Every run sends the same request; measure full runs, not memoized ones
+os.environ.setdefault("NODE_MEMO", "0")
+
+import firecrawl_tools
+import openai_model
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import FunctionModel
+
+from workflow import get_vc_outreach_workflow, state_from_request
+
+PAGE = (
+    "Jake Bauer is a Partner at ARCH Venture Partners focused on diagnostics. "
+    "Reach him at jbauer@archventure.com. The fund backs seed and Series A "
+    "life sciences companies across its portfolio. "
+) * 40
+LETTER = (
+    "Dear Jake,\n\n" + "We are building early detection from a drop of blood. " * 25
+)
+
+
+def respond(messages, info):
+    last = messages[-1].parts[-1]
+    if info.function_tools and not isinstance(last, ToolReturnPart):
+        tool = info.function_tools[0].name
+        return ModelResponse(parts=[ToolCallPart(tool, {"query": "Jake Bauer"})])
+    if info.result_tools:
+        tool = info.result_tools[0].name
+        return ModelResponse(
+            parts=[ToolCallPart(tool, {"email": "jbauer@archventure.com"})]
+        )
+    return ModelResponse(parts=[TextPart(LETTER)])
+
+
+async def canned_research(query, partner_name, fund_website, want_email=False, **_):
+    return {
+        "tier": "fund_site",
+        "resolved": True,
+        "pages": [{"url": f"{fund_website}/{i}", "text": PAGE} for i in range(5)],
+    }
+
+
+def sizeof(value) -> int:
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(v) for v in value)
+    return 0
+
+
+def checkpoint_bytes(saver, thread_id: str) -> dict:
+    return {
+        "checkpoints": sizeof(saver.storage.get(thread_id, {})),
+        "blobs": sizeof([v for k, v in saver.blobs.items() if k[0] == thread_id]),
+        "writes": sizeof([v for k, v in saver.writes.items() if k[0] == thread_id]),
+    }
+
+
+async def run_once(workflow) -> dict:
+    state, thread_id = state_from_request(
+        {
+            "startup": {
+                "vision": "Early detection from a drop of blood",
+                "company_name": "MediScan AI",
+                "founders": [{"name": "Alex Johnson", "background": "ML PhD"}],
+                "product_description": "Blood testing platform",
+            },
+            "vc_partner": {
+                "name": "Jake Bauer",
+                "fund_name": "ARCH Venture Partners",
+                "fund_website": "https://www.archventure.com",
+                "linkedin_url": "",
+            },
+            "mutual_connection": "Dr. David Schenkein",
+            "thread_id": str(uuid.uuid4()),
+        }
+    )
+    await workflow.ainvoke(state, {"configurable": {"thread_id": thread_id}})
+    return checkpoint_bytes(workflow.checkpointer, thread_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    openai_model.get_openai_model = lambda *a, **k: FunctionModel(respond)
+    firecrawl_tools.tiered_research = canned_research
+    workflow = get_vc_outreach_workflow()
+
+    async def drive():
+        samples = []
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            samples.append(await run_once(workflow))
+        return samples, time.perf_counter() - start
+
+    samples, elapsed = asyncio.run(drive())
+    totals = {k: sum(s[k] for s in samples) / len(samples) for k in samples[0]}
+    print(
+        f"per run: checkpoints {totals['checkpoints']:.0f} B  blobs {totals['blobs']:.0f} B  "
+        f"writes {totals['writes']:.0f} B  total {sum(totals.values()):.0f} B  "
+        f"({elapsed / args.runs * 1000:.1f} ms/run)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Token and latency cost of the research compactor on recorded payloads.
+
+fixtures/research_payloads.json holds a Firecrawl deep research response and
+two tiered research results (fund site pages and search results) in the shape
+the research tools receive them. "before" is the raw payload as the model
+used to see it, "after" is what summarize_firecrawl_results returns.
+
+    python benchmarks/bench_compactor.py --budget 1200 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from firecrawl_tools import estimate_tokens, summarize_firecrawl_results
+
+FIXTURE_PATH = os.path.join(
+    os.path.dirname(__file__), "fixtures", "research_payloads.json"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=int, default=1200)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(FIXTURE_PATH) as f:
+        fixtures = json.load(f)
+
+    print(
+        f"{'payload':<20} {'before':>8} {'after':>7} {'ratio':>7} {'emails':>7} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    for fixture in fixtures:
+        payload = fixture["payload"]
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            compacted = summarize_firecrawl_results(
+                payload,
+                fixture["partner_name"],
+                fixture["keywords"],
+                token_budget=args.budget,
+            )
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        before = estimate_tokens(json.dumps(payload))
+        after = estimate_tokens(json.dumps(compacted))
+        print(
+            f"{fixture['name']:<20} {before:>8} {after:>7} {before / after:>6.1f}x "
+            f"{len(compacted['emails']):>7} {statistics.median(samples):>8.2f} "
+            f"{samples[int(0.95 * (len(samples) - 1))]:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Hedged requests and failover across model providers, against two local
+OpenAI-compatible stub servers with injected latency.
+
+The primary usually answers in about --primary-ms but takes --slow-ms on a
+--slow-fraction of requests and fails with a 500 on --error-fraction. The
+secondary always answers in about --secondary-ms. Sends --requests chat
+requests at --concurrency through the primary alone (with the OpenAI SDK's
+own retries) and through a HedgedModel over both, and reports latency
+percentiles, errors, hedges, failovers and which endpoint answered. Each
+stub is its own endpoint with its own rate limiter.
+
+    python benchmarks/bench_hedging.py --requests 400 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+os.environ.setdefault("OPENAI_API_KEY", "offline-bench")
+
+import uvicorn
+from pydantic_ai.messages import ModelRequest, UserPromptPart
+from pydantic_ai.models import ModelRequestParameters
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import hedging
+import metrics
+from openai_model import get_openai_model
+
+
+def make_stub(name: str, ms: float, slow_ms: float, slow: float, errors: float):
+    served = {"requests": 0, "errors": 0}
+    rng = random.Random(name)
+
+    async def chat(request):
+        body = await request.json()
+        served["requests"] += 1
+        roll = rng.random()
+        if roll < errors:
+            served["errors"] += 1
+            await asyncio.sleep(ms / 1000 / 2)
+            return JSONResponse({"error": {"message": "overloaded"}}, status_code=500)
+        delay = slow_ms if roll < errors + slow else ms * rng.uniform(0.7, 1.3)
+        await asyncio.sleep(delay / 1000)
+        return JSONResponse(
+            {
+                "id": f"{name}-{served['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": f"from {name}"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 12,
+                    "completion_tokens": 3,
+                    "total_tokens": 15,
+                },
+            }
+        )
+
+    return (
+        Starlette(routes=[Route("/v1/chat/completions", chat, methods=["POST"])]),
+        served,
+    )
+
+
+def serve(app) -> str:
+    # Each stub runs its own event loop in a thread, like a remote server
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+async def drive(model, requests: int, concurrency: int):
+    params = ModelRequestParameters(
+        function_tools=[], allow_text_result=True, result_tools=[]
+    )
+    latencies, errors = [], 0
+    todo = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in todo:
+            messages = [ModelRequest(parts=[UserPromptPart(f"request {i}")])]
+            start = time.perf_counter()
+            try:
+                await model.request(messages, None, params)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def report(name: str, latencies, errors, served) -> None:
+    counters = metrics.snapshot()["counters"]
+    print(
+        f"{name:<8} "
+        + "  ".join(
+            f"p{int(q * 100)} {metrics.percentile(latencies, q) * 1000:6.0f} ms"
+            for q in (0.5, 0.95, 0.99)
+        )
+        + f"  errors {errors:>3}  hedged {counters.get('hedging.hedged', 0):>3}"
+        f"  failovers {counters.get('hedging.failovers', 0):>3}"
+        f"  primary served {served[0]['requests']:>4}"
+        f"  secondary served {served[1]['requests']:>4}"
+    )
+    wins = {
+        name.removeprefix("hedging.won."): count
+        for name, count in counters.items()
+        if name.startswith("hedging.won.")
+    }
+    if wins:
+        print(f"{'':<8} won by " + ", ".join(f"{k} {v}" for k, v in wins.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--primary-ms", type=float, default=60)
+    parser.add_argument("--slow-ms", type=float, default=1500)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--error-fraction", type=float, default=0.03)
+    parser.add_argument("--secondary-ms", type=float, default=90)
+    args = parser.parse_args()
+
+    primary_app, primary_served = make_stub(
+        "primary",
+        args.primary_ms,
+        args.slow_ms,
+        args.slow_fraction,
+        args.error_fraction,
+    )
+    secondary_app, secondary_served = make_stub("secondary", args.secondary_ms, 0, 0, 0)
+    primary_url, secondary_url = serve(primary_app), serve(secondary_app)
+    served = (primary_served, secondary_served)
+
+    for name, hedge_models in (
+        ("primary", ""),
+        ("hedged", f"openai:stub-secondary@{secondary_url}"),
+    ):
+        metrics.reset()
+        for counts in served:
+            counts.update(requests=0, errors=0)
+        model = get_openai_model(
+            "stub-primary",
+            api_key="stub",
+            base_url=primary_url,
+            hedge_models=hedge_models,
+        )
+        if isinstance(model, hedging.HedgedModel):
+            # The stubs answer in milliseconds, not seconds like real models
+            model.default_delay = args.primary_ms * 3 / 1000
+            model.min_delay = 0.0
+        latencies, errors = asyncio.run(drive(model, args.requests, args.concurrency))
+        report(name, latencies, errors, served)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Warm intros for the top-k mutual connections: one agent run per connection
+vs batched runs that write several intros per call.
+
+A FunctionModel stands in for the LLM: it writes a ~120 word intro per
+connection and sleeps --request-ms per call plus --ms-per-token per
+response token. Token counts are pydantic-ai's estimates for the prompts
+and answers actually sent, so the shared startup, partner and research
+context shows up once per call. Per-connection runs go out concurrently,
+as would be the case in the workflow.
+
+    python benchmarks/bench_intro_batch.py --connections 6 --batch-size 4
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+os.environ.setdefault("OPENAI_API_KEY", "offline-bench")
+
+import firecrawl_tools
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+
+from agent_intro_generator import (
+    IntroBatchDeps,
+    IntroGeneratorDeps,
+    make_agent_intro_batch_generator,
+    make_agent_intro_generator,
+)
+from models import Founder, ResearchContext, Startup, VCPartner
+
+STARTUP = Startup(
+    vision="Early detection of disease from a single drop of blood",
+    company_name="MediScan AI",
+    founders=(
+        Founder("Alex Johnson", "ML PhD, ex-Google Health"),
+        Founder("Sam Lee", "Clinical pathologist, 10 years at Quest"),
+    ),
+    product_description="A blood testing platform that screens for 40 cancers "
+    "from one sample, with results in 48 hours and 98% specificity.",
+)
+PARTNER = VCPartner(
+    name="Jake Bauer",
+    fund_name="ARCH Venture Partners",
+    fund_website="https://www.archventure.com",
+    linkedin_url="",
+)
+PAGE = (
+    "Jake Bauer is a Partner at ARCH Venture Partners focused on diagnostics "
+    "and early detection. The fund backs seed and Series A life sciences "
+    "companies. "
+) * 10
+CONNECTIONS = [
+    {
+        "name": f"Connection {i}",
+        "linkedin_url": f"https://www.linkedin.com/in/connection-{i}",
+        "headline": (
+            "Partner at a life sciences fund" if i % 2 else "Founder, Diagnostics"
+        ),
+    }
+    for i in range(10)
+]
+
+
+def letter(name: str) -> str:
+    return f"Hi Jake and Alex,\n\nI'm {name}. " + (
+        "MediScan screens for many cancers from one blood sample. " * 13
+    )
+
+
+def make_model(request_ms: float, ms_per_token: float):
+    async def respond(messages, info):
+        prompt = "\n".join(
+            part.content
+            for message in messages
+            for part in message.parts
+            if isinstance(getattr(part, "content", None), str)
+        )
+        if info.result_tools:
+            listed = re.findall(r"^\s*(\d+)\. (Connection \d+)", prompt, re.M)
+            intros = [
+                {"number": int(number), "connection": name, "intro": letter(name)}
+                for number, name in listed
+            ]
+            parts = [ToolCallPart(info.result_tools[0].name, {"response": intros})]
+            words = sum(len(intro["intro"].split()) for intro in intros)
+        else:
+            name = re.search(r"Mutual connection: (.+)", prompt).group(1)
+            parts = [TextPart(letter(name))]
+            words = len(letter(name).split())
+        await asyncio.sleep((request_ms + words * ms_per_token) / 1000)
+        return ModelResponse(parts=parts)
+
+    return FunctionModel(respond)
+
+
+def research() -> ResearchContext:
+    context = ResearchContext()
+    context.add(
+        PARTNER,
+        firecrawl_tools.summarize_firecrawl_results(
+            {"pages": [{"url": PARTNER.fund_website, "text": PAGE}]}, PARTNER.name
+        ),
+    )
+    return context
+
+
+async def per_connection(agent, model, connections):
+    results = await asyncio.gather(
+        *(
+            agent.run(
+                deps=IntroGeneratorDeps(
+                    STARTUP, PARTNER, connection["name"], research()
+                ),
+                model=model,
+            )
+            for connection in connections
+        )
+    )
+    return [result.data for result in results], [r.usage() for r in results]
+
+
+async def batched(agent, model, connections, batch_size: int):
+    batches = [
+        connections[i : i + batch_size] for i in range(0, len(connections), batch_size)
+    ]
+    results = await asyncio.gather(
+        *(
+            agent.run(
+                deps=IntroBatchDeps(STARTUP, PARTNER, batch, research()), model=model
+            )
+            for batch in batches
+        )
+    )
+    intros = [intro.intro for result in results for intro in result.data]
+    return intros, [r.usage() for r in results]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=6)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--request-ms", type=float, default=400)
+    parser.add_argument("--ms-per-token", type=float, default=2.0)
+    args = parser.parse_args()
+
+    connections = CONNECTIONS[: args.connections]
+    model = make_model(args.request_ms, args.ms_per_token)
+    single = make_agent_intro_generator()
+    batch = make_agent_intro_batch_generator()
+
+    async def drive():
+        for name, run in (
+            ("per-connection", lambda: per_connection(single, model, connections)),
+            (
+                f"batch of {args.batch_size}",
+                lambda: batched(batch, model, connections, args.batch_size),
+            ),
+            (
+                f"batch of {len(connections)}",
+                lambda: batched(batch, model, connections, len(connections)),
+            ),
+        ):
+            start = time.perf_counter()
+            intros, usages = await run()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:<16} {len(intros)} intros  {len(usages)} calls  "
+                f"{sum(u.request_tokens for u in usages):>6} prompt tokens  "
+                f"{sum(u.response_tokens for u in usages):>6} response tokens  "
+                f"{elapsed * 1000:6.0f} ms"
+            )
+
+    asyncio.run(drive())
+
+
+if __name__ == "__main__":
+    main()
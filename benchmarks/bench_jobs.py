@@ -0,0 +1,108 @@
+"""
+Job API with hundreds of outstanding jobs.
+
+Submits --jobs requests to a JobManager whose runner is a stub that reports
+progress for each workflow node and sleeps instead of calling LLMs and
+browsers, then long-polls every job to completion. Reports submit latency,
+time to finish all jobs and checks the results can be read back from a
+freshly opened store.
+
+    python benchmarks/bench_jobs.py --jobs 500 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from jobs import DONE, JobManager, JobStore
+from metrics import percentile
+from workflow import AGENT_NODES
+
+REQUEST = {
+    "startup": {
+        "vision": "Early detection from a drop of blood",
+        "company_name": "MediScan AI",
+        "founders": [{"name": "Alex Johnson", "background": "ML PhD"}],
+        "product_description": "Blood testing platform",
+    },
+    "vc_partner": {
+        "name": "Jake Bauer",
+        "fund_name": "ARCH Venture Partners",
+        "fund_website": "https://www.archventure.com",
+        "linkedin_url": "",
+    },
+    "mutual_connection": "Dr. David Schenkein",
+}
+
+
+def make_stub_runner(node_seconds: float):
+    async def run(state, thread_id, on_node=None):
+        for node in AGENT_NODES:
+            await asyncio.sleep(node_seconds)
+            if on_node is not None:
+                on_node(node)
+        return {"found_email": "jbauer@archventure.com", "thread_id": thread_id}
+
+    return run
+
+
+async def drive(args, path: str):
+    manager = JobManager(
+        make_stub_runner(args.node_seconds),
+        JobStore(path),
+        max_concurrency=args.concurrency,
+    )
+    submit_latencies = []
+    start = time.perf_counter()
+    job_ids = []
+    for _ in range(args.jobs):
+        submitted = time.perf_counter()
+        job_ids.append(manager.submit(REQUEST).job_id)
+        submit_latencies.append(time.perf_counter() - submitted)
+    submitted_all = time.perf_counter() - start
+
+    async def follow(job_id):
+        updates = 0
+        async for _ in manager.subscribe(job_id):
+            updates += 1
+        return updates
+
+    updates = await asyncio.gather(*(follow(job_id) for job_id in job_ids))
+    elapsed = time.perf_counter() - start
+    print(
+        f"submitted {args.jobs} jobs in {submitted_all * 1000:.0f} ms  "
+        f"(p50 {percentile(submit_latencies, 0.5) * 1000:.2f} ms, "
+        f"p99 {percentile(submit_latencies, 0.99) * 1000:.2f} ms)"
+    )
+    print(
+        f"all finished in {elapsed:.2f} s  "
+        f"{sum(updates) / len(updates):.1f} updates per subscriber"
+    )
+    return job_ids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--node-seconds", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.sqlite")
+        job_ids = asyncio.run(drive(args, path))
+        # A new process would open the same file and still find the results
+        store = JobStore(path)
+        done = sum(1 for job_id in job_ids if store.get(job_id).status == DONE)
+        print(f"reopened store: {done}/{len(job_ids)} jobs done {store.counts()}")
+        if done != len(job_ids):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
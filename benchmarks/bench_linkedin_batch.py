@@ -0,0 +1,91 @@
+"""
+One LinkedIn login per profile vs one login per batch.
+
+The browser is replaced by a stub session with fixed launch+login and
+per-profile delays (scaled down from typical headless runs), so this only
+measures how the calls are arranged, not LinkedIn itself.
+
+    python benchmarks/bench_linkedin_batch.py --profiles 30 --sessions 3
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import agent_introducer_finder.agent as introducer
+import linkedin_scheduler
+
+
+def stub_browser(login_seconds: float, profile_seconds: float):
+    @asynccontextmanager
+    async def linkedin_session(founder_email, founder_password):
+        await asyncio.sleep(login_seconds)
+        yield object()
+
+    async def scrape_mutual_connections(session, vc_linkedin_url):
+        await asyncio.sleep(profile_seconds)
+        return [{"name": "Connection", "linkedin_url": vc_linkedin_url + "/mutual"}]
+
+    introducer.linkedin_session = linkedin_session
+    introducer.scrape_mutual_connections = scrape_mutual_connections
+
+
+async def one_login_per_profile(urls) -> float:
+    start = time.perf_counter()
+    for url in urls:
+        await introducer.smart_linkedin_mutual_connections("f@x.com", "pw", url)
+    return time.perf_counter() - start
+
+
+async def batch(urls, sessions: int) -> float:
+    start = time.perf_counter()
+    first = None
+    async for profile in introducer.batch_linkedin_mutual_connections(
+        "f@x.com", "pw", urls, sessions=sessions
+    ):
+        if first is None:
+            first = time.perf_counter() - start
+        last = profile
+    elapsed = time.perf_counter() - start
+    print(
+        f"batch x{sessions:<2}            {elapsed:>7.2f} s  "
+        f"first result {first:.2f} s  amortized {last.amortized_seconds * 1000:.0f} ms/profile"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=30)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--login-seconds", type=float, default=0.4)
+    parser.add_argument("--profile-seconds", type=float, default=0.1)
+    args = parser.parse_args()
+
+    stub_browser(args.login_seconds, args.profile_seconds)
+    urls = [f"https://www.linkedin.com/in/partner-{i}" for i in range(args.profiles)]
+
+    async def drive():
+        # Let the account run --sessions browsers without pacing
+        scheduler = linkedin_scheduler.AccountScheduler(
+            max_sessions=args.sessions, min_interval=0
+        )
+        linkedin_scheduler.get_scheduler = lambda loop=None: scheduler
+        single = await one_login_per_profile(urls)
+        print(
+            f"one login per profile {single:>7.2f} s  "
+            f"{single / len(urls) * 1000:.0f} ms/profile"
+        )
+        await batch(urls, 1)
+        await batch(urls, args.sessions)
+
+    asyncio.run(drive())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Event loop lag while many tasks log, with logging off, with a synchronous
+handler writing from the loop (the old get_logger setup) and with the queue
+pipeline from log.configure_logging.
+
+A monitor task sleeps for --interval ms and records how late it wakes up.
+Records go to a temporary file so the terminal does not skew the numbers.
+
+    python benchmarks/bench_log_lag.py --tasks 200 --seconds 3
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import log
+from metrics import percentile
+
+EMAIL = "Dear Jake,\n\n" + "I am reaching out about our diagnostics platform. " * 30
+
+
+def setup(mode: str, stream) -> None:
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    log.shutdown_logging()
+    if mode == "sync":
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(log.console_formatter())
+        root.addHandler(handler)
+    elif mode == "queue":
+        log.configure_logging(stream=stream)
+
+
+async def worker(logger: logging.Logger, stop: float, counter: list) -> None:
+    while time.perf_counter() < stop:
+        logger.info("Drafted cold email for %s: %s", "Jake Bauer", EMAIL)
+        logger.info("Research resolved at tier %s", "fund_site")
+        counter[0] += 2
+        await asyncio.sleep(0)
+
+
+async def monitor(interval: float, stop: float, lags: list) -> None:
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def measure(tasks: int, seconds: float, interval: float):
+    logger = logging.getLogger("bench")
+    lags, counter = [], [0]
+    stop = time.perf_counter() + seconds
+    await asyncio.gather(
+        monitor(interval, stop, lags),
+        *(worker(logger, stop, counter) for _ in range(tasks)),
+    )
+    return sorted(lags), counter[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--interval", type=float, default=5.0, help="ms")
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<7} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11} {'records/s':>10}"
+    )
+    for mode in ("off", "sync", "queue"):
+        with tempfile.TemporaryFile("w") as stream:
+            setup(mode, stream)
+            logging.getLogger("bench").setLevel(
+                logging.CRITICAL if mode == "off" else logging.INFO
+            )
+            lags, records = asyncio.run(
+                measure(args.tasks, args.seconds, args.interval / 1000)
+            )
+            log.shutdown_logging()
+        print(
+            f"{mode:<7} {percentile(lags, 0.5) * 1000:>11.2f} {percentile(lags, 0.99) * 1000:>11.2f} "
+            f"{lags[-1] * 1000:>11.2f} {records / args.seconds:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
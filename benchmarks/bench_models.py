@@ -0,0 +1,136 @@
+"""
+Memory per workflow state and checkpoint serialization time for the legacy
+dict-backed dataclasses versus the slotted models in models.py.
+
+    python benchmarks/bench_models.py --states 10000
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import models
+from serialization import CheckpointSerializer
+
+
+# The definitions that used to be duplicated across the agent modules
+@dataclass
+class LegacyFounder:
+    name: str
+    background: str
+
+
+@dataclass
+class LegacyStartup:
+    vision: str
+    company_name: str
+    founders: List[LegacyFounder]
+    product_description: str
+
+
+@dataclass
+class LegacyVCPartner:
+    name: str
+    fund_name: str
+    fund_website: str
+    linkedin_url: str
+
+
+def make_state(i: int, founder_cls, startup_cls, partner_cls, seq):
+    return {
+        "messages": [],
+        "startup": startup_cls(
+            vision=f"Vision {i}",
+            company_name=f"Company {i}",
+            founders=seq(
+                [
+                    founder_cls(name=f"Founder {i}a", background="PhD in ML"),
+                    founder_cls(name=f"Founder {i}b", background="Ex-CTO"),
+                ]
+            ),
+            product_description=f"Product {i}",
+        ),
+        "vc_partner": partner_cls(
+            name=f"Partner {i}",
+            fund_name="Fund",
+            fund_website="https://fund.example",
+            linkedin_url=f"https://www.linkedin.com/in/partner-{i}/",
+        ),
+        "found_email": "",
+        "generated_intro": "",
+        "cold_email": "",
+    }
+
+
+def bytes_per_state(factory, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    states = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del states
+    return (after - before) / count
+
+
+def time_roundtrip(dumps, loads, states) -> tuple:
+    start = time.perf_counter()
+    blobs = [dumps(s) for s in states]
+    dumped = time.perf_counter() - start
+    start = time.perf_counter()
+    for blob in blobs:
+        loads(blob)
+    loaded = time.perf_counter() - start
+    size = sum(len(b[1]) if isinstance(b, tuple) else len(b) for b in blobs)
+    n = len(states)
+    return dumped / n * 1e6, loaded / n * 1e6, size / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--states", type=int, default=10000)
+    args = parser.parse_args()
+
+    def legacy(i):
+        return make_state(i, LegacyFounder, LegacyStartup, LegacyVCPartner, list)
+
+    def slotted(i):
+        return make_state(i, models.Founder, models.Startup, models.VCPartner, tuple)
+
+    print("Memory per state")
+    print(f"  legacy dataclasses: {bytes_per_state(legacy, args.states):8.0f} B")
+    print(f"  slotted models:     {bytes_per_state(slotted, args.states):8.0f} B")
+
+    serde = CheckpointSerializer()
+    legacy_states = [legacy(i) for i in range(args.states)]
+    slotted_states = [slotted(i) for i in range(args.states)]
+    rows = [
+        ("pickle, legacy", pickle.dumps, pickle.loads, legacy_states),
+        (
+            "langgraph jsonplus, legacy",
+            serde.fallback.dumps_typed,
+            serde.fallback.loads_typed,
+            legacy_states,
+        ),
+        (
+            "msgpack models, slotted",
+            serde.dumps_typed,
+            serde.loads_typed,
+            slotted_states,
+        ),
+    ]
+    print("\nCheckpoint serialization per state")
+    print(f"  {'':<28} {'dump us':>8} {'load us':>8} {'bytes':>7}")
+    for name, dumps, loads, states in rows:
+        dump_us, load_us, size = time_roundtrip(dumps, loads, states)
+        print(f"  {name:<28} {dump_us:>8.1f} {load_us:>8.1f} {size:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
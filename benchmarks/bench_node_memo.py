@@ -0,0 +1,117 @@
+"""
+Re-running the workflow with memoized nodes.
+
+Runs the full workflow on stubbed backends (a FunctionModel that sleeps
+--model-ms per request instead of OpenAI, and answers without research or
+a browser), four times:
+
+- first: every node runs
+- same: an identical request, every node is served from node_memo
+- new pitch: only product_description changes, so the LinkedIn scrape and
+  the email lookup are reused and only the intro and cold email are redone
+- recompute: the new pitch again with "recompute": true, every node runs
+
+    python benchmarks/bench_node_memo.py --model-ms 300
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+os.environ.setdefault("OPENAI_API_KEY", "offline-bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import openai_model
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+
+from workflow import make_workflow_runner, state_from_request
+
+REQUEST = {
+    "startup": {
+        "vision": "Early detection of disease from a single drop of blood",
+        "company_name": "MediScan AI",
+        "founders": [{"name": "Alex Johnson", "background": "ML PhD"}],
+        "product_description": "A blood testing platform for 40 cancers",
+    },
+    "vc_partner": {
+        "name": "Jake Bauer",
+        "fund_name": "ARCH Venture Partners",
+        "fund_website": "https://www.archventure.com",
+        "linkedin_url": "https://www.linkedin.com/in/jake-bauer",
+    },
+    "founder_email": "alex@mediscan.ai",
+    "founder_password": "bench",
+}
+NEW_PITCH = "Cancer screening with results in 48 hours and 98% specificity"
+CONNECTIONS = [
+    {
+        "name": "Dr. David Schenkein",
+        "linkedin_url": "https://www.linkedin.com/in/david-schenkein",
+        "headline": "Partner at ARCH Venture Partners",
+    },
+    {
+        "name": "Maria Chen",
+        "linkedin_url": "https://www.linkedin.com/in/maria-chen",
+        "headline": "Founder, Diagnostics",
+    },
+]
+LETTER = "Dear Jake,\n\n" + "We are building early detection from a drop of blood. " * 8
+
+
+def make_model(model_ms: float):
+    async def respond(messages, info):
+        await asyncio.sleep(model_ms / 1000)
+        if not info.result_tools:
+            return ModelResponse(parts=[TextPart(LETTER)])
+        tool = info.result_tools[0]
+        if "email" in tool.parameters_json_schema.get("properties", {}):
+            args = {"email": "jbauer@archventure.com"}
+        else:
+            args = {"response": CONNECTIONS}
+        return ModelResponse(parts=[ToolCallPart(tool.name, args)])
+
+    return FunctionModel(respond)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    model = make_model(args.model_ms)
+    openai_model.get_openai_model = lambda *a, **k: model
+    run = make_workflow_runner()
+    pitched = {**REQUEST["startup"], "product_description": NEW_PITCH}
+
+    async def drive():
+        for name, request in (
+            ("first", REQUEST),
+            ("same", REQUEST),
+            ("new pitch", {**REQUEST, "startup": pitched}),
+            ("recompute", {**REQUEST, "startup": pitched, "recompute": True}),
+        ):
+            state, thread_id = state_from_request(request)
+            start = time.perf_counter()
+            result = await run(state, thread_id)
+            elapsed = time.perf_counter() - start
+            recomputed = [
+                entry["node"].removeprefix("node_")
+                for entry in result["node_cache"]
+                if not entry["hit"]
+            ]
+            print(
+                f"{name:<10} {elapsed * 1000:6.0f} ms  "
+                f"{sum(r['requests'] for r in result['routing']):>2} model requests  "
+                f"{len(result['node_cache']) - len(recomputed)} hits  "
+                f"recomputed: {', '.join(recomputed) or '-'}"
+            )
+
+    asyncio.run(drive())
+
+
+if __name__ == "__main__":
+    main()
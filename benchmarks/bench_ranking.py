@@ -0,0 +1,83 @@
+"""
+Introducer ranking speed: build a ConnectionIndex over synthetic mutual
+connections once, then rank them against many VC partners.
+
+    python benchmarks/bench_ranking.py --candidates 5000 --partners 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from introducer_ranking import ConnectionIndex
+from metrics import percentile
+from models import Founder, Startup, VCPartner
+
+FIRST = "Alex Sam Priya Tom Maria Chen Omar Lena Jonas Aiko Ravi Nora".split()
+LAST = "Johnson Lee Raman Becker Ortiz Wang Haddad Novak Berg Sato Patel Kim".split()
+ROLES = "Partner Principal Investor Engineer Director Founder CEO Designer Analyst Radiologist".split()
+COMPANIES = (
+    "ARCH Sequoia Lowercarbon Stripe Google Shopify Mayo Nest Brookfield a16z".split()
+)
+TOPICS = "healthcare diagnostics imaging climate energy fintech payments AI ML software".split()
+
+
+def synthetic_connections(count: int, rng: random.Random):
+    return [
+        {
+            "name": f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+            "linkedin_url": f"https://www.linkedin.com/in/person-{i}",
+            "headline": f"{rng.choice(ROLES)} at {rng.choice(COMPANIES)} | "
+            + " ".join(rng.sample(TOPICS, 3)),
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--partners", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    connections = synthetic_connections(args.candidates, rng)
+    startup = Startup(
+        vision="Earlier disease detection with AI",
+        company_name="MediScan AI",
+        founders=[Founder(name="Alex Johnson", background="ML PhD")],
+        product_description="AI diagnostics for medical imaging",
+    )
+
+    start = time.perf_counter()
+    index = ConnectionIndex(connections)
+    build = time.perf_counter() - start
+
+    samples = []
+    for i in range(args.partners):
+        fund = COMPANIES[i % len(COMPANIES)]
+        vc_partner = VCPartner(
+            name=f"Partner {i}",
+            fund_name=f"{fund} Capital",
+            fund_website=f"https://{fund.lower()}.com",
+            linkedin_url="",
+        )
+        start = time.perf_counter()
+        ranking = index.rank(vc_partner, startup, top_k=5)
+        samples.append(time.perf_counter() - start)
+
+    print(f"index {len(index)} candidates in {build * 1000:.1f} ms")
+    print(
+        f"rank  p50 {percentile(samples, 0.5) * 1000:.2f} ms  "
+        f"p95 {percentile(samples, 0.95) * 1000:.2f} ms per partner"
+    )
+    print(f"top for last partner: {ranking[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Shared limiter against a local stub server that returns 429 above a fixed
+request rate. Many concurrent clients are run once without a limiter
+(retrying on 429 like the agents do) and once through ProviderLimiter.
+With the limiter, throughput should sit close to the server's limit with
+no 429s.
+
+    python benchmarks/bench_rate_limit.py --server-rps 50 --clients 40
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import metrics
+from rate_limit import ProviderLimiter, TokenBucket
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+async def start_stub_server(rps: float, latency: float):
+    bucket = TokenBucket(rps, capacity=rps)
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if not request:
+                    break
+                if bucket.reserve(1) > 0:
+                    bucket.adjust(-1)  # rejected requests do not consume capacity
+                    status = b"429 Too Many Requests"
+                else:
+                    await asyncio.sleep(latency)
+                    status = b"200 OK"
+                writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/"
+
+
+async def run_clients(url: str, clients: int, duration: float, limiter=None):
+    stats = {"ok": 0, "throttled": 0}
+    deadline = time.perf_counter() + duration
+
+    async def call(client):
+        response = await client.get(url)
+        if response.status_code != 200:
+            stats["throttled"] += 1
+            raise StatusError(response.status_code)
+        stats["ok"] += 1
+
+    async def worker(client):
+        while time.perf_counter() < deadline:
+            try:
+                if limiter is None:
+                    await call(client)
+                else:
+                    async with limiter.slot():
+                        await call(client)
+            except StatusError:
+                await asyncio.sleep(0.05)
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(clients)))
+    return stats
+
+
+async def main_async(args):
+    server, url = await start_stub_server(args.server_rps, args.latency)
+    async with server:
+        print(f"Stub server limit: {args.server_rps:.0f} req/s, {args.clients} clients")
+        print(f"{'mode':<22} {'ok/s':>8} {'429s':>8} {'wait p95 ms':>12}")
+
+        stats = await run_clients(url, args.clients, args.duration)
+        print(
+            f"{'no limiter':<22} {stats['ok'] / args.duration:>8.1f} {stats['throttled']:>8} {'-':>12}"
+        )
+
+        for label, rpm in (
+            ("adaptive only", None),
+            ("adaptive + bucket", args.server_rps * 60 * 0.95),
+        ):
+            await asyncio.sleep(1)  # let the server's bucket refill between runs
+            metrics.reset()
+            limiter = ProviderLimiter(
+                "stub", requests_per_minute=rpm, max_concurrency=args.clients
+            )
+            stats = await run_clients(url, args.clients, args.duration, limiter)
+            wait = metrics.snapshot()["timings"].get("rate_limit.stub.wait_seconds", {})
+            print(
+                f"{label:<22} {stats['ok'] / args.duration:>8.1f} {stats['throttled']:>8} "
+                f"{wait.get('p95', 0) * 1000:>12.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server-rps", type=float, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--clients", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
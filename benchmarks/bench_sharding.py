@@ -0,0 +1,103 @@
+"""
+Throughput of ShardedWorkflowPool from 1 to N worker processes.
+
+Backends are stubbed: each run sleeps to stand in for network I/O and then
+does CPU-bound snapshot parsing and JSON handling, which is the part that
+competes for the GIL in a single process.
+
+    python benchmarks/bench_sharding.py --workers 4 --runs 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from sharding import ShardedWorkflowPool
+
+
+def _fake_snapshot(rows: int) -> str:
+    lines = []
+    for i in range(rows):
+        lines.append(
+            f'- link "Person {i}, Partner at Fund {i % 50} Status is reachable" '
+            f"[ref=e{i}] [cursor=pointer]:"
+        )
+        lines.append(f"  - /url: https://www.linkedin.com/in/person-{i}/")
+    return "\n".join(lines)
+
+
+def make_stub_runner(io_seconds: float = 0.05, cpu_rows: int = 4000):
+    snapshot = _fake_snapshot(cpu_rows)
+    link_re = re.compile(r'- link "([^"]+)" \[ref=[^\]]+\] \[cursor=pointer\]:')
+    url_re = re.compile(r"/url: (https://www\.linkedin\.com/in/[^\s]+)")
+
+    async def run(state, thread_id: str, on_node=None) -> dict:
+        await asyncio.sleep(io_seconds)
+        lines = snapshot.splitlines()
+        connections = []
+        for i, line in enumerate(lines):
+            m = link_re.search(line)
+            if m and i + 1 < len(lines):
+                url = url_re.search(lines[i + 1])
+                if url:
+                    connections.append(
+                        {"name": m.group(1).split(",")[0], "linkedin_url": url.group(1)}
+                    )
+        payload = json.loads(json.dumps({"thread_id": thread_id, "c": connections}))
+        if on_node is not None:
+            on_node("node_introducer_finder")
+        return {
+            "found_email": "",
+            "generated_intro": "",
+            "cold_email": str(len(payload["c"])),
+        }
+
+    return run
+
+
+async def _drive(pool: ShardedWorkflowPool, runs: int) -> float:
+    # Warm up every shard so process start-up is not part of the measurement
+    await asyncio.gather(
+        *(pool.run({}, str(uuid.uuid4())) for _ in range(pool.num_workers * 2))
+    )
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.run({}, str(uuid.uuid4())) for _ in range(runs)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--runs", type=int, default=64)
+    parser.add_argument("--io-seconds", type=float, default=0.05)
+    parser.add_argument("--cpu-rows", type=int, default=4000)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>9} {'runs/s':>9} {'speedup':>8}")
+    for workers in range(1, args.workers + 1):
+        pool = ShardedWorkflowPool(
+            workers,
+            factory=make_stub_runner,
+            factory_kwargs={"io_seconds": args.io_seconds, "cpu_rows": args.cpu_rows},
+        ).start()
+        try:
+            elapsed = asyncio.run(_drive(pool, args.runs))
+        finally:
+            pool.close()
+        throughput = args.runs / elapsed
+        baseline = baseline or throughput
+        print(
+            f"{workers:>8} {elapsed:>9.2f} {throughput:>9.1f} {throughput / baseline:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
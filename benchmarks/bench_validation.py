@@ -0,0 +1,147 @@
+"""
+Cost of a bad email finder answer: targeted retry vs re-running the agent.
+
+A FunctionModel plays a model that researches the partner (one tool call),
+then answers with prose instead of an address on its first try and with the
+address once told what was wrong. Each model request sleeps --model-seconds
+and each research call --research-seconds.
+
+- targeted: the agent's result validation rejects the prose and only the
+  final answer is asked for again, in the same conversation
+- rerun: the old str result is checked after the run and the whole run,
+  research included, is repeated
+
+    python benchmarks/bench_validation.py --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+os.environ.setdefault("OPENAI_API_KEY", "offline-bench")
+
+import firecrawl_tools
+from pydantic_ai import Agent
+from pydantic_ai.messages import (
+    ModelResponse,
+    RetryPromptPart,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+)
+from pydantic_ai.models.function import FunctionModel
+
+from agent_email_finder import EmailFinderDeps, make_agent_email_finder
+from models import ResearchContext, VCPartner
+from output_validation import EMAIL_RE, validation_retries
+
+PARTNER = VCPartner(
+    name="Jake Bauer",
+    fund_name="ARCH Venture Partners",
+    fund_website="https://www.archventure.com",
+    linkedin_url="",
+)
+PROSE = "Based on the fund website, Jake Bauer can most likely be reached by email."
+EMAIL = "jbauer@archventure.com"
+
+
+def make_model(model_seconds: float, answers: list):
+    async def respond(messages, info):
+        await asyncio.sleep(model_seconds)
+        last = messages[-1].parts[-1]
+        if isinstance(last, RetryPromptPart):
+            answer = EMAIL
+        elif info.function_tools and not isinstance(last, ToolReturnPart):
+            tool = info.function_tools[0].name
+            return ModelResponse(parts=[ToolCallPart(tool, {"query": PARTNER.name})])
+        else:
+            # Prose on a first try, the address on any later run
+            answer = PROSE if not answers else EMAIL
+        answers.append(answer)
+        if info.result_tools:
+            tool = info.result_tools[0].name
+            return ModelResponse(parts=[ToolCallPart(tool, {"email": answer})])
+        return ModelResponse(parts=[TextPart(answer)])
+
+    return FunctionModel(respond)
+
+
+async def targeted(agent, model_seconds: float):
+    model = make_model(model_seconds, [])
+    result = await agent.run(
+        deps=EmailFinderDeps(PARTNER, ResearchContext()), model=model
+    )
+    retries, retry_seconds = validation_retries(result.all_messages())
+    return result.data.email, result.usage().requests, retries, retry_seconds
+
+
+async def rerun(agent, model_seconds: float):
+    answers = []
+    requests = runs = 0
+    started = None
+    while True:
+        # A fresh ResearchContext per run, as a new workflow run would have
+        result = await agent.run(
+            deps=EmailFinderDeps(PARTNER, ResearchContext()),
+            model=make_model(model_seconds, answers),
+        )
+        requests += result.usage().requests
+        runs += 1
+        if EMAIL_RE.match(result.data.strip()):
+            retry_seconds = time.perf_counter() - started if started else 0.0
+            return result.data, requests, runs - 1, retry_seconds
+        started = started or time.perf_counter()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--model-seconds", type=float, default=0.05)
+    parser.add_argument("--research-seconds", type=float, default=0.2)
+    args = parser.parse_args()
+
+    async def canned_research(query, partner_name, fund_website, **_):
+        await asyncio.sleep(args.research_seconds)
+        return {
+            "tier": "fund_site",
+            "resolved": True,
+            "pages": [{"url": fund_website, "text": f"Reach Jake at {EMAIL}."}],
+        }
+
+    firecrawl_tools.tiered_research = canned_research
+    validated = make_agent_email_finder()
+    # The agent as it was before result validation: a plain str answer
+    unvalidated = Agent(
+        validated.model,
+        system_prompt="Only return the email address, nothing else.",
+        deps_type=EmailFinderDeps,
+        retries=3,
+        result_type=str,
+        tools=[firecrawl_tools.tool_research_vc_email],
+    )
+
+    async def drive():
+        for name, agent, strategy in (
+            ("targeted", validated, targeted),
+            ("rerun", unvalidated, rerun),
+        ):
+            start = time.perf_counter()
+            outcomes = [
+                await strategy(agent, args.model_seconds) for _ in range(args.runs)
+            ]
+            elapsed = (time.perf_counter() - start) / args.runs
+            email, requests, retries, retry_seconds = outcomes[-1]
+            print(
+                f"{name:<9} {email:<24} {requests} model requests  "
+                f"{retries} retries costing {retry_seconds * 1000:5.0f} ms  "
+                f"{elapsed * 1000:6.0f} ms per run"
+            )
+
+    asyncio.run(drive())
+
+
+if __name__ == "__main__":
+    main()
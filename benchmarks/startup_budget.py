@@ -0,0 +1,98 @@
+"""
+Startup budget check based on ``python -X importtime``.
+
+For every module in startup_budget.json the cumulative import time (median
+of several fresh interpreters) must stay under its budget in microseconds,
+and none of the ``forbidden`` heavy modules may be loaded as a side effect.
+Exits with status 1 on any regression.
+
+    python benchmarks/startup_budget.py            # check
+    python benchmarks/startup_budget.py --update   # re-baseline with 25% headroom
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), "startup_budget.json")
+
+
+def measure(module: str) -> Tuple[int, List[str]]:
+    code = f"import sys, {module}; print('\\n'.join(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = None
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) != 3 or not line.startswith("import time:"):
+            continue
+        if parts[2].strip() == module and not parts[2][1:].startswith(" "):
+            cumulative = int(parts[1].strip())
+    if cumulative is None:
+        raise RuntimeError(f"No importtime entry found for {module}")
+    return cumulative, proc.stdout.split()
+
+
+def loaded_forbidden(modules: List[str], forbidden: List[str]) -> List[str]:
+    found = set()
+    for name in modules:
+        for heavy in forbidden:
+            if name == heavy or name.startswith(heavy + "."):
+                found.add(heavy)
+    return sorted(found)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+
+    with open(BUDGET_PATH) as f:
+        budget = json.load(f)
+
+    failures = []
+    measured: Dict[str, int] = {}
+    for module, limit in budget["modules"].items():
+        samples = []
+        modules: List[str] = []
+        for _ in range(args.repeat):
+            cumulative, modules = measure(module)
+            samples.append(cumulative)
+        measured[module] = int(statistics.median(samples))
+        status = "ok" if measured[module] <= limit else "OVER"
+        print(
+            f"{module:<12} {measured[module] / 1000:>9.1f} ms  budget {limit / 1000:>9.1f} ms  {status}"
+        )
+        if measured[module] > limit:
+            failures.append(f"{module} took {measured[module]}us (budget {limit}us)")
+        heavy = loaded_forbidden(modules, budget["forbidden"])
+        if heavy:
+            failures.append(f"import {module} loaded {', '.join(heavy)}")
+
+    if args.update:
+        budget["modules"] = {m: int(v * 1.25) for m, v in measured.items()}
+        with open(BUDGET_PATH, "w") as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        print(f"Updated {BUDGET_PATH}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import orjson
+
+
+@dataclass(frozen=True, slots=True)
+class BlobRef:
+    """
+    Reference to a value held in a BlobStore. Workflow state keeps these
+    instead of large texts, so checkpoints and node writes stay small.
+    """
+
+    key: str
+    size: int
+
+
+class BlobStore:
+    """
+    Content-addressed in-process store for large state values (generated
+    texts, research findings). Identical values share one entry. It lives as
+    long as the process, like the MemorySaver checkpoints that refer to it.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def put(self, value: Any) -> BlobRef:
+        data = orjson.dumps(value)
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._values.setdefault(key, data)
+        return BlobRef(key=key, size=len(data))
+
+    def get(self, ref: BlobRef) -> Any:
+        with self._lock:
+            data = self._values.get(ref.key)
+        if data is None:
+            raise KeyError(f"Blob {ref.key[:12]} is not in this process")
+        return orjson.loads(data)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        _store = BlobStore()
+    return _store
+
+
+def put(value: Any) -> BlobRef:
+    return get_blob_store().put(value)
+
+
+def deref(value: Any) -> Any:
+    return get_blob_store().get(value) if isinstance(value, BlobRef) else value
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Absolute wall-clock deadline (time.time()) of the request being served.
+# Wall-clock rather than monotonic so it survives being stored in the graph
+# state and handed to another worker process.
+_deadline_at: ContextVar[Optional[float]] = ContextVar("deadline_at", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class StepTimeout(TimeoutError):
+    """
+    A single step ran past its own `timeout` before the request deadline,
+    if any, ran out.
+    """
+
+
+def deadline_from_seconds(seconds: Optional[float]) -> Optional[float]:
+    return time.time() + float(seconds) if seconds else None
+
+
+def current_deadline() -> Optional[float]:
+    return _deadline_at.get()
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds left before the current deadline, `default` if there is none.
+    """
+    at = _deadline_at.get()
+    if at is None:
+        return default
+    return at - time.time()
+
+
+def expired(at: Optional[float] = None) -> bool:
+    at = at if at is not None else _deadline_at.get()
+    return at is not None and time.time() >= at
+
+
+def clamp(seconds: float) -> float:
+    left = remaining()
+    return seconds if left is None else max(0.0, min(seconds, left))
+
+
+@contextmanager
+def deadline_scope(at: Optional[float]):
+    # A nested scope can only tighten the deadline, never extend it
+    outer = _deadline_at.get()
+    if outer is not None and (at is None or outer < at):
+        at = outer
+    token = _deadline_at.set(at)
+    try:
+        yield at
+    finally:
+        _deadline_at.reset(token)
+
+
+async def with_deadline(
+    awaitable: Awaitable[T], what: str, timeout: Optional[float] = None
+) -> T:
+    """
+    Await `awaitable`, cancelling it when the current deadline (or `timeout`,
+    whichever comes first) runs out. Raises DeadlineExceeded for the
+    deadline and StepTimeout for `timeout`.
+    """
+    left = remaining()
+    step = timeout is not None and (left is None or timeout < left)
+    if step:
+        left = timeout
+    if left is None:
+        return await awaitable
+    error = StepTimeout if step else DeadlineExceeded
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise error(f"No time left for {what}")
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except (DeadlineExceeded, StepTimeout):
+        raise
+    except asyncio.TimeoutError:
+        raise error(f"{what} did not finish within {left:.1f}s") from None
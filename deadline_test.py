@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import pytest
+
+from deadline import (
+    DeadlineExceeded,
+    StepTimeout,
+    deadline_from_seconds,
+    deadline_scope,
+    with_deadline,
+)
+
+
+def run(coro, deadline_seconds=None):
+    async def scoped():
+        with deadline_scope(deadline_from_seconds(deadline_seconds)):
+            return await coro
+
+    return asyncio.run(scoped())
+
+
+def test_step_timeout_without_request_deadline():
+    with pytest.raises(StepTimeout):
+        run(with_deadline(asyncio.sleep(1), "browser step", 0.05))
+
+
+def test_step_timeout_before_request_deadline():
+    with pytest.raises(StepTimeout):
+        run(with_deadline(asyncio.sleep(1), "browser step", 0.05), 10)
+
+
+def test_request_deadline_before_step_timeout():
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        run(with_deadline(asyncio.sleep(1), "browser step", 5), 0.05)
+    assert time.perf_counter() - start < 0.5
+
+
+def test_nested_step_timeout_is_not_turned_into_deadline():
+    async def outer():
+        return await with_deadline(
+            with_deadline(asyncio.sleep(1), "inner step", 0.05), "node"
+        )
+
+    with pytest.raises(StepTimeout):
+        run(outer(), 10)
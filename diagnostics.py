@@ -0,0 +1,381 @@
+import asyncio
+import gc
+import hmac
+import importlib.util
+import os
+import signal
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+import log
+import metrics
+
+logger = log.get_logger(__name__)
+
+# Opt-in diagnostics for the long-running agent process. Nothing here runs
+# unless enabled through DIAGNOSTICS (e.g. "tracemalloc,loop_lag"), the
+# diagnostics action of fetch_agent or enable().
+DIAGNOSTICS = os.getenv("DIAGNOSTICS", "")
+DIAGNOSTICS_DIR = os.getenv("DIAGNOSTICS_DIR", ".diagnostics")
+# Shared secret for the diagnostics action and per-request profiling; both
+# are refused while it is unset
+DIAGNOSTICS_TOKEN = os.getenv("DIAGNOSTICS_TOKEN", "")
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.25"))
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "1"))
+TRACEMALLOC_TOP = int(os.getenv("TRACEMALLOC_TOP", "20"))
+
+FEATURES = ("tracemalloc", "loop_lag")
+PROFILERS = ("cprofile", "pyinstrument")
+# Command lines of child processes that belong to browser automation
+CHILD_KINDS = {
+    "mcp": ("@playwright/mcp", "mcp-server", "npx"),
+    "browser": ("chrome", "chromium", "headless_shell", "firefox", "webkit"),
+}
+
+
+class LoopLagMonitor:
+    """
+    Sleeps `interval` seconds in a loop on the event loop and records how
+    much later than asked it woke up, which is how long something blocked
+    the loop. Samples go to the event_loop.lag_seconds timing.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.max_lag = max(self.max_lag, lag)
+            metrics.observe("event_loop.lag_seconds", lag)
+            if lag > 1.0:
+                logger.warning("Event loop was blocked for %.2fs", lag)
+
+
+class MemoryTracker:
+    """
+    tracemalloc snapshots, each diffed against the previous one so growth
+    shows up as the allocation sites that keep getting bigger.
+    """
+
+    def __init__(self, frames: int = TRACEMALLOC_FRAMES):
+        self.frames = frames
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._previous = tracemalloc.take_snapshot()
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._previous = None
+
+    def diff(self, top: int = TRACEMALLOC_TOP) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            return {}
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        stats = (
+            snapshot.compare_to(self._previous, "lineno")
+            if self._previous is not None
+            else snapshot.statistics("lineno")
+        )
+        self._previous = snapshot
+        return {
+            "traced_kb": current // 1024,
+            "peak_kb": peak // 1024,
+            "top": [
+                {
+                    "where": str(stat.traceback[0]),
+                    "size_kb": round(stat.size / 1024, 1),
+                    "size_diff_kb": round(getattr(stat, "size_diff", 0) / 1024, 1),
+                    "count": stat.count,
+                    "count_diff": getattr(stat, "count_diff", 0),
+                }
+                for stat in stats[:top]
+            ],
+        }
+
+
+loop_lag = LoopLagMonitor()
+memory = MemoryTracker()
+_probes: Dict[str, Callable[[], Any]] = {}
+
+
+def register_probe(name: str, probe: Callable[[], Any]) -> None:
+    """
+    Add a cheap callable whose value is included in every report, e.g. the
+    number of threads a checkpointer holds.
+    """
+    _probes[name] = probe
+
+
+def enable(features: Optional[List[str]] = None) -> List[str]:
+    """
+    Turn on the given features (default: all). The loop lag monitor only
+    starts when called on a running event loop.
+    """
+    features = list(FEATURES if features is None else features)
+    unknown = set(features) - set(FEATURES)
+    if unknown:
+        raise ValueError(
+            f"Unknown diagnostics {sorted(unknown)}. Choose from {list(FEATURES)}."
+        )
+    if "tracemalloc" in features:
+        memory.start()
+    if "loop_lag" in features:
+        try:
+            loop_lag.start()
+        except RuntimeError:
+            logger.warning("Loop lag monitor needs a running event loop")
+    return active()
+
+
+def disable(features: Optional[List[str]] = None) -> List[str]:
+    features = FEATURES if features is None else features
+    if "tracemalloc" in features:
+        memory.stop()
+    if "loop_lag" in features:
+        loop_lag.stop()
+    return active()
+
+
+def active() -> List[str]:
+    return [
+        name
+        for name, on in (
+            ("tracemalloc", memory.running),
+            ("loop_lag", loop_lag.running),
+        )
+        if on
+    ]
+
+
+def ensure_started() -> None:
+    # Called from request handlers, so features enabled by DIAGNOSTICS start
+    # on the loop that serves requests
+    if DIAGNOSTICS and not loop_lag.running and not memory.running:
+        enable([f.strip() for f in DIAGNOSTICS.split(",") if f.strip()])
+
+
+def child_processes() -> Dict[str, Any]:
+    """
+    Live descendants of this process by kind (MCP servers, browsers, other),
+    read from /proc. Leaked browser sessions show up as a growing count.
+    """
+    if not os.path.isdir("/proc"):
+        return {"supported": False}
+    parents: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name is in parentheses and may contain spaces
+        fields = stat[stat.rfind(b")") + 2 :].split()
+        parents[int(entry)] = int(fields[1])
+
+    children, frontier = [], [os.getpid()]
+    while frontier:
+        pid = frontier.pop()
+        for child, parent in parents.items():
+            if parent == pid:
+                children.append(child)
+                frontier.append(child)
+
+    counts = {"total": len(children), "mcp": 0, "browser": 0, "other": 0}
+    for pid in children:
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            continue
+        kind = next(
+            (
+                kind
+                for kind, markers in CHILD_KINDS.items()
+                if any(marker in cmdline for marker in markers)
+            ),
+            "other",
+        )
+        counts[kind] += 1
+    return counts
+
+
+def _rss_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return None
+
+
+def report(include_memory: bool = True) -> Dict[str, Any]:
+    timings = metrics.snapshot()
+    probes = {}
+    for name, probe in _probes.items():
+        try:
+            probes[name] = probe()
+        except Exception as e:
+            probes[name] = f"{type(e).__name__}: {e}"
+    return {
+        "at": time.time(),
+        "pid": os.getpid(),
+        "active": active(),
+        "rss_kb": _rss_kb(),
+        "threads": threading.active_count(),
+        "gc_counts": gc.get_count(),
+        "loop_lag": {
+            "max_seconds": loop_lag.max_lag,
+            **timings["timings"].get("event_loop.lag_seconds", {}),
+        },
+        "memory": memory.diff() if include_memory else {},
+        "children": child_processes(),
+        "probes": probes,
+        "metrics": timings,
+    }
+
+
+def dump(path: Optional[str] = None) -> str:
+    """
+    Write a report as JSON to `path` (default: a timestamped file in
+    DIAGNOSTICS_DIR) and return the path.
+    """
+    if path is None:
+        os.makedirs(DIAGNOSTICS_DIR, exist_ok=True)
+        path = os.path.join(
+            DIAGNOSTICS_DIR, f"diagnostics-{os.getpid()}-{int(time.time())}.json"
+        )
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(report(), option=orjson.OPT_INDENT_2, default=str))
+    logger.info("Wrote diagnostics to %s", path)
+    return path
+
+
+def apply(command: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a diagnostics command ({"enable": [...], "disable": [...], "dump":
+    bool}) in this process and return its report, with "dump_path" if one
+    was written. Raises ValueError for unknown features.
+    """
+    if command.get("disable"):
+        disable(command["disable"])
+    if command.get("enable"):
+        enable(command["enable"])
+    result = report()
+    if command.get("dump"):
+        result["dump_path"] = dump()
+    return result
+
+
+def install_signal_handler(signum: int = getattr(signal, "SIGUSR1", 0)) -> None:
+    """
+    Dump a report whenever the process gets `signum` (SIGUSR1 by default):
+        kill -USR1 <pid>
+    Must be called from the main thread.
+    """
+    if not signum:
+        return
+    signal.signal(signum, lambda *_: dump())
+
+
+def authorized(token: Any) -> bool:
+    return bool(DIAGNOSTICS_TOKEN) and hmac.compare_digest(
+        str(token or "").encode(), DIAGNOSTICS_TOKEN.encode()
+    )
+
+
+_profiling = threading.Lock()
+
+
+def validate_profiler(kind: Optional[str]) -> Optional[str]:
+    if kind and kind not in PROFILERS:
+        raise ValueError(f"Unknown profiler {kind!r}. Choose from {list(PROFILERS)}.")
+    # pyinstrument is optional and not in requirements.txt
+    if kind == "pyinstrument" and importlib.util.find_spec("pyinstrument") is None:
+        raise ValueError("The pyinstrument profiler is not installed on this agent.")
+    return kind or None
+
+
+@asynccontextmanager
+async def profile_run(kind: Optional[str], name: str):
+    """
+    Profile the body with cProfile or pyinstrument and write the result to
+    DIAGNOSTICS_DIR under a random file name (`name` is only logged).
+    Yields a dict whose "path" is set once the profile is written. Only one
+    run is profiled at a time; cProfile also sees other runs on the same
+    thread while it is on.
+    """
+    outcome: Dict[str, Optional[str]] = {"path": None}
+    if not validate_profiler(kind):
+        yield outcome
+        return
+    if not _profiling.acquire(blocking=False):
+        logger.warning("Another run is being profiled, not profiling %s", name)
+        yield outcome
+        return
+    try:
+        os.makedirs(DIAGNOSTICS_DIR, exist_ok=True)
+        base = os.path.join(DIAGNOSTICS_DIR, f"profile-{uuid.uuid4().hex}")
+        logger.info("Profiling %s to %s", name, base)
+        if kind == "pyinstrument":
+            # Optional dependency, only needed when asked for
+            from pyinstrument import Profiler
+
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                yield outcome
+            finally:
+                profiler.stop()
+                outcome["path"] = base + ".html"
+                with open(outcome["path"], "w") as f:
+                    f.write(profiler.output_html())
+        else:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield outcome
+            finally:
+                profiler.disable()
+                outcome["path"] = base + ".prof"
+                profiler.dump_stats(outcome["path"])
+        logger.info("Wrote %s profile to %s", kind, outcome["path"])
+    finally:
+        _profiling.release()
@@ -1,12 +1,18 @@
+import math
 import os
+import re
 import time
-import json
 from dotenv import load_dotenv
 from typing import Dict, Any, Union
 
 from uagents_adapter import LangchainRegisterTool, cleanup_uagent
 
-from workflow import get_vc_outreach_workflow, Startup, Founder, VCPartner
+import diagnostics
+import log
+from jobs import JobManager
+from serialization import from_wire, to_wire
+from sharding import ShardedWorkflowPool
+from workflow import make_workflow_runner, state_from_request
 
 # Load environment variables
 load_dotenv()
@@ -17,127 +23,189 @@ API_TOKEN = os.environ["AGENTVERSE_API_KEY"]
 if not API_TOKEN:
     raise ValueError("Please set AGENTVERSE_API_KEY environment variable")
 
-# Get the workflow graph
-workflow = get_vc_outreach_workflow()
+# Number of worker processes; 1 keeps everything in this process
+WORKFLOW_WORKERS = int(os.getenv("WORKFLOW_WORKERS", "1"))
 
+# Default end-to-end time budget per request, overridable with deadline_seconds
+DEFAULT_DEADLINE_SECONDS = os.getenv("WORKFLOW_DEADLINE_SECONDS")
 
-# Wrap workflow into a function for UAgent
-async def workflow_agent_func(query: Union[Dict[str, Any], str]):
-    # Handle input as string (from chat messages)
-    if isinstance(query, str):
+# Longest a status request may hold the reply waiting for a change
+MAX_STATUS_WAIT_SECONDS = 60.0
+
+# Set up in __main__: either an in-process runner or a pool of shard processes
+workflow_pool = None
+run_workflow = None
+job_manager = None
+
+
+async def handle_job_action(query_data: Dict[str, Any]) -> str:
+    # Replies echo the request's thread_id so clients can match them
+    reply_id = str(query_data.get("thread_id") or "")
+    action = query_data.get("action")
+    if action == "submit":
+        request = {k: v for k, v in query_data.items() if k != "action"}
+        try:
+            job = job_manager.submit(request, DEFAULT_DEADLINE_SECONDS)
+        except ValueError as e:
+            return to_wire({"thread_id": reply_id, "error": str(e)})
+        return to_wire({"thread_id": job.thread_id, "job": job.to_dict()})
+
+    job_id = str(query_data.get("job_id") or "")
+    if action == "status":
         try:
-            # Try to extract JSON from the message
-            # First, look for a JSON object in the string
-            import re
-
-            json_match = re.search(r"{.*}", query, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                query_data = json.loads(json_str)
-            else:
-                return "Invalid input format. Please provide startup and VC partner data in JSON format."
-        except json.JSONDecodeError:
-            return "Could not parse JSON data from message."
-
-    # Handle input as dict (direct invocation)
-    elif isinstance(query, dict):
-        if "input" in query:
-            # Handle the case where input is nested
-            if isinstance(query["input"], str):
-                try:
-                    # Try to extract JSON from the input string
-                    import re
-
-                    json_match = re.search(r"{.*}", query["input"], re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(0)
-                        query_data = json.loads(json_str)
-                    else:
-                        return "Invalid input format. Please provide startup and VC partner data in JSON format."
-                except json.JSONDecodeError:
-                    return "Could not parse JSON data from message."
-            else:
-                query_data = query["input"]
-        else:
-            query_data = query
+            wait = float(query_data.get("wait") or 0)
+            since = query_data.get("since")
+            since = None if since is None else float(since)
+        except (TypeError, ValueError):
+            wait = math.nan
+        if math.isnan(wait) or (since is not None and math.isnan(since)):
+            return to_wire(
+                {"thread_id": reply_id, "error": "wait and since must be numbers"}
+            )
+        wait = min(wait, MAX_STATUS_WAIT_SECONDS)
+        job = await job_manager.wait(job_id, wait, since)
+    elif action == "result":
+        job = job_manager.get(job_id)
     else:
-        return "Invalid input type. Expected dictionary or string."
-
-    # Extract parameters from the query data
-    startup_data = query_data.get("startup", {})
-    vc_partner_data = query_data.get("vc_partner", {})
-    mutual_connection = query_data.get("mutual_connection", "")
-
-    # Create the workflow state
-    state = {
-        "messages": [],
-        "startup": Startup(
-            vision=startup_data.get("vision", ""),
-            company_name=startup_data.get("company_name", ""),
-            founders=[
-                Founder(
-                    name=founder.get("name", ""),
-                    background=founder.get("background", ""),
-                )
-                for founder in startup_data.get("founders", [])
-            ],
-            product_description=startup_data.get("product_description", ""),
-        ),
-        "vc_partner": VCPartner(
-            name=vc_partner_data.get("name", ""),
-            fund_name=vc_partner_data.get("fund_name", ""),
-            fund_website=vc_partner_data.get("fund_website", ""),
-            linkedin_url=vc_partner_data.get("linkedin_url", ""),
-        ),
-        "mutual_connection": mutual_connection,
-        "found_email": "",
-        "generated_intro": "",
-        "cold_email": "",
-    }
-
-    # Generate a unique thread_id
-    thread_id = str(query_data.get("thread_id", time.time()))
-    config = {"configurable": {"thread_id": thread_id}}
+        return to_wire({"thread_id": reply_id, "error": f"Unknown action {action!r}"})
+    if job is None:
+        return to_wire({"thread_id": reply_id, "error": f"Unknown job {job_id!r}"})
+    return to_wire(
+        {"thread_id": reply_id, "job": job.to_dict(include_result=action == "result")}
+    )
+
+
+async def handle_diagnostics_action(query_data: Dict[str, Any]) -> str:
+    # {"action": "diagnostics", "enable": [...], "disable": [...], "dump": true}
+    # toggles features on the running agent and its shards and replies with
+    # their reports
+    reply_id = str(query_data.get("thread_id") or "")
+    command = {key: query_data.get(key) for key in ("enable", "disable", "dump")}
+    try:
+        reply = {"thread_id": reply_id, "diagnostics": diagnostics.apply(command)}
+    except ValueError as e:
+        return to_wire({"thread_id": reply_id, "error": str(e)})
+    if workflow_pool is not None:
+        # Workflows run in the shard processes, not in this one
+        reply["shards"] = await workflow_pool.diagnostics(command)
+    return to_wire(reply)
+
+
+# A thread_id in a message that is not valid JSON, so even that error reply
+# reaches the request it belongs to
+THREAD_ID_RE = re.compile(r'"thread_id"\s*:\s*"([^"]+)"')
+
+
+def error_reply(error: str, thread_id: Any = None) -> str:
+    # Every reply carries the request's thread_id, errors included, so
+    # clients with several requests in flight can tell whose error it is
+    return to_wire({"thread_id": str(thread_id) if thread_id else None, "error": error})
+
+
+def parse_query(query: Union[Dict[str, Any], str]) -> Dict[str, Any]:
+    """
+    Extract the request payload from a chat message or a direct invocation.
+    Raises ValueError with a message for the sender if there is none.
+    """
+    # Chat messages are strings; direct invocations may nest one under "input"
+    if isinstance(query, dict) and "input" in query:
+        query = query["input"]
+    if isinstance(query, str):
+        json_match = re.search(r"{.*}", query, re.DOTALL)
+        if not json_match:
+            raise ValueError(
+                "Invalid input format. Please provide startup and VC partner data in JSON format."
+            )
+        try:
+            query = from_wire(json_match.group(0))
+        except ValueError:
+            raise ValueError("Could not parse JSON data from message.")
+    if not isinstance(query, dict):
+        raise ValueError("Invalid input type. Expected a JSON object.")
+    return query
 
+
+# Wrap workflow into a function for UAgent
+async def workflow_agent_func(query: Union[Dict[str, Any], str]):
     try:
-        # Run the workflow
-        await workflow.ainvoke(state, config)
-
-        # Get the final state
-        final_state = workflow.get_state(config)
-        state_dict = final_state[0] if isinstance(final_state, tuple) else final_state
-
-        # Return the results as JSON string
-        results = {
-            "found_email": state_dict["found_email"],
-            "generated_intro": state_dict["generated_intro"],
-            "cold_email": state_dict["cold_email"],
-        }
-        return json.dumps(results)
+        query_data = parse_query(query)
+    except ValueError as e:
+        text = query.get("input", "") if isinstance(query, dict) else query
+        match = THREAD_ID_RE.search(text) if isinstance(text, str) else None
+        return error_reply(str(e), match.group(1) if match else None)
+
+    diagnostics.ensure_started()
+
+    # Diagnostics write files on this host and expose process internals, so
+    # they need DIAGNOSTICS_TOKEN; the token is not kept with the request
+    query_data = dict(query_data)
+    token = query_data.pop("diagnostics_token", None)
+    if (
+        query_data.get("action") == "diagnostics" or query_data.get("profile")
+    ) and not diagnostics.authorized(token):
+        return error_reply(
+            "Diagnostics and profiling need a valid diagnostics_token.",
+            query_data.get("thread_id"),
+        )
+
+    # submit/status/result requests go through the job API and reply at once
+    if "action" in query_data:
+        if query_data["action"] == "diagnostics":
+            return await handle_diagnostics_action(query_data)
+        return await handle_job_action(query_data)
+
+    try:
+        state, thread_id = state_from_request(query_data, DEFAULT_DEADLINE_SECONDS)
+    except ValueError as e:
+        return error_reply(str(e), query_data.get("thread_id"))
+
+    try:
+        # Run the workflow and return the results, tagged with the thread_id
+        # so clients can match replies to requests
+        results = await run_workflow(state, thread_id)
+        return to_wire({**results, "thread_id": thread_id})
     except Exception as e:
-        return f"Error running workflow: {str(e)}"
-
-
-# Register the LangGraph workflow via uAgent
-tool = LangchainRegisterTool()
-agent_info = tool.invoke(
-    {
-        "agent_obj": workflow_agent_func,
-        "name": "vc_outreach_workflow_agent",
-        "port": 8080,
-        "description": "A LangGraph-based VC outreach workflow for startups",
-        "api_token": API_TOKEN,
-        "mailbox": True,
-    }
-)
-
-print(f"✅ Registered VC Outreach workflow agent: {agent_info}")
-
-# Keep the agent alive
-try:
-    while True:
-        time.sleep(1)
-except KeyboardInterrupt:
-    print("🛑 Shutting down VC Outreach workflow agent...")
-    cleanup_uagent("vc_outreach_workflow_agent")
-    print("✅ Agent stopped.")
+        return to_wire(
+            {"thread_id": thread_id, "error": f"Error running workflow: {str(e)}"}
+        )
+
+
+# Worker processes are spawned and re-import this module, so registration
+# and the keep-alive loop only run in the parent process
+if __name__ == "__main__":
+    log.configure_tracing()
+    diagnostics.install_signal_handler()
+
+    # Get the workflow runner, either in-process or sharded across workers by thread_id
+    if WORKFLOW_WORKERS > 1:
+        workflow_pool = ShardedWorkflowPool(WORKFLOW_WORKERS).start()
+        run_workflow = workflow_pool.run
+    else:
+        run_workflow = make_workflow_runner()
+    job_manager = JobManager(run_workflow)
+
+    # Register the LangGraph workflow via uAgent
+    tool = LangchainRegisterTool()
+    agent_info = tool.invoke(
+        {
+            "agent_obj": workflow_agent_func,
+            "name": "vc_outreach_workflow_agent",
+            "port": 8080,
+            "description": "A LangGraph-based VC outreach workflow for startups",
+            "api_token": API_TOKEN,
+            "mailbox": True,
+        }
+    )
+
+    print(f"✅ Registered VC Outreach workflow agent: {agent_info}")
+
+    # Keep the agent alive
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("🛑 Shutting down VC Outreach workflow agent...")
+        cleanup_uagent("vc_outreach_workflow_agent")
+        if workflow_pool is not None:
+            workflow_pool.close()
+        print("✅ Agent stopped.")
@@ -1,49 +1,382 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass
+from urllib.parse import urljoin
+import asyncio
 import os
-from firecrawl import FirecrawlApp
-import logging
+import re
+import time
 
-logger = logging.getLogger(__name__)
+from pydantic_ai import RunContext
 
+import log
+import metrics
+from deadline import DeadlineExceeded, StepTimeout, clamp, with_deadline
+from rate_limit import Reservation, classify_error, get_limiter
 
-def tool_deep_research(
+logger = log.get_logger(__name__)
+
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+# Pages on a fund's site that usually list the partners
+TEAM_PAGE_PATHS = ("", "team", "about", "people", "about-us")
+
+
+@dataclass(frozen=True)
+class ResearchTier:
+    name: str
+    time_limit: float
+    max_pages: int = 5
+    max_depth: int = 1
+
+
+# Cheapest first: the fund's own pages, then a web search, then deep research
+DEFAULT_TIERS: Tuple[ResearchTier, ...] = (
+    ResearchTier(name="fund_site", time_limit=20, max_pages=5),
+    ResearchTier(name="search", time_limit=30, max_pages=5),
+    ResearchTier(name="deep_research", time_limit=180, max_pages=25, max_depth=7),
+)
+
+
+def _firecrawl():
+    from firecrawl import FirecrawlApp
+
+    return FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
+
+
+def _deep_research(query: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    return _firecrawl().deep_research(query=query, params=params)
+
+
+def _scrape(url: str) -> Dict[str, Any]:
+    result = _firecrawl().scrape_url(url, params={"formats": ["markdown"]})
+    return {"url": url, "text": (result or {}).get("markdown", "")}
+
+
+def _search(query: str, limit: int) -> List[Dict[str, Any]]:
+    result = _firecrawl().search(
+        query, params={"limit": limit, "scrapeOptions": {"formats": ["markdown"]}}
+    )
+    return [
+        {
+            "url": item.get("url", ""),
+            "text": item.get("markdown") or item.get("description", ""),
+        }
+        for item in (result or {}).get("data", [])
+    ]
+
+
+def team_page_urls(fund_website: str, max_pages: int) -> List[str]:
+    if not fund_website:
+        return []
+    base = fund_website if fund_website.endswith("/") else fund_website + "/"
+    return [urljoin(base, path) for path in TEAM_PAGE_PATHS][:max_pages]
+
+
+def is_partner_email(email: str, partner_name: str) -> bool:
+    """
+    Whether an address looks like the partner's own: its local part holds
+    their first or last name (so also initial + last name, e.g. jbauer@),
+    not a shared inbox such as info@ or press@.
+    """
+    local = re.sub(r"[^a-z]", "", email.split("@")[0].lower())
+    names = [re.sub(r"[^a-z]", "", part.lower()) for part in partner_name.split()]
+    return any(len(name) > 1 and name in local for name in names)
+
+
+def is_resolved(
+    pages: List[Dict[str, Any]], partner_name: str, want_email: bool
+) -> bool:
+    """
+    A tier resolves the request when its pages mention the partner (by last
+    name) and, for email lookups, also contain an address that looks like
+    the partner's (see is_partner_email).
+    """
+    text = "\n".join(page.get("text") or "" for page in pages)
+    last_name = partner_name.split()[-1].lower() if partner_name.strip() else ""
+    if last_name and last_name not in text.lower():
+        return False
+    if not want_email:
+        return True
+    emails = EMAIL_PATTERN.findall(text)
+    if not partner_name.strip():
+        return bool(emails)
+    return any(is_partner_email(email, partner_name) for email in emails)
+
+
+async def call_in_slot(func, *args):
+    """
+    Run a blocking Firecrawl call in a thread within a slot of the firecrawl
+    limiter. A deadline cancels only the wait: the thread runs on, so the
+    slot is held until it returns.
+    """
+    limiter = get_limiter("firecrawl")
+    reservation = Reservation()
+    await limiter.acquire()
+    thread = asyncio.ensure_future(asyncio.to_thread(func, *args))
+
+    def release(done: asyncio.Future) -> None:
+        error = None if done.cancelled() else done.exception()
+        limiter.release(classify_error(error) if error else "ok", reservation)
+
+    thread.add_done_callback(release)
+    return await asyncio.shield(thread)
+
+
+async def _run_tier(tier: ResearchTier, query: str, fund_website: str) -> List[Dict]:
+    if tier.name == "fund_site":
+        urls = team_page_urls(fund_website, tier.max_pages)
+        results = await asyncio.gather(
+            *(call_in_slot(_scrape, url) for url in urls), return_exceptions=True
+        )
+        return [page for page in results if isinstance(page, dict)]
+    if tier.name == "search":
+        return await call_in_slot(_search, query, tier.max_pages)
+    params = {
+        "maxDepth": tier.max_depth,
+        "timeLimit": int(clamp(tier.time_limit)),
+        "maxUrls": tier.max_pages,
+    }
+    results = await call_in_slot(_deep_research, query, params)
+    results = results or {}
+    analysis = (results.get("data") or {}).get("finalAnalysis") or results.get(
+        "finalAnalysis", ""
+    )
+    return [{"url": "", "text": analysis, "raw": results}]
+
+
+@log.add_logger(logger)
+async def tiered_research(
     query: str,
-    max_depth: int = 7,
-    time_limit: int = 180,
-    max_urls: int = 25,
+    partner_name: str,
+    fund_website: str,
+    want_email: bool = False,
+    tiers: Tuple[ResearchTier, ...] = DEFAULT_TIERS,
 ) -> Dict[str, Any]:
     """
-    Perform deep research on a query.
+    Escalate through the research tiers until one resolves the request.
+    Each tier runs within its own time budget (and the request deadline).
+    """
+    pages: List[Dict[str, Any]] = []
+    for tier in tiers:
+        start = time.perf_counter()
+        try:
+            with log.span(f"research.tier.{tier.name}"):
+                pages = await with_deadline(
+                    _run_tier(tier, query, fund_website), tier.name, tier.time_limit
+                )
+        except (DeadlineExceeded, StepTimeout) as e:
+            logger.warning("Research tier %s ran out of time: %s", tier.name, e)
+            pages = []
+        except Exception as e:
+            logger.error("Research tier %s failed: %s", tier.name, e)
+            pages = []
+        metrics.observe(
+            f"research.tier.{tier.name}.seconds", time.perf_counter() - start
+        )
+        if is_resolved(pages, partner_name, want_email):
+            metrics.incr(f"research.tier.{tier.name}.resolved")
+            logger.info("Research resolved at tier %s: %s", tier.name, query)
+            return {"tier": tier.name, "resolved": True, "pages": pages}
+        metrics.incr(f"research.tier.{tier.name}.escalated")
+    metrics.incr("research.unresolved")
+    return {
+        "tier": tiers[-1].name if tiers else None,
+        "resolved": False,
+        "pages": pages,
+    }
+
+
+async def shared_research(
+    ctx: RunContext[Any], query: str, want_email: bool = False
+) -> Dict[str, Any]:
+    """
+    Research the partner in ctx.deps unless the run's research context
+    (ctx.deps.research) already holds findings that answer the request.
+    """
+    vc_partner = ctx.deps.vc_partner
+    research = getattr(ctx.deps, "research", None)
+    known = research.get(vc_partner) if research is not None else None
+    if known and (known.get("emails") or not want_email):
+        research.reused += 1
+        metrics.incr("research.reused")
+        logger.info("Reusing research on %s from this run", vc_partner.name)
+        return known
+
+    metrics.incr("research.calls")
+    from llm_cache import cached_call
+
+    results = await cached_call(
+        ctx.model,
+        "tiered_research",
+        {
+            "query": query,
+            "partner_name": vc_partner.name,
+            "fund_website": vc_partner.fund_website,
+            "want_email": want_email,
+        },
+        lambda: tiered_research(
+            query, vc_partner.name, vc_partner.fund_website, want_email=want_email
+        ),
+    )
+    findings = summarize_firecrawl_results(
+        results,
+        vc_partner.name,
+        startup_keywords(getattr(ctx.deps, "startup", None)),
+    )
+    if research is not None:
+        research.calls += 1
+        if "error" not in findings:
+            findings = research.add(vc_partner, findings)
+    return findings
+
+
+async def tool_research_vc_email(ctx: RunContext[Any], query: str) -> Dict[str, Any]:
+    """
+    Research the VC partner's professional email address, starting with the
+    fund's own website and escalating to web search and deep research.
 
     Args:
-        query: Research query to investigate
-        max_depth: Number of research iterations (default: 7)
-        time_limit: Time limit in seconds (default: 180)
-        max_urls: Maximum URLs to analyze (default: 25)
+        query: What to search for, e.g. the partner's name, fund and "email"
 
     Returns:
-        Dictionary with research results including final analysis and sources
+        Compacted findings (emails, partner facts, relevant snippets, sources)
+        and the tier that resolved the request
     """
-    try:
-        api_key = os.getenv("FIRECRAWL_API_KEY")
-        firecrawl = FirecrawlApp(api_key=api_key)
+    return await shared_research(ctx, query, want_email=True)
 
-        params = {"maxDepth": max_depth, "timeLimit": time_limit, "maxUrls": max_urls}
 
-        results = firecrawl.deep_research(
-            query=query,
-            params=params,
-        )
+async def tool_research_vc_partner(ctx: RunContext[Any], query: str) -> Dict[str, Any]:
+    """
+    Research the VC partner and their fund (background, thesis, portfolio),
+    starting with the fund's own website and escalating to web search and
+    deep research.
 
+    Args:
+        query: What to research about the partner or fund
+
+    Returns:
+        Compacted findings (emails, partner facts, relevant snippets, sources)
+        and the tier that resolved the request
+    """
+    return await shared_research(ctx, query)
+
+
+# Default size of a compacted research result handed back to the model
+RESEARCH_TOKEN_BUDGET = int(os.getenv("RESEARCH_TOKEN_BUDGET", "1200"))
+
+# Words that mark a snippet as being about the fund's investments
+INVESTMENT_TERMS = (
+    "invest",
+    "portfolio",
+    "thesis",
+    "focus",
+    "backed",
+    "led",
+    "seed",
+    "series",
+    "board",
+    "partner",
+)
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z][a-z0-9-]{4,}")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def _research_texts(results: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Pull the free text and source URLs out of either a tiered research result
+    or a raw deep_research payload.
+    """
+    texts, urls = [], []
+    for page in results.get("pages") or []:
+        texts.append(page.get("text") or "")
+        urls.append(page.get("url") or "")
+        if page.get("raw"):
+            more_texts, more_urls = _research_texts(page["raw"])
+            texts += more_texts
+            urls += more_urls
+    data = results.get("data") if isinstance(results.get("data"), dict) else results
+    if data.get("finalAnalysis"):
+        texts.append(data["finalAnalysis"])
+    for source in data.get("sources") or []:
+        urls.append(source.get("url") or "")
+        texts.append(source.get("description") or "")
+    return texts, urls
+
+
+def summarize_firecrawl_results(
+    results: Dict[str, Any],
+    partner_name: str = "",
+    keywords: Tuple[str, ...] = (),
+    token_budget: int = RESEARCH_TOKEN_BUDGET,
+) -> Dict[str, Any]:
+    """
+    Compact research results before they are returned to the model: keep
+    email addresses, sentences about the partner and sentences about the
+    fund's investments or the startup's space, dedupe sources, and stop at
+    `token_budget` (estimated at 4 characters per token).
+    """
+    if "error" in results:
         return results
+    texts, urls = _research_texts(results)
+
+    emails: List[str] = []
+    for text in texts:
+        for email in EMAIL_PATTERN.findall(text):
+            if email.lower() not in (e.lower() for e in emails):
+                emails.append(email)
+
+    name_terms = [part.lower() for part in partner_name.split() if len(part) > 1]
+    topic_terms = tuple(k.lower() for k in keywords) + INVESTMENT_TERMS
+    bio, relevant, seen = [], [], set()
+    for text in texts:
+        for sentence in _SENTENCE_SPLIT.split(text):
+            sentence = sentence.strip(" -*#|\t")
+            key = sentence.lower()
+            if len(sentence) < 20 or key in seen:
+                continue
+            seen.add(key)
+            if name_terms and name_terms[-1] in key:
+                bio.append(sentence)
+            else:
+                score = sum(1 for term in topic_terms if term in key)
+                if score:
+                    relevant.append((score, sentence))
+    relevant.sort(key=lambda item: -item[0])
 
-    except Exception as e:
-        logger.error(f"Error performing deep research: {e}")
-        return {"error": f"Error performing deep research: {e}"}
+    compact: Dict[str, Any] = {
+        "emails": emails[:10],
+        "partner": [],
+        "relevant": [],
+        "sources": list(dict.fromkeys(u for u in urls if u))[:10],
+    }
+    for key in ("tier", "resolved"):
+        if key in results:
+            compact[key] = results[key]
+    used = estimate_tokens(str(compact))
+    for field, sentences in (("partner", bio), ("relevant", [s for _, s in relevant])):
+        for sentence in sentences:
+            cost = estimate_tokens(sentence) + 2
+            if used + cost > token_budget:
+                break
+            compact[field].append(sentence)
+            used += cost
+    return compact
 
 
-def summarize_firecrawl_results(results: Dict[str, Any]) -> str:
+def startup_keywords(startup: Any, limit: int = 12) -> Tuple[str, ...]:
     """
-    Summarize the results of the deep research.
+    Distinctive words from the startup's description, used to pick out
+    research snippets about the same space.
     """
-    return results
+    if startup is None:
+        return ()
+    text = f"{startup.vision} {startup.product_description}".lower()
+    counts: Dict[str, int] = {}
+    for word in _WORD.findall(text):
+        counts[word] = counts.get(word, 0) + 1
+    return tuple(sorted(counts, key=lambda w: -counts[w])[:limit])
@@ -0,0 +1,25 @@
+import pytest
+
+from firecrawl_tools import is_resolved
+
+
+def pages(text):
+    return [{"url": "https://arch.vc/team", "text": text}]
+
+
+@pytest.mark.parametrize(
+    "email",
+    ["jake@arch.vc", "jake.bauer@arch.vc", "jbauer@arch.vc", "bauer@arch.vc"],
+)
+def test_partner_email_resolves(email):
+    assert is_resolved(pages(f"Jake Bauer, Partner. {email}"), "Jake Bauer", True)
+
+
+def test_shared_inbox_does_not_resolve():
+    text = "Jake Bauer, Partner. Contact info@arch.vc or press@arch.vc"
+    assert not is_resolved(pages(text), "Jake Bauer", True)
+    assert is_resolved(pages(text), "Jake Bauer", False)
+
+
+def test_partner_not_mentioned_does_not_resolve():
+    assert not is_resolved(pages("Team: jane@arch.vc"), "Jake Bauer", True)
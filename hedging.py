@@ -0,0 +1,234 @@
+import asyncio
+import dataclasses
+import os
+import time
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+from pydantic_ai.models.wrapper import WrapperModel
+
+import log
+import metrics
+from deadline import DeadlineExceeded
+from rate_limit import endpoint_name
+
+logger = log.get_logger(__name__)
+
+# Secondary models as comma-separated provider:model[@base_url] entries, in
+# the order they are tried, e.g.
+#   HEDGE_MODELS=groq:llama-3.3-70b-versatile,anthropic:claude-3-5-haiku-latest
+HEDGE_MODELS = os.getenv("HEDGE_MODELS", "")
+# A hedge is sent once a model has taken longer than this quantile of its
+# recent latencies, bounded by HEDGE_MIN_DELAY and HEDGE_MAX_DELAY
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", "60"))
+# Used until a model has HEDGE_MIN_SAMPLES latencies
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "20"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+# At most this fraction of requests is duplicated; failover on errors is
+# not limited
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.2"))
+
+PROVIDERS = ("openai", "anthropic", "groq", "mistral")
+
+
+def parse_model_specs(specs: str) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Parse "provider:model[@base_url],..." into (provider, model, base_url).
+    """
+    parsed = []
+    for spec in filter(None, (s.strip() for s in specs.split(","))):
+        spec, _, base_url = spec.partition("@")
+        provider, _, model_name = spec.partition(":")
+        if provider not in PROVIDERS or not model_name:
+            raise ValueError(
+                f"Bad model {spec!r}, expected provider:model[@base_url] "
+                f"with a provider from {list(PROVIDERS)}"
+            )
+        parsed.append((provider, model_name, base_url or None))
+    return parsed
+
+
+def provider_model(
+    provider: str,
+    model_name: str,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+):
+    """
+    Build a pydantic-ai model for a provider, with the API key from
+    <PROVIDER>_API_KEY unless given. SDK retries are turned off: the hedged
+    model fails over to the next provider instead.
+    """
+    # Each SDK is only imported when a model of its provider is configured
+    if provider == "openai":
+        from openai import AsyncOpenAI
+        from pydantic_ai.models.openai import OpenAIModel
+        from pydantic_ai.providers.openai import OpenAIProvider
+
+        client = AsyncOpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+            max_retries=0,
+        )
+        return OpenAIModel(model_name, provider=OpenAIProvider(openai_client=client))
+    if provider == "anthropic":
+        from anthropic import AsyncAnthropic
+        from pydantic_ai.models.anthropic import AnthropicModel
+        from pydantic_ai.providers.anthropic import AnthropicProvider
+
+        client = AsyncAnthropic(
+            api_key=api_key or os.getenv("ANTHROPIC_API_KEY"),
+            base_url=base_url,
+            max_retries=0,
+        )
+        return AnthropicModel(
+            model_name, provider=AnthropicProvider(anthropic_client=client)
+        )
+    if provider == "groq":
+        from groq import AsyncGroq
+        from pydantic_ai.models.groq import GroqModel
+        from pydantic_ai.providers.groq import GroqProvider
+
+        client = AsyncGroq(
+            api_key=api_key or os.getenv("GROQ_API_KEY"),
+            base_url=base_url,
+            max_retries=0,
+        )
+        return GroqModel(model_name, provider=GroqProvider(groq_client=client))
+    if provider == "mistral":
+        from mistralai import Mistral
+        from pydantic_ai.models.mistral import MistralModel
+        from pydantic_ai.providers.mistral import MistralProvider
+
+        # The Mistral SDK does not retry unless configured to
+        client = Mistral(
+            api_key=api_key or os.getenv("MISTRAL_API_KEY"), server_url=base_url
+        )
+        return MistralModel(model_name, provider=MistralProvider(mistral_client=client))
+    raise ValueError(f"Unknown provider {provider!r}, choose from {list(PROVIDERS)}")
+
+
+class HedgedModel(WrapperModel):
+    """
+    Sends each request to the primary model and, if it has not answered
+    within the p95 of its recent latencies, a duplicate to the next model.
+    The first response wins and the other requests are cancelled. A model
+    that fails is replaced by the next one straight away.
+
+    The winning response's model_name is set to "provider:model[@host]" of
+    the model that produced it.
+    """
+
+    def __init__(
+        self,
+        primary,
+        fallbacks: Sequence,
+        quantile: float = HEDGE_QUANTILE,
+        min_delay: float = HEDGE_MIN_DELAY,
+        max_delay: float = HEDGE_MAX_DELAY,
+        default_delay: float = HEDGE_DELAY,
+        max_ratio: float = HEDGE_MAX_RATIO,
+    ):
+        super().__init__(primary)
+        self.models = [primary, *fallbacks]
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.max_ratio = max_ratio
+        self.latencies = [deque(maxlen=HEDGE_WINDOW) for _ in self.models]
+        self.requests = 0
+        self.hedges = 0
+
+    def hedge_delay(self, index: int) -> float:
+        samples = self.latencies[index]
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return self.default_delay
+        delay = metrics.percentile(samples, self.quantile)
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def _endpoint(self, index: int) -> str:
+        model = self.models[index]
+        return endpoint_name(model.system, model.base_url)
+
+    def _name(self, index: int) -> str:
+        model = self.models[index]
+        _, _, host = self._endpoint(index).partition("@")
+        name = f"{model.system}:{model.model_name}"
+        return f"{name}@{host}" if host else name
+
+    async def _timed(self, index: int, *args):
+        start = time.perf_counter()
+        result = await self.models[index].request(*args)
+        elapsed = time.perf_counter() - start
+        self.latencies[index].append(elapsed)
+        metrics.observe(f"hedging.{self._endpoint(index)}.seconds", elapsed)
+        return result
+
+    async def request(self, messages, model_settings, model_request_parameters):
+        args = (messages, model_settings, model_request_parameters)
+        self.requests += 1
+        running = {}
+        launched = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> int:
+            nonlocal launched
+            running[asyncio.ensure_future(self._timed(launched, *args))] = launched
+            launched += 1
+            return launched - 1
+
+        newest = launch()
+        try:
+            while running:
+                can_hedge = (
+                    launched < len(self.models)
+                    and self.hedges < self.max_ratio * self.requests
+                )
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=self.hedge_delay(newest) if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    self.hedges += 1
+                    metrics.incr("hedging.hedged")
+                    logger.debug(
+                        "%s slower than %.2f s, hedging with %s",
+                        self._name(newest),
+                        self.hedge_delay(newest),
+                        self._name(launched),
+                    )
+                    newest = launch()
+                    continue
+                for task in done:
+                    index = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        metrics.incr(f"hedging.won.{self._endpoint(index)}")
+                        if index:
+                            logger.debug("Answered by %s", self._name(index))
+                        response, usage = task.result()
+                        return (
+                            dataclasses.replace(response, model_name=self._name(index)),
+                            usage,
+                        )
+                    if isinstance(error, DeadlineExceeded):
+                        raise error
+                    last_error = error
+                    metrics.incr(f"hedging.errors.{self._endpoint(index)}")
+                    logger.warning("%s failed: %s", self._name(index), error)
+                if not running and launched < len(self.models):
+                    metrics.incr("hedging.failovers")
+                    logger.info("Failing over to %s", self._name(launched))
+                    newest = launch()
+            raise last_error
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                metrics.incr("hedging.cancelled", len(running))
+                await asyncio.gather(*running, return_exceptions=True)
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from hedging import HedgedModel
+
+HEDGE_DELAY = 0.05
+
+
+def stub(name: str, seconds: float, calls: list, fail: bool = False):
+    """
+    A model answering `name` after `seconds`, recording in `calls` when it
+    was asked and whether it finished, failed or was cancelled.
+    """
+
+    async def respond(messages, info):
+        call = {"started": time.perf_counter()}
+        calls.append(call)
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            call["outcome"] = "cancelled"
+            raise
+        if fail:
+            call["outcome"] = "failed"
+            raise RuntimeError(f"{name} is overloaded")
+        call["outcome"] = "answered"
+        return ModelResponse(parts=[TextPart(name)])
+
+    return FunctionModel(respond)
+
+
+def run(primary, fallback):
+    model = HedgedModel(primary, [fallback], default_delay=HEDGE_DELAY, max_ratio=1)
+
+    async def go():
+        start = time.perf_counter()
+        result = await Agent(model).run("hi")
+        return start, time.perf_counter() - start, result
+
+    start, elapsed, result = asyncio.run(go())
+    return model, start, elapsed, result
+
+
+def test_fast_primary_is_not_hedged():
+    primary_calls, fallback_calls = [], []
+    model, _, _, result = run(
+        stub("primary", 0.01, primary_calls), stub("fallback", 0.01, fallback_calls)
+    )
+
+    assert result.data == "primary"
+    assert fallback_calls == []
+    assert model.hedges == 0
+
+
+def test_slow_primary_is_hedged_after_the_delay_and_cancelled():
+    primary_calls, fallback_calls = [], []
+    _, start, elapsed, result = run(
+        stub("primary", 5, primary_calls), stub("fallback", 0.01, fallback_calls)
+    )
+
+    assert result.data == "fallback"
+    assert fallback_calls[0]["started"] - start >= HEDGE_DELAY
+    assert elapsed < 1
+    # The loser was cancelled rather than left running
+    assert primary_calls[0]["outcome"] == "cancelled"
+
+
+def test_failing_primary_fails_over_without_waiting():
+    primary_calls, fallback_calls = [], []
+    model, start, _, result = run(
+        stub("primary", 0, primary_calls, fail=True),
+        stub("fallback", 0.01, fallback_calls),
+    )
+
+    assert result.data == "fallback"
+    assert primary_calls[0]["outcome"] == "failed"
+    assert fallback_calls[0]["started"] - start < HEDGE_DELAY
+    assert model.hedges == 0
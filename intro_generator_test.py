@@ -0,0 +1,34 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pydantic_ai import ModelRetry
+
+from agent_intro_generator.agent import validate_intros
+from output_validation import ConnectionIntro
+
+CONNECTIONS = [
+    {"name": "Alex Kim", "headline": "Partner at Northwind"},
+    {"name": "Alex Kim", "headline": "Founder of Brightline"},
+]
+
+
+def intro(number, name):
+    letter = f"Hi both, meet my friend from {name}. " * 10
+    return ConnectionIntro(number=number, connection="Alex Kim", intro=letter)
+
+
+def validate(result):
+    ctx = SimpleNamespace(deps=SimpleNamespace(mutual_connections=CONNECTIONS))
+    return asyncio.run(validate_intros(ctx, result))
+
+
+def test_same_name_connections_each_get_their_intro():
+    result = validate([intro(2, "Brightline"), intro(1, "Northwind")])
+    assert [item.number for item in result] == [1, 2]
+    assert "Northwind" in result[0].intro and "Brightline" in result[1].intro
+
+
+def test_missing_number_is_retried():
+    with pytest.raises(ModelRetry, match="2. Alex Kim"):
+        validate([intro(1, "Northwind"), intro(1, "Northwind")])
@@ -0,0 +1,214 @@
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from models import Startup, VCPartner
+
+# Tokens are hashed into a fixed number of buckets (a power of two), so the
+# index needs no vocabulary and works on names it has never seen
+DIMS = 1 << 18
+FUND_WEIGHT = 0.5
+INVESTOR_WEIGHT = 0.2
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at by for from in is it of on or our the to we with your".split()
+)
+# Words in fund names that say nothing about which fund it is
+GENERIC_FUND_TERMS = frozenset(
+    "capital ventures venture partners partner fund funds vc group management "
+    "www com co io vc http https".split()
+)
+INVESTOR_TERMS = (
+    "partner",
+    "investor",
+    "investing",
+    "venture",
+    "vc",
+    "angel",
+    "principal",
+    "founder",
+    "cofounder",
+    "ceo",
+    "board",
+)
+
+
+def tokens(text: str) -> List[str]:
+    return [
+        t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS
+    ]
+
+
+def _bucket(token: str) -> int:
+    # crc32 is stable across processes, unlike the salted built-in hash()
+    return zlib.crc32(token.encode("utf-8")) & (DIMS - 1)
+
+
+def _buckets(words: Sequence[str]) -> Set[int]:
+    return {_bucket(w) for w in words}
+
+
+INVESTOR_BUCKETS = sorted(_buckets(INVESTOR_TERMS))
+
+
+def _profile_url(url: Optional[str]) -> str:
+    """A LinkedIn profile URL without scheme, query or trailing slash."""
+    url = (url or "").strip().lower().split("?")[0].rstrip("/")
+    return re.sub(r"^https?://(www\.)?", "", url)
+
+
+def fund_terms(vc_partner: VCPartner) -> List[str]:
+    terms = [t for t in tokens(vc_partner.fund_name) if t not in GENERIC_FUND_TERMS]
+    if terms:
+        return terms
+    # Fall back to the website's domain for names like "Capital Partners"
+    domain = re.sub(r"^https?://(www\.)?", "", vc_partner.fund_website or "")
+    return [
+        t
+        for t in tokens(domain.split("/")[0].rsplit(".", 1)[0])
+        if t not in GENERIC_FUND_TERMS
+    ]
+
+
+class ConnectionIndex:
+    """
+    Hashed bag-of-words index over mutual connections (name and headline),
+    weighted by inverse document frequency over the connections themselves.
+    Built once per candidate list, it scores every candidate against a VC
+    partner and startup with a few NumPy operations, so thousands of
+    candidates rank in milliseconds and one founder's network can be ranked
+    against many partners.
+
+    A score adds up
+    - similarity: cosine between the candidate and the fund and startup text
+    - shared_fund: share of the fund's distinctive name words the candidate
+      mentions, e.g. someone who works at or with the fund
+    - investor: whether the headline reads like an investor or founder
+    """
+
+    def __init__(self, connections: Sequence[Dict[str, Any]]):
+        self.connections = list(connections)
+        rows: List[int] = []
+        cols: List[int] = []
+        self._names: List[str] = []
+        self._urls: List[str] = []
+        for row, connection in enumerate(self.connections):
+            name = connection.get("name") or ""
+            self._names.append(" ".join(tokens(name)))
+            self._urls.append(_profile_url(connection.get("linkedin_url")))
+            buckets = _buckets(tokens(f"{name} {connection.get('headline') or ''}"))
+            rows.extend([row] * len(buckets))
+            cols.extend(buckets)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.cols = np.asarray(cols, dtype=np.int64)
+
+        # Stored per (row, bucket) entry, normalized so a row has unit length
+        n = len(self.connections)
+        _, inverse, counts = np.unique(
+            self.cols, return_inverse=True, return_counts=True
+        )
+        idf = np.log((1 + n) / (1 + counts[inverse])) + 1.0
+        norms = np.sqrt(np.bincount(self.rows, weights=idf**2, minlength=n))
+        self.weights = idf / np.where(norms > 0, norms, 1.0)[self.rows]
+        self.investor = (
+            np.bincount(
+                self.rows,
+                weights=np.isin(self.cols, INVESTOR_BUCKETS),
+                minlength=n,
+            )
+            > 0
+        )
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    def score(self, vc_partner: VCPartner, startup: Optional[Startup]) -> Dict:
+        """
+        Score arrays (one value per connection) for every signal and their
+        weighted total under "score".
+        """
+        n = len(self.connections)
+        fund = _buckets(fund_terms(vc_partner))
+        topic = _buckets(
+            tokens(
+                f"{startup.company_name} {startup.vision} {startup.product_description}"
+            )
+            if startup is not None
+            else []
+        )
+        query = np.zeros(DIMS, dtype=np.float64)
+        query[list(topic)] = 1.0
+        query[list(fund)] += 2.0
+        norm = np.linalg.norm(query)
+        if norm:
+            query /= norm
+
+        similarity = np.bincount(
+            self.rows, weights=self.weights * query[self.cols], minlength=n
+        )
+        shared_fund = np.bincount(
+            self.rows, weights=np.isin(self.cols, list(fund)), minlength=n
+        ) / max(len(fund), 1)
+        total = similarity + FUND_WEIGHT * shared_fund + INVESTOR_WEIGHT * self.investor
+        return {
+            "score": total,
+            "similarity": similarity,
+            "shared_fund": shared_fund,
+            "investor": self.investor,
+        }
+
+    def is_partner(self, vc_partner: VCPartner) -> np.ndarray:
+        """
+        Mask of the connections that are the partner themselves, matched by
+        profile URL or name; the partner can show up in their own list.
+        """
+        name = " ".join(tokens(vc_partner.name))
+        url = _profile_url(vc_partner.linkedin_url)
+        return np.array(
+            [
+                bool(name and row_name == name) or bool(url and row_url == url)
+                for row_name, row_url in zip(self._names, self._urls)
+            ],
+            dtype=bool,
+        )
+
+    def rank(
+        self,
+        vc_partner: VCPartner,
+        startup: Optional[Startup],
+        top_k: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Connections from best to worst introducer, each with its score and
+        signals. Ties keep the scraped order; the partner is never a
+        candidate for their own introduction.
+        """
+        if not self.connections:
+            return []
+        scores = self.score(vc_partner, startup)
+        order = np.argsort(-scores["score"], kind="stable")
+        order = order[~self.is_partner(vc_partner)[order]][:top_k]
+        return [
+            {
+                "name": self.connections[i].get("name"),
+                "linkedin_url": self.connections[i].get("linkedin_url"),
+                "score": round(float(scores["score"][i]), 4),
+                "similarity": round(float(scores["similarity"][i]), 4),
+                "shared_fund": round(float(scores["shared_fund"][i]), 4),
+                "investor": bool(scores["investor"][i]),
+                "position": int(i),
+            }
+            for i in order
+        ]
+
+
+def rank_connections(
+    connections: Sequence[Dict[str, Any]],
+    vc_partner: VCPartner,
+    startup: Optional[Startup],
+    top_k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    return ConnectionIndex(connections).rank(vc_partner, startup, top_k)
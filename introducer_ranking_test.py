@@ -0,0 +1,30 @@
+from introducer_ranking import rank_connections
+from models import VCPartner
+
+VC_PARTNER = VCPartner(
+    name="Jake Bauer",
+    fund_name="Arch Ventures",
+    fund_website="https://arch.vc",
+    linkedin_url="https://www.linkedin.com/in/jbauer/",
+)
+
+CONNECTIONS = [
+    {"name": "Jake Bauer", "linkedin_url": "", "headline": "Partner at Arch"},
+    {
+        "name": "J. Bauer (he/him)",
+        "linkedin_url": "https://linkedin.com/in/jbauer",
+        "headline": "Partner at Arch Ventures",
+    },
+    {"name": "Ann Lee", "linkedin_url": "", "headline": "Investor at Arch Ventures"},
+    {"name": "Bob Stone", "linkedin_url": "", "headline": "Engineer"},
+]
+
+
+def test_partner_is_not_a_candidate():
+    ranked = rank_connections(CONNECTIONS, VC_PARTNER, None)
+    assert [row["position"] for row in ranked] == [2, 3]
+
+
+def test_top_k_counts_candidates_only():
+    ranked = rank_connections(CONNECTIONS, VC_PARTNER, None, top_k=2)
+    assert [row["name"] for row in ranked] == ["Ann Lee", "Bob Stone"]
@@ -0,0 +1,312 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import orjson
+
+import diagnostics
+import log
+import metrics
+from workflow import state_from_request
+
+logger = log.get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", ".jobs/jobs.sqlite")
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "32"))
+# Finished jobs older than this are deleted when the store is opened
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+# run(state, thread_id, on_node=None), e.g. workflow.make_workflow_runner()
+Runner = Callable[..., Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class Job:
+    job_id: str
+    thread_id: str
+    status: str = QUEUED
+    # One {"node", "at"} entry per finished workflow node
+    progress: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = asdict(self)
+        if not include_result:
+            data.pop("result")
+        return data
+
+
+class JobStore:
+    """
+    sqlite-backed job table, so submitted jobs and their results outlive the
+    request that started them (and the agent process). Requests are not
+    stored: they carry the founder's LinkedIn password.
+    """
+
+    def __init__(self, path: str, retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, thread_id TEXT NOT NULL, status TEXT NOT NULL, "
+            "progress BLOB NOT NULL, result BLOB, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+        self._recover(retention_seconds)
+
+    def _recover(self, retention_seconds: float) -> None:
+        # Jobs that were in flight when the last process stopped cannot be
+        # resumed without the request, so they are marked failed
+        now = time.time()
+        with self._lock:
+            interrupted = self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE status IN (?, ?)",
+                (FAILED, "Interrupted by an agent restart", now, QUEUED, RUNNING),
+            ).rowcount
+            self._db.execute(
+                "DELETE FROM jobs WHERE updated_at < ? AND status IN (?, ?)",
+                (now - retention_seconds, DONE, FAILED),
+            )
+        if interrupted:
+            logger.warning("Marked %s interrupted jobs as failed", interrupted)
+
+    def create(self, thread_id: str) -> Job:
+        now = time.time()
+        job = Job(
+            job_id=uuid.uuid4().hex, thread_id=thread_id, created_at=now, updated_at=now
+        )
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (job_id, thread_id, status, progress, created_at, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.job_id, thread_id, job.status, b"[]", now, now),
+            )
+        return job
+
+    def save(self, job: Job) -> None:
+        job.updated_at = time.time()
+        self.write(self.row(job))
+
+    @staticmethod
+    def row(job: Job) -> tuple:
+        """
+        The job's columns as save() writes them, so the job can be
+        snapshotted on one thread and written on another.
+        """
+        return (
+            job.status,
+            orjson.dumps(job.progress),
+            orjson.dumps(job.result) if job.result is not None else None,
+            job.error,
+            job.updated_at,
+            job.job_id,
+        )
+
+    def write(self, row: tuple) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, "
+                "updated_at = ? WHERE job_id = ?",
+                row,
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT job_id, thread_id, status, progress, result, error, "
+                "created_at, updated_at FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(
+            job_id=row[0],
+            thread_id=row[1],
+            status=row[2],
+            progress=orjson.loads(row[3]),
+            result=orjson.loads(row[4]) if row[4] is not None else None,
+            error=row[5],
+            created_at=row[6],
+            updated_at=row[7],
+        )
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+
+class JobManager:
+    """
+    Runs workflow requests as background jobs. submit() returns as soon as
+    the job is stored; status, per-node progress and the result are read
+    back with get(), wait() (long poll) or subscribe(). At most
+    `max_concurrency` jobs run at once, the rest wait as queued.
+
+    Jobs in flight live in this process; the store keeps finished ones.
+    """
+
+    def __init__(
+        self,
+        run: Runner,
+        store: Optional[JobStore] = None,
+        max_concurrency: int = JOB_CONCURRENCY,
+    ):
+        self.run = run
+        self.store = store or JobStore(JOB_STORE_PATH)
+        self.max_concurrency = max_concurrency
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._active: Dict[str, Job] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._tasks: set = set()
+        # One thread writes every update in order, off the event loop
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="job-store")
+        diagnostics.register_probe("jobs.active", lambda: len(self._active))
+
+    def submit(
+        self, query: Dict[str, Any], default_deadline_seconds: Optional[float] = None
+    ) -> Job:
+        """
+        Validate the request and start it as a job. Raises ValueError for
+        requests state_from_request rejects.
+        """
+        state, thread_id = state_from_request(query, default_deadline_seconds)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        job = self.store.create(thread_id)
+        self._active[job.job_id] = job
+        self._changed[job.job_id] = asyncio.Event()
+        task = asyncio.create_task(self._run_job(job, state))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        metrics.incr("jobs.submitted")
+        return job
+
+    def _update(self, job: Job) -> asyncio.Future:
+        # Waiters read the job from _active, so they are woken right away
+        # while the row is written on the writer thread
+        job.updated_at = time.time()
+        written = asyncio.get_running_loop().run_in_executor(
+            self._writer, self.store.write, self.store.row(job)
+        )
+        written.add_done_callback(self._written)
+        # Wake everyone waiting for a change and arm a fresh event
+        event = self._changed.get(job.job_id)
+        if event is not None:
+            event.set()
+            if not job.finished:
+                self._changed[job.job_id] = asyncio.Event()
+        return written
+
+    @staticmethod
+    def _written(written: asyncio.Future) -> None:
+        if not written.cancelled() and written.exception() is not None:
+            logger.error("Could not store job update: %s", written.exception())
+
+    def _on_node(self, job: Job, node: str) -> None:
+        job.progress.append({"node": node, "at": time.time()})
+        self._update(job)
+
+    async def _run_job(self, job: Job, state: Dict[str, Any]) -> None:
+        queued_at = time.perf_counter()
+        try:
+            async with self._slots:
+                metrics.observe("jobs.queue_seconds", time.perf_counter() - queued_at)
+                job.status = RUNNING
+                self._update(job)
+                with metrics.timed("jobs.run_seconds"):
+                    job.result = await self.run(
+                        state, job.thread_id, on_node=lambda n: self._on_node(job, n)
+                    )
+                job.status = DONE
+        except Exception as e:
+            logger.warning("Job %s failed: %s", job.job_id, e)
+            job.status, job.error = FAILED, f"{type(e).__name__}: {e}"
+        finally:
+            if job.status not in FINISHED:
+                job.status, job.error = FAILED, "Cancelled"
+            metrics.incr(f"jobs.{job.status}")
+            # get() falls back to the store once the job leaves _active
+            await asyncio.gather(self._update(job), return_exceptions=True)
+            self._active.pop(job.job_id, None)
+            self._changed.pop(job.job_id, None)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._active.get(job_id) or self.store.get(job_id)
+
+    async def wait(
+        self, job_id: str, timeout: float, since: Optional[float] = None
+    ) -> Optional[Job]:
+        """
+        Long poll: return the job once it has changed after `since` (its
+        updated_at as last seen by the caller) or finished, or after
+        `timeout` seconds with its current state.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if (
+                job is None
+                or job.finished
+                or (since is not None and job.updated_at > since)
+            ):
+                return job
+            event = self._changed.get(job_id)
+            left = deadline - time.monotonic()
+            if event is None or left <= 0:
+                return job
+            try:
+                await asyncio.wait_for(event.wait(), left)
+            except asyncio.TimeoutError:
+                return self.get(job_id)
+            since = job.updated_at if since is None else since
+
+    async def subscribe(
+        self, job_id: str, heartbeat: float = 30.0
+    ) -> AsyncIterator[Job]:
+        """
+        Yield the job on every change (and every `heartbeat` seconds) until
+        it finishes.
+        """
+        since = None
+        while True:
+            job = await self.wait(job_id, heartbeat, since)
+            if job is None:
+                return
+            yield job
+            if job.finished:
+                return
+            since = job.updated_at
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.to_thread(self._writer.shutdown)
@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import log
+import metrics
+from deadline import DeadlineExceeded, with_deadline
+from rate_limit import TokenBucket
+
+try:
+    import fcntl
+except ImportError:  # Windows: limits hold per process only
+    fcntl = None
+
+logger = log.get_logger(__name__)
+
+T = TypeVar("T")
+
+SESSIONS_PER_ACCOUNT = int(os.getenv("LINKEDIN_SESSIONS_PER_ACCOUNT", "1"))
+# Minimum seconds between two browser sessions starting on one account
+MIN_SESSION_INTERVAL = float(os.getenv("LINKEDIN_MIN_SESSION_INTERVAL", "5"))
+# Lock files that hold the limits across the shard processes of one host
+LOCK_DIR = os.getenv(
+    "LINKEDIN_LOCK_DIR", os.path.join(tempfile.gettempdir(), "linkedin-accounts")
+)
+# Longest pause between two tries for a session slot held by another process
+LOCK_POLL_SECONDS = 0.5
+
+
+class _Account:
+    def __init__(self, max_sessions: int, min_interval: float):
+        self.sessions = asyncio.Semaphore(max_sessions)
+        self.pacing = (
+            TokenBucket(1 / min_interval, capacity=1) if min_interval > 0 else None
+        )
+
+
+class AccountScheduler:
+    """
+    Schedules LinkedIn browser work per founder account: at most
+    `max_sessions` browser sessions per account at once, session starts at
+    least `min_interval` seconds apart, and concurrent requests for the same
+    VC profile share one scrape. Parallel logins to one account waste
+    browsers and get the account challenged.
+
+    Session slots and start times are also claimed through lock files in
+    `lock_dir`, named by a hash of the account, so the limits hold across
+    the worker processes of a host. Shared scrapes stay per process.
+
+    Queue and pacing waits go to the linkedin.queue_wait_seconds and
+    linkedin.pacing_seconds timings.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        min_interval: Optional[float] = None,
+        lock_dir: Optional[str] = None,
+    ):
+        self.max_sessions = max(1, max_sessions or SESSIONS_PER_ACCOUNT)
+        self.min_interval = (
+            MIN_SESSION_INTERVAL if min_interval is None else min_interval
+        )
+        self.lock_dir = lock_dir or LOCK_DIR
+        if fcntl is not None:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self._accounts: Dict[str, _Account] = {}
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def _account(self, founder_email: str) -> _Account:
+        key = founder_email.strip().lower()
+        account = self._accounts.get(key)
+        if account is None:
+            account = self._accounts[key] = _Account(
+                self.max_sessions, self.min_interval
+            )
+        return account
+
+    def _lock_path(self, key: str, name: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.lock_dir, f"{digest}.{name}")
+
+    async def _lock_slot(self, key: str) -> int:
+        # flock is not awaitable, so slots held by other processes are polled
+        poll = 0.05
+        while True:
+            for slot in range(self.max_sessions):
+                fd = os.open(
+                    self._lock_path(key, f"slot{slot}"), os.O_RDWR | os.O_CREAT
+                )
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except BlockingIOError:
+                    os.close(fd)
+            await asyncio.sleep(poll)
+            poll = min(poll * 2, LOCK_POLL_SECONDS)
+
+    def _reserve_start(self, key: str) -> float:
+        """
+        Claim the account's next session start, at least min_interval after
+        the last one claimed by any process, and return the seconds to wait.
+        """
+        fd = os.open(self._lock_path(key, "starts"), os.O_RDWR | os.O_CREAT)
+        try:
+            # Held for one read and one write
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            last = float(os.pread(fd, 64, 0) or 0)
+            now = time.time()
+            start = max(now, last + self.min_interval)
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, repr(start).encode(), 0)
+            return start - now
+        finally:
+            os.close(fd)
+
+    async def _acquire(self, key: str, account: _Account) -> Optional[int]:
+        start = time.perf_counter()
+        await account.sessions.acquire()
+        fd = None
+        try:
+            if fcntl is not None:
+                fd = await self._lock_slot(key)
+            metrics.observe("linkedin.queue_wait_seconds", time.perf_counter() - start)
+            if fcntl is not None and self.min_interval > 0:
+                wait = self._reserve_start(key)
+            else:
+                wait = account.pacing.reserve() if account.pacing is not None else 0.0
+            if wait:
+                await asyncio.sleep(wait)
+            metrics.observe("linkedin.pacing_seconds", wait)
+            return fd
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            account.sessions.release()
+            raise
+
+    @asynccontextmanager
+    async def session(self, founder_email: str):
+        """
+        Hold one of the account's browser session slots. Waiting for it
+        counts against the request deadline.
+        """
+        key = founder_email.strip().lower()
+        account = self._account(founder_email)
+        fd = await with_deadline(self._acquire(key, account), "LinkedIn account queue")
+        try:
+            yield
+        finally:
+            if fd is not None:
+                # Closing the file releases its lock
+                os.close(fd)
+            account.sessions.release()
+
+    async def run(
+        self,
+        founder_email: str,
+        vc_linkedin_url: str,
+        work: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Run `work` (one browser session for one VC profile) in a session
+        slot, or wait for the same account's scrape of that profile if one is
+        already running and share its result.
+        """
+        key = (founder_email.strip().lower(), vc_linkedin_url)
+        while True:
+            shared = self._in_flight.get(key)
+            if shared is None:
+                break
+            metrics.incr("linkedin.shared")
+            logger.info("Waiting for a running scrape of %s", vc_linkedin_url)
+            try:
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                # Only retry if the scrape we waited on was cancelled, not us
+                if asyncio.current_task().cancelling() or not shared.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on it, so mark a failure as retrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = future
+        try:
+            async with self.session(founder_email):
+                result = await work()
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # Runs waiting on this one may have time left to try themselves
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+
+# One scheduler per event loop, since its semaphores and futures belong to it
+_schedulers = weakref.WeakKeyDictionary()
+
+
+def get_scheduler(
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> AccountScheduler:
+    loop = loop or asyncio.get_running_loop()
+    scheduler = _schedulers.get(loop)
+    if scheduler is None:
+        scheduler = _schedulers[loop] = AccountScheduler()
+    return scheduler
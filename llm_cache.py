@@ -0,0 +1,252 @@
+import dataclasses
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+from pydantic_ai.messages import ModelMessagesTypeAdapter
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.usage import Usage
+
+import log
+
+logger = log.get_logger(__name__)
+
+# read_write: serve hits, call the model and store on misses
+# record: always call the model and store the response (refreshes the cache)
+# replay: serve hits only, a miss raises CacheMiss instead of calling the model
+CACHE_MODES = ("read_write", "record", "replay")
+
+
+class CacheMiss(LookupError):
+    pass
+
+
+class LLMCache:
+    """
+    Content-addressed response store: an in-memory LRU in front of an sqlite
+    file that is trimmed back under `max_bytes` by least recent access.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int = 256 * 1024 * 1024, memory_entries: int = 512
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)"
+        )
+
+    def _remember(self, key: str, value: bytes) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._remember(key, value)
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._db.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            evicted += 1
+        logger.info("Evicted %s cache entries from %s", evicted, self.path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._memory.clear()
+
+
+_caches: Dict[str, LLMCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path: Optional[str] = None, max_bytes: Optional[int] = None) -> LLMCache:
+    path = path or os.getenv("LLM_CACHE_PATH", ".llm_cache/responses.sqlite")
+    if max_bytes is None:
+        max_bytes = int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = LLMCache(path, max_bytes=max_bytes)
+        return _caches[path]
+
+
+def cache_enabled_for(agent_name: Optional[str]) -> bool:
+    """
+    Agents opt in through LLM_CACHE_AGENTS, a comma separated list of agent
+    names or "*" for all of them.
+    """
+    enabled = {
+        a.strip() for a in os.getenv("LLM_CACHE_AGENTS", "").split(",") if a.strip()
+    }
+    return "*" in enabled or (agent_name is not None and agent_name in enabled)
+
+
+def _strip_volatile(value: Any) -> Any:
+    # Timestamps change on every run but do not affect the response
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k != "timestamp"}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def request_key(model, messages, model_settings, model_request_parameters) -> str:
+    payload = {
+        "system": model.system,
+        "model": model.model_name,
+        "messages": _strip_volatile(
+            ModelMessagesTypeAdapter.dump_python(messages, mode="json")
+        ),
+        "settings": dict(model_settings or {}),
+        "parameters": dataclasses.asdict(model_request_parameters),
+    }
+    encoded = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def encode_response(response, usage: Usage) -> bytes:
+    return orjson.dumps(
+        {
+            "response": ModelMessagesTypeAdapter.dump_python([response], mode="json"),
+            "usage": dataclasses.asdict(usage),
+        }
+    )
+
+
+def decode_response(data: bytes):
+    payload = orjson.loads(data)
+    response = ModelMessagesTypeAdapter.validate_python(payload["response"])[0]
+    return response, Usage(**payload["usage"])
+
+
+def call_key(name: str, arguments: Dict[str, Any]) -> str:
+    payload = {"call": name, "arguments": arguments}
+    encoded = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha256(encoded).hexdigest()
+
+
+async def cached_call(
+    model, name: str, arguments: Dict[str, Any], call: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Run an outside call a tool makes (Firecrawl research, the LinkedIn
+    browser) through the cache of the agent's model, `ctx.model` in the
+    tool. Its result is part of the next model request, so replay needs it
+    recorded as well to stay offline. Without a CachedModel the call just
+    runs.
+    """
+    if not isinstance(model, CachedModel):
+        return await call()
+    return await model.cached_call(name, arguments, call)
+
+
+class CachedModel(WrapperModel):
+    """
+    Model wrapper that answers repeated requests from an LLMCache. Requests
+    are keyed on a hash of the messages, tools, model and settings. Tools
+    record the outside calls they make with cached_call().
+    """
+
+    def __init__(
+        self, wrapped, cache: Optional[LLMCache] = None, mode: str = "read_write"
+    ):
+        super().__init__(wrapped)
+        if mode not in CACHE_MODES:
+            raise ValueError(
+                f"Unknown cache mode {mode!r}, expected one of {CACHE_MODES}"
+            )
+        self.cache = cache or get_cache()
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+
+    async def request(self, messages, model_settings, model_request_parameters):
+        key = request_key(
+            self.wrapped, messages, model_settings, model_request_parameters
+        )
+        if self.mode != "record":
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return decode_response(cached)
+        self.misses += 1
+        if self.mode == "replay":
+            raise CacheMiss(
+                f"No cached response for {self.model_name} request {key[:12]}"
+            )
+        response, usage = await self.wrapped.request(
+            messages, model_settings, model_request_parameters
+        )
+        self.cache.put(key, encode_response(response, usage))
+        return response, usage
+
+    async def cached_call(
+        self, name: str, arguments: Dict[str, Any], call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        key = call_key(name, arguments)
+        if self.mode != "record":
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return orjson.loads(cached)
+        self.misses += 1
+        if self.mode == "replay":
+            raise CacheMiss(f"No cached result for {name} call {key[:12]}")
+        result = await call()
+        # Round-tripped so a recording run hands the model the same value
+        # a replay will
+        data = orjson.dumps(result, default=str)
+        self.cache.put(key, data)
+        return orjson.loads(data)
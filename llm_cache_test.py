@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from pydantic_ai import Agent, RunContext
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import FunctionModel
+
+from llm_cache import CachedModel, CacheMiss, LLMCache, cached_call
+
+
+def respond(messages, info):
+    returns = [
+        part
+        for message in messages
+        for part in message.parts
+        if isinstance(part, ToolReturnPart)
+    ]
+    if not returns:
+        return ModelResponse(parts=[ToolCallPart("lookup", {"query": "jake"})])
+    return ModelResponse(parts=[TextPart(f"found {returns[-1].content['email']}")])
+
+
+def make_agent(backend):
+    agent = Agent(result_type=str)
+
+    @agent.tool
+    async def lookup(ctx: RunContext[None], query: str) -> dict:
+        return await cached_call(
+            ctx.model, "lookup", {"query": query}, lambda: backend(query)
+        )
+
+    return agent
+
+
+def test_replay_serves_tool_calls_offline():
+    cache = LLMCache(":memory:")
+    calls = []
+
+    async def online(query):
+        calls.append(query)
+        return {"email": f"{query}@archventure.com"}
+
+    async def offline(query):
+        raise AssertionError("replay reached the backend")
+
+    recorded = asyncio.run(
+        make_agent(online).run(
+            "find", model=CachedModel(FunctionModel(respond), cache, "read_write")
+        )
+    )
+    model = CachedModel(FunctionModel(respond), cache, "replay")
+    replayed = asyncio.run(make_agent(offline).run("find", model=model))
+
+    assert calls == ["jake"]
+    assert replayed.data == recorded.data == "found jake@archventure.com"
+    assert model.misses == 0
+
+
+def test_replay_miss_raises():
+    model = CachedModel(FunctionModel(respond), LLMCache(":memory:"), "replay")
+    with pytest.raises(CacheMiss):
+        asyncio.run(make_agent(None).run("find", model=model))
@@ -0,0 +1,241 @@
+"""
+Replay a file of workflow requests against the outreach agent and report
+latency percentiles, error rate and throughput.
+
+Requests are read from a JSON list or a JSON lines file in the fetch_agent
+request format; each replayed request gets a fresh thread_id. Either pace
+requests at a fixed --rate (open loop) or keep --concurrency requests in
+flight (closed loop).
+
+    # against a running fetch_agent.py
+    python loadgen.py requests.jsonl --agent-address agent1q... --rate 2 --requests 100
+    # in-process workflow runner, sharded over 4 worker processes
+    python loadgen.py requests.jsonl --transport local --workers 4 --concurrency 32
+    # offline, with a stub runner factory
+    python loadgen.py requests.jsonl --transport local --runner benchmarks.bench_sharding:make_stub_runner
+"""
+
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import time
+import uuid
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List
+
+import orjson
+
+from metrics import percentile
+
+Call = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def load_requests(path: str) -> List[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        requests = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        requests = [orjson.loads(line) for line in data.splitlines() if line.strip()]
+    if isinstance(requests, dict):
+        requests = [requests]
+    if not requests:
+        raise ValueError(f"No requests in {path}")
+    return requests
+
+
+def load_factory(spec: str) -> Callable:
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+async def agent_transport(args):
+    from outreach_client import OutreachClient
+
+    client = await OutreachClient(args.agent_address, port=args.client_port).start()
+
+    async def call(query):
+        return await client.request(query, timeout=args.timeout)
+
+    return call, client.close
+
+
+async def local_transport(args):
+    from workflow import state_from_request
+
+    factory = load_factory(args.runner)
+    pool = None
+    if args.workers > 1:
+        from sharding import ShardedWorkflowPool
+
+        pool = ShardedWorkflowPool(args.workers, factory=factory).start()
+        run = pool.run
+    else:
+        run = factory()
+
+    async def call(query):
+        state, thread_id = state_from_request(query)
+        return await asyncio.wait_for(run(state, thread_id), args.timeout)
+
+    async def close():
+        if pool is not None:
+            pool.close()
+
+    return call, close
+
+
+async def timed_call(
+    call: Call, query: Dict[str, Any], results: list, routing: list
+) -> None:
+    start = time.perf_counter()
+    try:
+        response = await call({**query, "thread_id": str(uuid.uuid4())})
+        results.append((time.perf_counter() - start, None))
+        routing.extend(response.get("routing") or [])
+    except Exception as e:
+        results.append((time.perf_counter() - start, type(e).__name__))
+
+
+async def run_at_rate(call: Call, queries, count: int, rate: float, results, routing):
+    start = time.perf_counter()
+    tasks = []
+    for i, query in zip(range(count), queries):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(timed_call(call, query, results, routing)))
+    await asyncio.gather(*tasks)
+
+
+async def run_with_concurrency(
+    call: Call, queries, count: int, concurrency: int, results, routing
+):
+    batch = iter(zip(range(count), queries))
+
+    async def worker():
+        for _, query in batch:
+            await timed_call(call, query, results, routing)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def routing_summary(routing: list) -> List[Dict[str, Any]]:
+    # Mean latency, tokens and validation retries per (profile, node, model)
+    groups: Dict[tuple, list] = {}
+    for decision in routing:
+        key = (decision["profile"], decision["node"], decision["model"])
+        groups.setdefault(key, []).append(decision)
+    return [
+        {
+            "profile": profile,
+            "node": node,
+            "model": model,
+            "runs": len(decisions),
+            "seconds": sum(d["seconds"] for d in decisions) / len(decisions),
+            "tokens": sum(d["request_tokens"] + d["response_tokens"] for d in decisions)
+            / len(decisions),
+            "retries": sum(d.get("validation_retries", 0) for d in decisions)
+            / len(decisions),
+            "retry_seconds": sum(
+                d.get("validation_retry_seconds", 0.0) for d in decisions
+            )
+            / len(decisions),
+        }
+        for (profile, node, model), decisions in sorted(groups.items())
+    ]
+
+
+def report(results: list, elapsed: float, routing: list) -> Dict[str, Any]:
+    latencies = sorted(seconds for seconds, error in results if error is None)
+    errors = Counter(error for _, error in results if error is not None)
+    return {
+        "requests": len(results),
+        "ok": len(latencies),
+        "errors": dict(errors),
+        "error_rate": sum(errors.values()) / len(results) if results else 0.0,
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": {
+            f"p{int(q * 100)}": percentile(latencies, q) for q in (0.5, 0.9, 0.95, 0.99)
+        }
+        | {"max": latencies[-1] if latencies else 0.0},
+        "routing": routing_summary(routing),
+    }
+
+
+async def main_async(args) -> Dict[str, Any]:
+    requests = load_requests(args.file)
+    count = args.requests or len(requests)
+    transport = agent_transport if args.transport == "agent" else local_transport
+    call, close = await transport(args)
+    results: list = []
+    routing: list = []
+    start = time.perf_counter()
+    try:
+        if args.rate:
+            await run_at_rate(
+                call, itertools.cycle(requests), count, args.rate, results, routing
+            )
+        else:
+            await run_with_concurrency(
+                call,
+                itertools.cycle(requests),
+                count,
+                args.concurrency,
+                results,
+                routing,
+            )
+    finally:
+        elapsed = time.perf_counter() - start
+        await close()
+    return report(results, elapsed, routing)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file", help="JSON list or JSON lines file of requests")
+    parser.add_argument("--transport", choices=("agent", "local"), default="agent")
+    parser.add_argument("--agent-address", help="workflow agent address (agent)")
+    parser.add_argument("--client-port", type=int, default=8082)
+    parser.add_argument(
+        "--runner",
+        default="sharding:default_runner_factory",
+        help="module:factory returning run(state, thread_id) (local)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="shard processes (local)"
+    )
+    parser.add_argument("--requests", type=int, default=0, help="default: one pass")
+    parser.add_argument("--rate", type=float, default=0, help="requests per second")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    if args.transport == "agent" and not args.agent_address:
+        parser.error("--agent-address is required with --transport agent")
+
+    result = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(
+        f"requests {result['requests']}  ok {result['ok']}  "
+        f"error rate {result['error_rate']:.1%}  {result['errors'] or ''}"
+    )
+    print(f"throughput {result['throughput']:.2f} req/s over {result['seconds']:.1f} s")
+    print(
+        "latency  "
+        + "  ".join(f"{k} {v * 1000:.0f} ms" for k, v in result["latency"].items())
+    )
+    for row in result["routing"]:
+        print(
+            f"{row['profile']:<8} {row['node']:<24} {row['model']:<14} "
+            f"{row['runs']:>5} runs {row['seconds']:>7.2f} s {row['tokens']:>8.0f} tokens "
+            f"{row['retries']:>5.2f} retries ({row['retry_seconds']:.2f} s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,295 @@
+import atexit
+import inspect
 import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
 from functools import wraps
-from typing import Callable
+from typing import IO, Any, Callable, Dict, Iterator, Optional
 
 import colorlog
+import orjson
+
+# Log records are put on a queue by the calling thread (usually the event
+# loop) and formatted and written by a background listener thread
+LOG_FORMAT = os.getenv("LOG_FORMAT", "console")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# String arguments longer than this are truncated, and records carrying them
+# below WARNING are only kept at LOG_PAYLOAD_SAMPLE_RATE
+LOG_MAX_CHARS = int(os.getenv("LOG_MAX_CHARS", "2000"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+
+def console_formatter() -> logging.Formatter:
+    return colorlog.ColoredFormatter(
+        "%(log_color)s%(asctime)s %(levelname)-8s%(reset)s %(thin_white)s%(name)s%(reset)s - %(message)s",
+        log_colors={
+            "DEBUG": "cyan",
+            "INFO": "green",
+            "WARNING": "yellow",
+            "ERROR": "red",
+            "CRITICAL": "red,bg_white",
+        },
+        secondary_log_colors={},
+        style="%",
+    )
+
+
+class PayloadFilter(logging.Filter):
+    """
+    Truncate long string arguments and sample records that carry them.
+    Runs in the calling thread, so it only slices, it never formats.
+    """
+
+    def __init__(self, max_chars: int, sample_rate: float):
+        super().__init__()
+        self.max_chars = max_chars
+        self.sample_rate = sample_rate
+
+    def _truncate(self, value: Any) -> Any:
+        if isinstance(value, str) and len(value) > self.max_chars:
+            return f"{value[: self.max_chars]}... ({len(value)} chars)"
+        return value
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        args = record.args if isinstance(record.args, tuple) else ()
+        if not any(isinstance(a, str) and len(a) > self.max_chars for a in args):
+            return True
+        if record.levelno < logging.WARNING and random.random() >= self.sample_rate:
+            return False
+        record.args = tuple(self._truncate(a) for a in args)
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in this process, so the record is passed as-is
+        # and %-formatting happens on the listener thread, not here
+        return record
+
+
+def configure_logging(
+    fmt: Optional[str] = None,
+    level: Optional[str] = None,
+    stream: Optional[IO] = None,
+) -> None:
+    """
+    Route all logging through a queue to a background listener thread that
+    writes colored console lines, or JSON lines with fmt="json" (LOG_FORMAT).
+    Calling it again replaces the previous setup.
+    """
+    global _listener
+    fmt = fmt or LOG_FORMAT
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, _QueueHandler):
+                root.removeHandler(handler)
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else console_formatter())
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler = _QueueHandler(records)
+        handler.addFilter(PayloadFilter(LOG_MAX_CHARS, LOG_PAYLOAD_SAMPLE_RATE))
+        root.addHandler(handler)
+        if level:
+            root.setLevel(level.upper())
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    # Flush whatever is still queued
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
 
 
 def get_logger(name: str) -> logging.Logger:
+    if _listener is None:
+        configure_logging()
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    # Configure the logger with its own handler to prevent duplication
-    if not logger.handlers:
-        handler = colorlog.StreamHandler()
-        formatter = colorlog.ColoredFormatter(
-            f"%(log_color)s%(asctime)s %(levelname)-8s%(reset)s %(thin_white)s%(name)s%(reset)s - %(message)s",
-            log_colors={
-                "DEBUG": "cyan",
-                "INFO": "green",
-                "WARNING": "yellow",
-                "ERROR": "red",
-                "CRITICAL": "red,bg_white",
-            },
-            secondary_log_colors={},
-            style="%",
-        )
-        handler.setFormatter(formatter)
-        logger.handlers = [handler]
-    logger.propagate = False
+    logger.setLevel(LOG_LEVEL)
     return logger
 
 
+# Arguments whose values never go into a span or a log line
+SENSITIVE_ARGS = ("password", "secret", "token", "api_key")
+
+_tracer = None
+
+
+def get_tracer():
+    # opentelemetry is imported on first use to keep module import cheap
+    global _tracer
+    if _tracer is None:
+        from opentelemetry import trace
+
+        _tracer = trace.get_tracer("bachmanity")
+    return _tracer
+
+
+def configure_tracing(exporter: Optional[str] = None) -> bool:
+    """
+    Export spans locally. `exporter` (default TRACE_EXPORTER) is "console" for
+    stderr or "file" to append JSON spans to TRACE_FILE. Also turns on the
+    pydantic_ai instrumentation so agent runs, model requests and tool calls
+    show up inside the workflow spans. Returns False if tracing stays off.
+    """
+    exporter = exporter or os.getenv("TRACE_EXPORTER", "")
+    if exporter not in ("console", "file"):
+        return False
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+        )
+    except ImportError:
+        get_logger(__name__).warning(
+            "opentelemetry-sdk is not installed, spans are not exported"
+        )
+        return False
+
+    if exporter == "file":
+        out = open(os.getenv("TRACE_FILE", "traces.jsonl"), "a")
+        span_exporter = ConsoleSpanExporter(
+            out=out, formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    else:
+        span_exporter = ConsoleSpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+
+    from pydantic_ai import Agent
+
+    Agent.instrument_all()
+    return True
+
+
+def _summarize(value: Any, limit: int = 80) -> str:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        text = repr(value)
+        return text if len(text) <= limit else text[: limit - 3] + "..."
+    return type(value).__name__
+
+
+def summarize_args(func: Callable, args: tuple, kwargs: dict) -> Dict[str, str]:
+    try:
+        bound = inspect.signature(func).bind_partial(*args, **kwargs)
+    except TypeError:
+        return {}
+    return {
+        f"arg.{name}": (
+            "***"
+            if any(word in name.lower() for word in SENSITIVE_ARGS)
+            else _summarize(value)
+        )
+        for name, value in bound.arguments.items()
+    }
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Open a span nested under the current one. Works across awaits since the
+    active span lives in a contextvar. Exceptions are recorded on the span.
+    """
+    attributes = {k: v for k, v in attributes.items() if v is not None}
+    start = time.perf_counter()
+    with get_tracer().start_as_current_span(name, attributes=attributes) as current:
+        try:
+            yield current
+        finally:
+            current.set_attribute(
+                "duration_ms", round((time.perf_counter() - start) * 1000, 3)
+            )
+
+
 def add_logger(base_logger: logging.Logger) -> Callable:
+    """
+    Trace every call of the decorated function (sync or async) in a span with
+    its duration, a summary of its arguments and any exception, and attach a
+    child logger as `func.logger`.
+    """
+
     def decorator(func: Callable) -> Callable:
-        logger_name = f"{base_logger.name}.{func.__name__}"
-        new_logger = logging.getLogger(logger_name)
+        # The child logger has no handlers of its own, records propagate to
+        # base_logger's
+        new_logger = logging.getLogger(f"{base_logger.name}.{func.__name__}")
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        def finished(start: float, error: Optional[BaseException] = None) -> None:
+            elapsed = (time.perf_counter() - start) * 1000
+            if error is None:
+                new_logger.debug("%s finished in %.1f ms", name, elapsed)
+            else:
+                new_logger.error(
+                    "%s failed after %.1f ms: %s: %s",
+                    name,
+                    elapsed,
+                    type(error).__name__,
+                    error,
+                )
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                with span(name, **summarize_args(func, args, kwargs)):
+                    try:
+                        result = await func(*args, **kwargs)
+                    except BaseException as e:
+                        finished(start, e)
+                        raise
+                finished(start)
+                return result
 
-        # Copy configuration from base_logger
-        new_logger.setLevel(base_logger.level)
-        for handler in base_logger.handlers:
-            new_logger.addHandler(handler)
-        new_logger.propagate = base_logger.propagate
+        else:
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            return func(*args, **kwargs)
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                with span(name, **summarize_args(func, args, kwargs)):
+                    try:
+                        result = func(*args, **kwargs)
+                    except BaseException as e:
+                        finished(start, e)
+                        raise
+                finished(start)
+                return result
 
-        # Attach the logger to the function
         wrapper.logger = new_logger
         return wrapper
 
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict
+
+# Process-wide counters and timing samples. Cheap enough to call from hot
+# paths; read them with snapshot() from diagnostics or benchmarks.
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_timings: Dict[str, Deque[float]] = {}
+_timing_totals: Dict[str, list] = {}
+MAX_SAMPLES = 2048
+
+
+def incr(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, seconds: float) -> None:
+    with _lock:
+        samples = _timings.get(name)
+        if samples is None:
+            samples = _timings[name] = deque(maxlen=MAX_SAMPLES)
+            _timing_totals[name] = [0, 0.0]
+        samples.append(seconds)
+        totals = _timing_totals[name]
+        totals[0] += 1
+        totals[1] += seconds
+
+
+@contextmanager
+def timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def snapshot() -> dict:
+    with _lock:
+        counters = dict(_counters)
+        timings = {
+            name: {
+                "count": _timing_totals[name][0],
+                "total": _timing_totals[name][1],
+                "p50": percentile(samples, 0.5),
+                "p95": percentile(samples, 0.95),
+                "max": max(samples) if samples else 0.0,
+            }
+            for name, samples in _timings.items()
+        }
+    return {"counters": counters, "timings": timings}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+        _timing_totals.clear()
@@ -0,0 +1,81 @@
+import functools
+import json
+import os
+from typing import Dict, Optional
+
+# Model per agent for every named profile. "quality" keeps the reasoning
+# model everywhere; "fast" and "cheap" move the agents that only relay tool
+# output (introducer finder) or return a single value (email finder) to
+# small models first.
+PROFILES: Dict[str, Dict[str, str]] = {
+    "quality": {
+        "introducer_finder": "o3-mini",
+        "email_finder": "o3-mini",
+        "intro_generator": "o3-mini",
+        "email_drafter": "o3-mini",
+    },
+    "fast": {
+        "introducer_finder": "gpt-4.1-nano",
+        "email_finder": "gpt-4.1-mini",
+        "intro_generator": "gpt-4.1-mini",
+        "email_drafter": "gpt-4.1-mini",
+    },
+    "cheap": {
+        "introducer_finder": "gpt-4.1-nano",
+        "email_finder": "gpt-4.1-nano",
+        "intro_generator": "gpt-4o-mini",
+        "email_drafter": "gpt-4o-mini",
+    },
+}
+
+DEFAULT_PROFILE = os.getenv("MODEL_PROFILE", "quality")
+# For agents a profile from MODEL_PROFILES_FILE does not list
+FALLBACK_MODEL = "o3-mini"
+
+
+@functools.lru_cache(maxsize=1)
+def load_profiles() -> Dict[str, Dict[str, str]]:
+    """
+    Built-in profiles, updated from the JSON file in MODEL_PROFILES_FILE
+    ({"profile": {"agent_name": "model", ...}, ...}) if it is set.
+    """
+    profiles = {name: dict(models) for name, models in PROFILES.items()}
+    path = os.getenv("MODEL_PROFILES_FILE")
+    if path:
+        with open(path) as f:
+            for name, models in json.load(f).items():
+                profiles.setdefault(name, {}).update(models)
+    return profiles
+
+
+def validate_profile(profile: Optional[str]) -> str:
+    profile = profile or DEFAULT_PROFILE
+    if profile not in load_profiles():
+        raise ValueError(
+            f"Unknown model profile {profile!r}. Choose from {sorted(load_profiles())}."
+        )
+    return profile
+
+
+def model_name_for(
+    profile: Optional[str], agent_name: str, override: Optional[str] = None
+) -> str:
+    """
+    The model for an agent: `override` if given (one model for every agent),
+    otherwise the profile's choice.
+    """
+    if override:
+        return override
+    return (
+        load_profiles()
+        .get(validate_profile(profile), {})
+        .get(agent_name, FALLBACK_MODEL)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_model(model_name: str, agent_name: str):
+    # Built once per (model, agent) so rate limiting and caching wrappers are shared
+    import openai_model
+
+    return openai_model.get_openai_model(model_name, agent_name=agent_name)
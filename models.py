@@ -1,30 +1,97 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Founder:
     name: str
     background: str
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Founder":
+        return cls(
+            name=data.get("name", ""),
+            background=data.get("background", ""),
+        )
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Startup:
     vision: str
     company_name: str
-    founders: List[Founder]
+    founders: Tuple[Founder, ...]
     product_description: str
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Startup":
+        return cls(
+            vision=data.get("vision", ""),
+            company_name=data.get("company_name", ""),
+            founders=tuple(
+                Founder.from_dict(founder) for founder in data.get("founders", [])
+            ),
+            product_description=data.get("product_description", ""),
+        )
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class VCPartner:
     name: str
     fund_name: str
     fund_website: str
     linkedin_url: str
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VCPartner":
+        return cls(
+            name=data.get("name", ""),
+            fund_name=data.get("fund_name", ""),
+            fund_website=data.get("fund_website", ""),
+            linkedin_url=data.get("linkedin_url", ""),
+        )
+
+
+def _merge_unique(first: List[Any], second: List[Any]) -> List[Any]:
+    return first + [item for item in second if item not in first]
+
+
+@dataclass(slots=True)
+class ResearchContext:
+    """
+    Research findings shared by the agent nodes of one workflow run, keyed by
+    partner and fund, so a partner is researched once and reused afterwards.
+    `calls` and `reused` count research done and research served from here.
+    """
+
+    findings: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    calls: int = 0
+    reused: int = 0
+
+    @staticmethod
+    def key(vc_partner: VCPartner) -> str:
+        return f"{vc_partner.name}|{vc_partner.fund_website}".strip().lower()
+
+    def get(self, vc_partner: VCPartner) -> Optional[Dict[str, Any]]:
+        return self.findings.get(self.key(vc_partner))
+
+    def add(self, vc_partner: VCPartner, findings: Dict[str, Any]) -> Dict[str, Any]:
+        known = self.get(vc_partner)
+        if known:
+            findings = {
+                **known,
+                **findings,
+                **{
+                    name: _merge_unique(known.get(name, []), findings.get(name, []))
+                    for name in ("emails", "partner", "relevant", "sources")
+                },
+                "resolved": bool(known.get("resolved") or findings.get("resolved")),
+            }
+        self.findings[self.key(vc_partner)] = findings
+        return findings
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DrafterDeps:
     startup: Startup
     vc_partner: VCPartner
+    research: Optional[ResearchContext] = None
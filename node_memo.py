@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import orjson
+
+import blob_store
+import log
+from blob_store import BlobRef
+from serialization import pack, unpack
+
+logger = log.get_logger(__name__)
+
+# Workflow nodes memoize their output on a hash of the state fields they
+# read, so a re-run with one edited input only recomputes the nodes that
+# depend on it. NODE_MEMO=0 turns this off.
+NODE_MEMO = os.getenv("NODE_MEMO", "1") not in ("0", "false", "")
+# Kept in memory unless NODE_MEMO_PATH names an sqlite file, which is then
+# shared by every shard process and survives restarts
+NODE_MEMO_PATH = os.getenv("NODE_MEMO_PATH", "")
+NODE_MEMO_MAX_MB = float(os.getenv("NODE_MEMO_MAX_MB", "64"))
+# Outputs of nodes that read LinkedIn or the web (the scrape and the email
+# lookup) go stale: workflow serves them for at most this long
+NODE_MEMO_TTL_SECONDS = float(os.getenv("NODE_MEMO_TTL_SECONDS", str(24 * 3600)))
+# Part of every key: bump it when a node or its agent's prompts change, so
+# outputs of the old version are no longer served
+NODE_MEMO_VERSION = 2
+
+_memo = None
+_memo_lock = threading.Lock()
+
+
+def get_memo():
+    """
+    The node output store: an llm_cache.LLMCache, in memory or on disk.
+    """
+    global _memo
+    with _memo_lock:
+        if _memo is None:
+            # llm_cache imports pydantic_ai, which workflow does not load at startup
+            from llm_cache import LLMCache
+
+            path = NODE_MEMO_PATH or ":memory:"
+            _memo = LLMCache(path, max_bytes=int(NODE_MEMO_MAX_MB * 1024 * 1024))
+            logger.info("Memoizing workflow nodes in %s", path)
+        return _memo
+
+
+def read_field(state: Dict[str, Any], path: str) -> Any:
+    """
+    Look up a state field, or an attribute of one with a dotted path such
+    as "vc_partner.linkedin_url".
+    """
+    name, *attributes = path.split(".")
+    value = state.get(name)
+    for attribute in attributes:
+        value = getattr(value, attribute, None)
+    return value
+
+
+def input_key(
+    node: str, state: Dict[str, Any], fields: Iterable[str], **extra: Any
+) -> str:
+    payload = {
+        "version": NODE_MEMO_VERSION,
+        "node": node,
+        "inputs": {path: read_field(state, path) for path in fields},
+        **extra,
+    }
+    encoded = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _refs(value: Any) -> Iterator[BlobRef]:
+    if isinstance(value, BlobRef):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _refs(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _refs(item)
+
+
+def encode_update(update: Dict[str, Any]) -> bytes:
+    # BlobRefs only resolve in the process that made them, so the values
+    # they point to are stored alongside the update
+    blobs = {ref.key: blob_store.deref(ref) for ref in _refs(update)}
+    return pack(
+        {"update": update, "blobs": list(blobs.values()), "stored_at": time.time()}
+    )
+
+
+def decode_update(
+    data: bytes, max_age: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    payload = unpack(data)
+    if max_age is not None and time.time() - payload["stored_at"] > max_age:
+        return None
+    for value in payload["blobs"]:
+        blob_store.put(value)
+    return payload["update"]
+
+
+def load(key: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    The stored update for `key`, or None if there is none or it was stored
+    more than `max_age` seconds ago.
+    """
+    data = get_memo().get(key)
+    return None if data is None else decode_update(data, max_age)
+
+
+def store(key: str, update: Dict[str, Any]) -> None:
+    get_memo().put(key, encode_update(update))
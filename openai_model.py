@@ -1,25 +1,50 @@
-from pydantic_ai.providers.openai import OpenAIProvider
-from pydantic_ai.models.openai import OpenAIModel
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
-
 
 def get_openai_model(model_name: str, **kwargs):
+    load_dotenv()
+
     api_key = kwargs.get("api_key", os.getenv("OPENAI_API_KEY"))
     base_url = kwargs.get(
         "base_url", os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
     )
 
-    provider = OpenAIProvider(
-        api_key=api_key,
-        base_url=base_url,
-    )
+    # All agents share the provider's process-wide rate limiter, which also
+    # retries throttled requests, so the SDKs' own retries are turned off.
+    # Imported here so that importing an agent module does not pull in the
+    # OpenAI SDK until a model is actually built
+    import hedging
+    from rate_limit import RateLimitedModel
 
-    model = OpenAIModel(
-        model_name=model_name,
-        provider=provider,
+    fallbacks = hedging.parse_model_specs(
+        kwargs.get("hedge_models", hedging.HEDGE_MODELS)
     )
+    if fallbacks:
+        # Slow or failing requests are duplicated to the other providers
+        # A throttled model is failed over instead of retried
+        model = hedging.HedgedModel(
+            RateLimitedModel(
+                hedging.provider_model("openai", model_name, base_url, api_key),
+                retries=0,
+            ),
+            [
+                RateLimitedModel(hedging.provider_model(*spec), retries=0)
+                for spec in fallbacks
+            ],
+        )
+    else:
+        model = RateLimitedModel(
+            hedging.provider_model("openai", model_name, base_url, api_key)
+        )
+
+    # Response caching is opt-in per agent, see llm_cache.cache_enabled_for
+    from llm_cache import CachedModel, cache_enabled_for
+
+    cache_mode = kwargs.get("cache_mode")
+    if cache_mode or cache_enabled_for(kwargs.get("agent_name")):
+        model = CachedModel(
+            model, mode=cache_mode or os.getenv("LLM_CACHE_MODE", "read_write")
+        )
 
     return model
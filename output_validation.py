@@ -0,0 +1,140 @@
+import re
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+from pydantic import BaseModel, Field, field_validator
+from pydantic_ai import ModelRetry
+from pydantic_ai.messages import ModelMessage, ModelRequest, RetryPromptPart
+
+# Agent results are checked here before they leave the agent. A result that
+# fails gets a short correction as a retry prompt in the same conversation,
+# so only the final answer is redone, not the research or browser work.
+
+# Retries per agent run for results that fail validation
+RESULT_RETRIES = 2
+RESULT_TOOL_NAME = "final_result"
+
+# Local part and domain of an address, close enough to RFC 5322 for the
+# addresses funds publish
+EMAIL_RE = re.compile(
+    r"^[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+@"
+    r"(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}$"
+)
+LINKEDIN_PROFILE_RE = re.compile(
+    r"^https://([a-z]{2,3}\.)?linkedin\.com/in/[^/\s?#]+/?([?#]\S*)?$"
+)
+
+# (min, max) words
+INTRO_WORDS = (40, 350)
+COLD_EMAIL_WORDS = (40, 300)
+
+
+class FoundEmail(BaseModel):
+    email: str = Field(
+        description="The partner's email address, or an empty string if none was found"
+    )
+
+    @field_validator("email")
+    @classmethod
+    def email_shape(cls, email: str) -> str:
+        email = email.strip().strip("<>").removeprefix("mailto:")
+        if email and not EMAIL_RE.match(email):
+            raise ValueError("must be a bare email address like name@fund.com")
+        return email.lower()
+
+
+class MutualConnection(BaseModel):
+    name: str = Field(min_length=1)
+    linkedin_url: str
+    headline: str = ""
+
+    @field_validator("linkedin_url")
+    @classmethod
+    def linkedin_profile(cls, url: str) -> str:
+        if not LINKEDIN_PROFILE_RE.match(url.strip()):
+            raise ValueError(
+                "must be a LinkedIn profile URL like https://www.linkedin.com/in/name"
+            )
+        return url.strip()
+
+
+class ConnectionIntro(BaseModel):
+    number: int = Field(description="The mutual connection's number in the list")
+    connection: str = Field(description="The mutual connection's name, as given")
+    intro: str = Field(description="The introduction email from this connection")
+
+
+def domain_of(url: str) -> str:
+    host = urlparse(url if "//" in url else f"//{url}").hostname or ""
+    return host.lower().removeprefix("www.")
+
+
+def email_domain_problem(email: str, fund_website: str) -> Optional[str]:
+    """
+    Say why the address is not on the fund's domain (or a subdomain of
+    it), or return None if it is. Unknown websites and empty answers are
+    not checked.
+    """
+    site = domain_of(fund_website)
+    if not email or not site:
+        return None
+    domain = email.rsplit("@", 1)[1]
+    if domain != site and not domain.endswith(f".{site}"):
+        return f"{email} is not on the fund's domain {site}"
+    return None
+
+
+def check_email_domain(email: str, fund_website: str) -> None:
+    """
+    Raise ModelRetry unless the address is on the fund's domain.
+    """
+    problem = email_domain_problem(email, fund_website)
+    if problem:
+        raise ModelRetry(
+            f"{problem}. Return the partner's address on the fund's domain, "
+            "or an empty email if there is none."
+        )
+
+
+def check_length(text: str, bounds: Tuple[int, int], what: str) -> str:
+    """
+    Raise ModelRetry if `text` is outside `bounds` words.
+    """
+    words = len(text.split())
+    low, high = bounds
+    if words < low:
+        raise ModelRetry(
+            f"The {what} has {words} words; write the full {what}, "
+            f"at least {low} words. Return only the {what}."
+        )
+    if words > high:
+        raise ModelRetry(
+            f"The {what} has {words} words; shorten it to at most {high} words "
+            f"and return only the {what}."
+        )
+    return text.strip()
+
+
+def validation_retries(
+    messages: Iterable[ModelMessage], finished_at: datetime = None
+) -> Tuple[int, float]:
+    """
+    Count the retries caused by rejected results in a run and the seconds
+    from the first rejection to the end of the run, i.e. what they cost.
+    Retries after failed tool calls are not counted.
+    """
+    rejected = [
+        part
+        for message in messages
+        if isinstance(message, ModelRequest)
+        for part in message.parts
+        if isinstance(part, RetryPromptPart)
+        and part.tool_name in (None, RESULT_TOOL_NAME)
+    ]
+    if not rejected:
+        return 0, 0.0
+    finished_at = finished_at or datetime.now(timezone.utc)
+    return len(rejected), max(
+        0.0, (finished_at - rejected[0].timestamp).total_seconds()
+    )
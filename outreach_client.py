@@ -0,0 +1,268 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+import log
+from serialization import from_wire, to_wire
+
+logger = log.get_logger(__name__)
+
+
+class WorkflowError(RuntimeError):
+    pass
+
+
+@dataclass
+class PendingRequest:
+    thread_id: str
+    msg_id: str
+    future: asyncio.Future
+    sent_at: float = 0.0
+    acked_at: Optional[float] = None
+
+
+class OutreachClient:
+    """
+    Async client for the VC outreach workflow agent (fetch_agent.py).
+
+    Every request gets a thread_id (kept if the caller set one) and a chat
+    msg_id. Replies are matched back by the thread_id the agent echoes, and
+    acknowledgements by msg_id, so any number of requests can be in flight.
+
+        client = OutreachClient(agent_address)
+        await client.start()
+        result = await client.request(query)
+        futures = [client.submit(q) for q in queries]
+
+    For long runs, submit_job() returns a job id straight away and
+    wait_for_job() / watch_job() long-poll the agent for progress and the
+    result, so nothing is lost if the client reconnects.
+    """
+
+    def __init__(
+        self,
+        agent_address: str,
+        name: str = "vc_outreach_client",
+        port: int = 8082,
+        seed: str = "vc_outreach_client_seed",
+        mailbox: bool = True,
+    ):
+        self.agent_address = agent_address
+        self.agent_kwargs = {
+            "name": name,
+            "port": port,
+            "seed": seed,
+            "mailbox": mailbox,
+        }
+        self.agent = None
+        self._pending: Dict[str, PendingRequest] = {}
+        self._by_msg_id: Dict[str, PendingRequest] = {}
+        self._outbox: Optional[asyncio.Queue] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._run_task: Optional[asyncio.Task] = None
+
+    def _build_agent(self, loop: asyncio.AbstractEventLoop):
+        # uagents is imported here so the client module stays cheap to import
+        from uagents import Agent, Context, Protocol
+        from uagents_core.contrib.protocols.chat import (
+            ChatAcknowledgement,
+            ChatMessage,
+            TextContent,
+            chat_protocol_spec,
+        )
+
+        self._ChatMessage = ChatMessage
+        self._TextContent = TextContent
+        agent = Agent(loop=loop, **self.agent_kwargs)
+        chat_proto = Protocol(spec=chat_protocol_spec)
+
+        @agent.on_event("startup")
+        async def startup(ctx: Context):
+            logger.info("Client %s started at %s", ctx.agent.name, ctx.agent.address)
+            # Messages are sent from the agent's own context by this task, so
+            # submit() can be called from anywhere on the loop
+            asyncio.create_task(self._drain(ctx))
+            self._ready.set()
+
+        @chat_proto.on_message(ChatMessage)
+        async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
+            for item in msg.content:
+                if isinstance(item, TextContent):
+                    self._resolve(item.text)
+            await ctx.send(
+                sender,
+                ChatAcknowledgement(
+                    timestamp=datetime.utcnow(), acknowledged_msg_id=msg.msg_id
+                ),
+            )
+
+        @chat_proto.on_message(ChatAcknowledgement)
+        async def handle_acknowledgement(
+            ctx: Context, sender: str, msg: ChatAcknowledgement
+        ):
+            pending = self._by_msg_id.get(str(msg.acknowledged_msg_id))
+            if pending is not None:
+                pending.acked_at = time.perf_counter()
+
+        agent.include(chat_proto, publish_manifest=True)
+        return agent
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> "OutreachClient":
+        if self._run_task is None:
+            self._outbox = asyncio.Queue()
+            self._ready = asyncio.Event()
+            self.agent = self._build_agent(asyncio.get_running_loop())
+            self._run_task = asyncio.create_task(self.agent.run_async())
+        await self._ready.wait()
+        return self
+
+    async def close(self) -> None:
+        for pending in list(self._pending.values()):
+            self._fail(pending, WorkflowError("Client closed"))
+        if self._run_task is not None:
+            self._run_task.cancel()
+            await asyncio.gather(self._run_task, return_exceptions=True)
+            self._run_task = None
+
+    async def _drain(self, ctx) -> None:
+        while True:
+            pending, text = await self._outbox.get()
+            pending.sent_at = time.perf_counter()
+            try:
+                await ctx.send(
+                    self.agent_address,
+                    self._ChatMessage(
+                        timestamp=datetime.utcnow(),
+                        msg_id=pending.msg_id,
+                        content=[self._TextContent(type="text", text=text)],
+                    ),
+                )
+            except Exception as e:
+                self._fail(pending, WorkflowError(f"Could not send request: {e}"))
+
+    def submit(self, query: Dict[str, Any]) -> asyncio.Future:
+        """
+        Queue a workflow request and return a future for its result dict.
+        The future fails with WorkflowError if the agent reports an error.
+        Replies are matched by thread_id, so a thread_id that is already in
+        flight raises ValueError.
+        """
+        if self._outbox is None:
+            raise RuntimeError("Call start() before submitting requests")
+        query = {**query, "thread_id": str(query.get("thread_id") or uuid4())}
+        if query["thread_id"] in self._pending:
+            raise ValueError(
+                f"A request for thread {query['thread_id']} is already in flight"
+            )
+        pending = PendingRequest(
+            thread_id=query["thread_id"],
+            msg_id=str(uuid4()),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._pending[pending.thread_id] = pending
+        self._by_msg_id[pending.msg_id] = pending
+        text = f"I want to run a VC outreach workflow with this data: {to_wire(query)}"
+        self._outbox.put_nowait((pending, text))
+        return pending.future
+
+    async def request(
+        self, query: Dict[str, Any], timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        query = {**query, "thread_id": str(query.get("thread_id") or uuid4())}
+        future = self.submit(query)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._forget(self._pending.get(query["thread_id"]))
+            raise
+
+    async def submit_job(
+        self, query: Dict[str, Any], timeout: Optional[float] = 60.0
+    ) -> Dict[str, Any]:
+        """
+        Start a workflow run as a job on the agent and return the job
+        (job_id, thread_id, status) without waiting for the run.
+        """
+        reply = await self.request({**query, "action": "submit"}, timeout)
+        return reply["job"]
+
+    async def job_status(
+        self,
+        job_id: str,
+        wait: float = 0.0,
+        since: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Status and per-node progress of a job. With `wait` the agent holds the
+        reply until the job changes after `since` (a previous updated_at) or
+        finishes, for at most `wait` seconds.
+        """
+        query = {"action": "status", "job_id": job_id, "wait": wait, "since": since}
+        reply = await self.request(query, timeout or wait + 60.0)
+        return reply["job"]
+
+    async def job_result(
+        self, job_id: str, timeout: Optional[float] = 60.0
+    ) -> Dict[str, Any]:
+        reply = await self.request({"action": "result", "job_id": job_id}, timeout)
+        return reply["job"]
+
+    async def watch_job(self, job_id: str, wait: float = 30.0):
+        """
+        Yield the job's status on every change until it finishes.
+        """
+        since = None
+        while True:
+            job = await self.job_status(job_id, wait=wait, since=since)
+            yield job
+            if job["status"] in ("done", "failed"):
+                return
+            since = job["updated_at"]
+
+    async def wait_for_job(self, job_id: str, wait: float = 30.0) -> Dict[str, Any]:
+        """
+        Long-poll a job until it finishes and return its result. Raises
+        WorkflowError if the job failed.
+        """
+        async for job in self.watch_job(job_id, wait):
+            pass
+        if job["status"] == "failed":
+            raise WorkflowError(job.get("error") or "Job failed")
+        return (await self.job_result(job_id))["result"]
+
+    def _forget(self, pending: Optional[PendingRequest]) -> None:
+        if pending is not None:
+            self._pending.pop(pending.thread_id, None)
+            self._by_msg_id.pop(pending.msg_id, None)
+
+    def _fail(self, pending: PendingRequest, error: Exception) -> None:
+        self._forget(pending)
+        if not pending.future.done():
+            pending.future.set_exception(error)
+
+    def _resolve(self, text: str) -> None:
+        try:
+            response = from_wire(text)
+        except ValueError:
+            response = None
+        thread_id = response.get("thread_id") if isinstance(response, dict) else None
+        pending = self._pending.get(thread_id) if thread_id else None
+        if pending is None:
+            # Handing it to some other request would fail that one with a
+            # stranger's error; the request it belongs to times out instead
+            logger.warning("Dropping reply that matches no request: %s", text)
+            return
+        if response.get("error"):
+            self._fail(pending, WorkflowError(response["error"]))
+            return
+        self._forget(pending)
+        if not pending.future.done():
+            pending.future.set_result(response)
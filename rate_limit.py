@@ -0,0 +1,326 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from pydantic_ai.messages import ModelMessagesTypeAdapter
+from pydantic_ai.models.wrapper import WrapperModel
+
+import log
+import metrics
+from deadline import with_deadline
+
+logger = log.get_logger(__name__)
+
+POLL_INTERVAL = 0.01
+# Model requests throttled with a 429/5xx are retried here, after the
+# limiter has backed off, rather than inside the provider SDK where the
+# limiter would never see the throttling
+THROTTLE_RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", "2"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_SECONDS", "1"))
+_THROTTLE_STATUS = re.compile(r"\b(429|5\d\d)\b")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. reserve() always succeeds and returns how long
+    the caller has to wait, so waiters are served in reservation order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, amount: float) -> None:
+        # Settle a reservation once the real cost is known (negative refunds)
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: grows by `increase / limit` on every success and
+    is multiplied by `decrease` on a 429/5xx (at most once per `cooldown`).
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        minimum: float = 1,
+        maximum: float = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < max(1, int(self.limit)):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= max(1, int(self.limit)):
+                self._cond.wait(POLL_INTERVAL * 10)
+            self.in_flight += 1
+
+    def release(self, outcome: str) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "throttled":
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+            elif outcome == "ok":
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+
+@dataclass
+class Reservation:
+    tokens: float = 0
+    used_tokens: Optional[float] = None
+
+
+def classify_error(error: BaseException) -> str:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        match = _THROTTLE_STATUS.search(str(error))
+        status = int(match.group(1)) if match else None
+    if status is not None and (status == 429 or status >= 500):
+        return "throttled"
+    return "error"
+
+
+class ProviderLimiter:
+    """
+    Request and token buckets plus adaptive concurrency for one provider,
+    usable from both async code and sync tools running in threads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: float = 16,
+        min_concurrency: float = 1,
+    ):
+        self.name = name
+        # Small request burst so a shared limit is spread evenly over time
+        self.requests = (
+            TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 600))
+            if requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute / 60, tokens_per_minute / 60 * 5)
+            if tokens_per_minute
+            else None
+        )
+        self.concurrency = AdaptiveConcurrency(
+            initial=max_concurrency, minimum=min_concurrency, maximum=max_concurrency
+        )
+
+    def _reserve(self, tokens: float) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    async def acquire(self, tokens: float = 0) -> None:
+        start = time.perf_counter()
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        while not self.concurrency.try_acquire():
+            await asyncio.sleep(POLL_INTERVAL)
+        metrics.observe(
+            f"rate_limit.{self.name}.wait_seconds", time.perf_counter() - start
+        )
+
+    def acquire_sync(self, tokens: float = 0) -> None:
+        start = time.perf_counter()
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        self.concurrency.acquire()
+        metrics.observe(
+            f"rate_limit.{self.name}.wait_seconds", time.perf_counter() - start
+        )
+
+    def release(self, outcome: str, reservation: Reservation) -> None:
+        if self.tokens is not None and reservation.used_tokens is not None:
+            self.tokens.adjust(reservation.used_tokens - reservation.tokens)
+        self.concurrency.release(outcome)
+        metrics.incr(f"rate_limit.{self.name}.{outcome}")
+        if outcome == "throttled":
+            logger.warning(
+                "%s throttled, concurrency limit now %.1f",
+                self.name,
+                self.concurrency.limit,
+            )
+
+    @asynccontextmanager
+    async def slot(self, tokens: float = 0):
+        reservation = Reservation(tokens=tokens)
+        await self.acquire(tokens)
+        outcome = "ok"
+        try:
+            yield reservation
+        except BaseException as e:
+            outcome = classify_error(e)
+            raise
+        finally:
+            self.release(outcome, reservation)
+
+    @contextmanager
+    def slot_sync(self, tokens: float = 0):
+        reservation = Reservation(tokens=tokens)
+        self.acquire_sync(tokens)
+        outcome = "ok"
+        try:
+            yield reservation
+        except BaseException as e:
+            outcome = classify_error(e)
+            raise
+        finally:
+            self.release(outcome, reservation)
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+DEFAULT_MAX_CONCURRENCY = {"openai": 16, "firecrawl": 4}
+# A model on any other host (a proxy, a self-hosted OpenAI-compatible
+# server, ...) gets a limiter of its own, so throttling on one endpoint
+# does not slow down another
+DEFAULT_HOSTS = {
+    "openai": "api.openai.com",
+    "anthropic": "api.anthropic.com",
+    "groq": "api.groq.com",
+    "mistral": "api.mistral.ai",
+}
+
+
+def endpoint_name(provider: str, base_url: Optional[str] = None) -> str:
+    """
+    "provider" for the provider's own API, "provider@host" for other hosts.
+    """
+    host = urlparse(base_url).netloc if base_url else ""
+    if not host or host == DEFAULT_HOSTS.get(provider):
+        return provider
+    return f"{provider}@{host}"
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def get_limiter(provider: str, base_url: Optional[str] = None) -> ProviderLimiter:
+    """
+    Return the process-wide limiter for a provider endpoint (see
+    endpoint_name), configured from <PROVIDER>_RPM, <PROVIDER>_TPM and
+    <PROVIDER>_MAX_CONCURRENCY.
+    """
+    name = endpoint_name(provider, base_url)
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            prefix = provider.upper()
+            limiter = _limiters[name] = ProviderLimiter(
+                name,
+                requests_per_minute=_env_float(f"{prefix}_RPM"),
+                tokens_per_minute=_env_float(f"{prefix}_TPM"),
+                max_concurrency=_env_float(f"{prefix}_MAX_CONCURRENCY")
+                or DEFAULT_MAX_CONCURRENCY.get(provider, 8),
+            )
+        return limiter
+
+
+def estimate_tokens(messages) -> int:
+    # Roughly 4 characters per token; settled against real usage afterwards
+    return len(ModelMessagesTypeAdapter.dump_json(messages)) // 4
+
+
+class RateLimitedModel(WrapperModel):
+    """
+    Model wrapper that routes every request through the shared limiter of
+    the model's provider endpoint, retrying throttled requests up to
+    `retries` times with exponential backoff. The wrapped model's SDK
+    should not retry itself (max_retries=0).
+    """
+
+    def __init__(
+        self,
+        wrapped,
+        limiter: Optional[ProviderLimiter] = None,
+        retries: int = THROTTLE_RETRIES,
+    ):
+        super().__init__(wrapped)
+        self.limiter = limiter or get_limiter(self.wrapped.system, self.base_url)
+        self.retries = retries
+
+    @property
+    def base_url(self) -> Optional[str]:
+        # WrapperModel does not forward it
+        return self.wrapped.base_url
+
+    async def request(self, messages, model_settings, model_request_parameters):
+        # Waiting for a slot counts against the request deadline too
+        return await with_deadline(
+            self._request(messages, model_settings, model_request_parameters),
+            f"{self.model_name} request",
+        )
+
+    async def _request(self, messages, model_settings, model_request_parameters):
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.limiter.slot(
+                    tokens=estimate_tokens(messages)
+                ) as reservation:
+                    response, usage = await self.wrapped.request(
+                        messages, model_settings, model_request_parameters
+                    )
+                    reservation.used_tokens = usage.total_tokens
+                    return response, usage
+            except Exception as e:
+                if attempt == self.retries or classify_error(e) != "throttled":
+                    raise
+                metrics.incr(f"rate_limit.{self.limiter.name}.retries")
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2**attempt)
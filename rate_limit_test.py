@@ -0,0 +1,89 @@
+import asyncio
+
+import orjson
+from pydantic_ai import Agent
+
+import metrics
+import rate_limit
+from openai_model import get_openai_model
+
+COMPLETION = orjson.dumps(
+    {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-stub",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": "ok"},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+    }
+)
+
+
+async def start_stub_server(throttled: int):
+    """
+    An OpenAI-compatible server that answers the first `throttled`
+    requests with 429 and the rest with a completion.
+    """
+    requests = []
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                requests.append(head)
+                if len(requests) <= throttled:
+                    status, body = b"429 Too Many Requests", b'{"error": {}}'
+                else:
+                    status, body = b"200 OK", COMPLETION
+                writer.write(
+                    b"HTTP/1.1 " + status + b"\r\nContent-Type: application/json"
+                    b"\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n"
+                    b"" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/v1", requests
+
+
+def test_throttled_requests_back_off_in_the_limiter(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RETRY_BACKOFF_SECONDS", 0.01)
+    metrics.reset()
+
+    async def run():
+        server, base_url, requests = await start_stub_server(throttled=1)
+        async with server:
+            model = get_openai_model(
+                "gpt-stub", api_key="test", base_url=base_url, hedge_models=""
+            )
+            result = await Agent(model).run("hi")
+        return model, result, requests
+
+    model, result, requests = asyncio.run(run())
+
+    assert result.data == "ok"
+    # One 429 and the retry: the SDK did not retry on its own, the limiter
+    # saw the 429 and cut its concurrency limit
+    assert len(requests) == 2
+    counters = metrics.snapshot()["counters"]
+    assert counters[f"rate_limit.{model.limiter.name}.throttled"] == 1
+    assert counters[f"rate_limit.{model.limiter.name}.retries"] == 1
+    assert (
+        model.limiter.concurrency.limit < rate_limit.DEFAULT_MAX_CONCURRENCY["openai"]
+    )
@@ -0,0 +1,143 @@
+import uuid
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Dict, Tuple, Type
+
+import orjson
+import ormsgpack
+
+from blob_store import BlobRef
+from models import DrafterDeps, Founder, ResearchContext, Startup, VCPartner
+
+# msgpack extension codes for the domain models. Codes are part of the
+# checkpoint format: never reuse or renumber them, only append.
+MODEL_EXT_CODES: Dict[Type, int] = {
+    Founder: 1,
+    Startup: 2,
+    VCPartner: 3,
+    DrafterDeps: 4,
+    ResearchContext: 5,
+    BlobRef: 6,
+}
+_MODELS_BY_CODE: Dict[int, Type] = {code: cls for cls, code in MODEL_EXT_CODES.items()}
+# Builtin types ormsgpack would flatten (tuples to lists, datetimes and
+# UUIDs to strings) get codes of their own after the models' codes
+TUPLE_EXT_CODE = 7
+DATETIME_EXT_CODE = 8
+UUID_EXT_CODE = 9
+_BUILTIN_EXT_CODES = (TUPLE_EXT_CODE, DATETIME_EXT_CODE, UUID_EXT_CODE)
+
+# Fields of domain models are packed positionally and rebuilt by _ext_hook,
+# which turns lists back into tuples
+_FIELD_OPTIONS = (
+    ormsgpack.OPT_PASSTHROUGH_DATACLASS
+    | ormsgpack.OPT_NON_STR_KEYS
+    | ormsgpack.OPT_PASSTHROUGH_DATETIME
+    | ormsgpack.OPT_PASSTHROUGH_UUID
+    | ormsgpack.OPT_PASSTHROUGH_ENUM
+)
+# Passed-through values reach _default; it raises for anything without a
+# code (enums, messages, ...) so the value goes to the JsonPlusSerializer
+# fallback, which keeps their types
+_PACK_OPTIONS = _FIELD_OPTIONS | ormsgpack.OPT_PASSTHROUGH_TUPLE
+
+
+def register_model(cls: Type, code: int) -> Type:
+    if code in _BUILTIN_EXT_CODES:
+        raise ValueError(f"Extension code {code} is reserved for builtin types")
+    if code in _MODELS_BY_CODE and _MODELS_BY_CODE[code] is not cls:
+        raise ValueError(
+            f"Extension code {code} is already used by {_MODELS_BY_CODE[code]}"
+        )
+    MODEL_EXT_CODES[cls] = code
+    _MODELS_BY_CODE[code] = cls
+    return cls
+
+
+def _default(obj: Any) -> Any:
+    if type(obj) is tuple:
+        return ormsgpack.Ext(
+            TUPLE_EXT_CODE,
+            ormsgpack.packb(list(obj), default=_default, option=_PACK_OPTIONS),
+        )
+    if type(obj) is datetime:
+        return ormsgpack.Ext(DATETIME_EXT_CODE, obj.isoformat().encode())
+    if type(obj) is uuid.UUID:
+        return ormsgpack.Ext(UUID_EXT_CODE, obj.bytes)
+    code = MODEL_EXT_CODES.get(type(obj))
+    if code is None:
+        raise TypeError(f"Type is not msgpack serializable: {type(obj).__name__}")
+    # Fields are packed positionally, so field names are not repeated per object
+    values = [getattr(obj, f.name) for f in fields(obj)]
+    return ormsgpack.Ext(
+        code, ormsgpack.packb(values, default=_default, option=_FIELD_OPTIONS)
+    )
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == TUPLE_EXT_CODE:
+        return tuple(ormsgpack.unpackb(data, ext_hook=_ext_hook))
+    if code == DATETIME_EXT_CODE:
+        return datetime.fromisoformat(data.decode())
+    if code == UUID_EXT_CODE:
+        return uuid.UUID(bytes=data)
+    cls = _MODELS_BY_CODE.get(code)
+    if cls is None:
+        raise ValueError(f"Unknown extension code: {code}")
+    values = ormsgpack.unpackb(data, ext_hook=_ext_hook)
+    return cls(*(tuple(v) if isinstance(v, list) else v for v in values))
+
+
+def pack(obj: Any) -> bytes:
+    return ormsgpack.packb(obj, default=_default, option=_PACK_OPTIONS)
+
+
+def unpack(data: bytes) -> Any:
+    return ormsgpack.unpackb(data, ext_hook=_ext_hook)
+
+
+def to_wire(obj: Any) -> str:
+    """
+    Encode a request or response for the fetch_agent/fetch_client chat protocol.
+    Domain models are encoded as plain JSON objects.
+    """
+    return orjson.dumps(obj).decode("utf-8")
+
+
+def from_wire(text: str) -> Any:
+    return orjson.loads(text)
+
+
+class CheckpointSerializer:
+    """
+    LangGraph checkpoint serializer that packs domain models with msgpack
+    extension types and falls back to LangGraph's own serializer for
+    everything else (messages, interrupts, enums, ...). Tuples, datetimes and
+    UUIDs have extension codes of their own, so every value loads back with
+    its type.
+    """
+
+    TYPE = "msgpack-models"
+
+    def __init__(self):
+        from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+        self.fallback = JsonPlusSerializer()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.fallback.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.fallback.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        try:
+            return self.TYPE, pack(obj)
+        except (TypeError, ValueError):
+            return self.fallback.dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == self.TYPE:
+            return unpack(payload)
+        return self.fallback.loads_typed(data)
@@ -0,0 +1,71 @@
+import enum
+import uuid
+from datetime import datetime, timezone
+
+from blob_store import BlobRef
+from models import Founder, Startup, VCPartner
+from serialization import CheckpointSerializer, pack, unpack
+
+
+class Stage(enum.Enum):
+    SEED = "seed"
+
+
+STARTUP = Startup(
+    vision="Early detection from a drop of blood",
+    company_name="MediScan AI",
+    founders=(Founder("Alex Johnson", "ML PhD"), Founder("Sam Lee", "Pathologist")),
+    product_description="Blood testing platform",
+)
+PARTNER = VCPartner(
+    name="Jake Bauer",
+    fund_name="ARCH Venture Partners",
+    fund_website="https://www.archventure.com",
+    linkedin_url="",
+)
+
+
+def round_trip(value):
+    serializer = CheckpointSerializer()
+    return serializer.loads_typed(serializer.dumps_typed(value))
+
+
+def test_domain_models_use_msgpack_extensions():
+    state = {
+        "startup": STARTUP,
+        "vc_partner": PARTNER,
+        "generated_intro": BlobRef(key="ab" * 32, size=120),
+        "mutual_connections": [{"name": "Dr. David Schenkein"}],
+    }
+    type_, _ = CheckpointSerializer().dumps_typed(state)
+    assert type_ == CheckpointSerializer.TYPE
+    assert round_trip(state) == state
+    assert unpack(pack(STARTUP)).founders == STARTUP.founders
+
+
+def test_tuple_datetime_and_uuid_keep_their_types():
+    state = {
+        "pair": (1, ("nested", 2)),
+        "at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "naive": datetime(2025, 1, 2, 3, 4, 5, 678),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "startup": STARTUP,
+    }
+    type_, _ = CheckpointSerializer().dumps_typed(state)
+    assert type_ == CheckpointSerializer.TYPE
+    loaded = round_trip(state)
+    assert loaded == state
+    assert isinstance(loaded["pair"], tuple)
+    assert isinstance(loaded["pair"][1], tuple)
+    assert loaded["at"].tzinfo == timezone.utc
+    assert isinstance(loaded["id"], uuid.UUID)
+    assert loaded["startup"].founders == STARTUP.founders
+
+
+def test_enums_go_through_the_fallback():
+    state = {"stage": Stage.SEED, "at": datetime(2025, 1, 2), "pair": (1, 2)}
+    type_, _ = CheckpointSerializer().dumps_typed(state)
+    assert type_ != CheckpointSerializer.TYPE
+    loaded = round_trip(state)
+    assert loaded["stage"] is Stage.SEED
+    assert isinstance(loaded["at"], datetime)
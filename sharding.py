@@ -0,0 +1,341 @@
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import log
+import metrics
+
+logger = log.get_logger(__name__)
+
+# How often a shard's reader checks that its worker process is still alive
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "1"))
+# A worker that dies sooner than this after starting is restarted only after
+# this long, so one that crashes on startup does not spin
+WORKER_RESTART_SECONDS = 5.0
+
+# A runner factory is called once inside every worker process and returns an
+# async callable ``run(state, thread_id) -> dict``. It must be importable from
+# a module (not a lambda or closure) so it can be handed to spawned workers.
+RunnerFactory = Callable[..., Callable[[Any, str], Awaitable[Dict[str, Any]]]]
+
+
+def default_runner_factory(model_name: Optional[str] = None):
+    from workflow import make_workflow_runner
+
+    return make_workflow_runner(model_name=model_name)
+
+
+def shard_for(thread_id: str, num_shards: int) -> int:
+    # crc32 is stable across processes, unlike the salted built-in hash()
+    return zlib.crc32(thread_id.encode("utf-8")) % num_shards
+
+
+async def _run_job(
+    runner, job_id: str, state, thread_id: str, progress: bool, responses
+) -> None:
+    try:
+        if progress:
+            # (job_id, None, node) messages report progress before the result
+            result = await runner(
+                state,
+                thread_id,
+                on_node=lambda node: responses.put((job_id, None, node)),
+            )
+        else:
+            result = await runner(state, thread_id)
+        responses.put((job_id, True, result))
+    except Exception as e:
+        responses.put((job_id, False, f"{type(e).__name__}: {e}"))
+
+
+async def _run_diagnostics(job_id: str, command: Dict[str, Any], responses) -> None:
+    import diagnostics
+
+    try:
+        responses.put((job_id, True, diagnostics.apply(command)))
+    except Exception as e:
+        responses.put((job_id, False, f"{type(e).__name__}: {e}"))
+
+
+async def _serve(runner, requests, responses) -> None:
+    import diagnostics
+
+    # Features enabled through DIAGNOSTICS run on the loop that serves runs
+    diagnostics.ensure_started()
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    while True:
+        item = await loop.run_in_executor(None, requests.get)
+        if item is None:
+            break
+        if isinstance(item, dict):
+            # {"job_id", "diagnostics": command}, see ShardedWorkflowPool.diagnostics
+            job = _run_diagnostics(item["job_id"], item["diagnostics"], responses)
+        else:
+            job_id, state, thread_id, progress = item
+            job = _run_job(runner, job_id, state, thread_id, progress, responses)
+        task = asyncio.create_task(job)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _worker_main(
+    shard_id: int,
+    factory: RunnerFactory,
+    factory_kwargs: Dict[str, Any],
+    requests,
+    responses,
+) -> None:
+    # Everything created here (compiled graph, agents, HTTP clients, browser
+    # sessions) belongs to this process and its event loop only.
+    log.configure_tracing()
+    import diagnostics
+
+    # kill -USR1 <worker pid> dumps this shard's report
+    diagnostics.install_signal_handler()
+    runner = factory(**factory_kwargs)
+    logger.info("Shard %s ready", shard_id)
+    asyncio.run(_serve(runner, requests, responses))
+    logger.info("Shard %s stopped", shard_id)
+
+
+class ShardedWorkflowPool:
+    """
+    Dispatches workflow runs to a fixed set of worker processes.
+
+    Runs are routed by thread_id, so every run (and resume) of a given thread
+    lands on the same worker and therefore on the same checkpointer.
+    Each worker runs many jobs concurrently on its own event loop. A worker
+    that dies (OOM, segfault, kill) fails the runs it had and is restarted
+    with empty checkpoints.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        factory: RunnerFactory = default_runner_factory,
+        factory_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.num_workers = num_workers
+        self.factory = factory
+        self.factory_kwargs = factory_kwargs or {}
+        self._ctx = mp.get_context("spawn")
+        self._processes: List[mp.Process] = []
+        self._requests: List[Any] = []
+        self._responses: List[Any] = []
+        self._readers: List[threading.Thread] = []
+        # job_id -> (loop, future, shard)
+        self._pending: Dict[
+            str, Tuple[asyncio.AbstractEventLoop, asyncio.Future, int]
+        ] = {}
+        self._on_node: Dict[str, Callable[[str], None]] = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self._closing = False
+
+    def _spawn(self, shard_id: int) -> Tuple[mp.Process, Any, Any]:
+        requests = self._ctx.Queue()
+        responses = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(shard_id, self.factory, self.factory_kwargs, requests, responses),
+            name=f"workflow-shard-{shard_id}",
+            daemon=True,
+        )
+        process.start()
+        return process, requests, responses
+
+    def _start_reader(self, shard_id: int) -> threading.Thread:
+        reader = threading.Thread(
+            target=self._read_responses,
+            args=(shard_id, self._processes[shard_id], self._responses[shard_id]),
+            name=f"workflow-shard-{shard_id}-reader",
+            daemon=True,
+        )
+        reader.start()
+        return reader
+
+    def start(self) -> "ShardedWorkflowPool":
+        if self._started:
+            return self
+        self._closing = False
+        for shard_id in range(self.num_workers):
+            process, requests, responses = self._spawn(shard_id)
+            self._processes.append(process)
+            self._requests.append(requests)
+            self._responses.append(responses)
+            self._readers.append(self._start_reader(shard_id))
+        self._started = True
+        logger.info("Started %s workflow shards", self.num_workers)
+        return self
+
+    def _read_responses(self, shard_id: int, process: mp.Process, responses) -> None:
+        started = time.monotonic()
+        while True:
+            try:
+                item = responses.get(timeout=WORKER_POLL_SECONDS)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                # Collect what the worker sent before it died, then give up
+                # on the rest of its runs
+                try:
+                    while True:
+                        item = responses.get_nowait()
+                        if item is not None:
+                            self._dispatch(item)
+                except queue.Empty:
+                    pass
+                if not self._closing:
+                    self._restart(shard_id, process, time.monotonic() - started)
+                break
+            if item is None:
+                break
+            self._dispatch(item)
+
+    def _dispatch(self, item: Tuple[str, Optional[bool], Any]) -> None:
+        job_id, ok, payload = item
+        with self._lock:
+            if ok is None:
+                on_node = self._on_node.get(job_id)
+                loop, future, _ = self._pending.get(job_id, (None, None, None))
+            else:
+                on_node = self._on_node.pop(job_id, None)
+                loop, future, _ = self._pending.pop(job_id, (None, None, None))
+        if future is None:
+            return
+        if ok is None:
+            if on_node is not None:
+                loop.call_soon_threadsafe(on_node, payload)
+            return
+        loop.call_soon_threadsafe(self._resolve, future, ok, payload)
+
+    def _restart(self, shard_id: int, process: mp.Process, uptime: float) -> None:
+        error = f"Workflow shard {shard_id} exited with code {process.exitcode}"
+        logger.error("%s after %.1fs, restarting it", error, uptime)
+        metrics.incr("sharding.worker_restarts")
+        if uptime < WORKER_RESTART_SECONDS:
+            time.sleep(WORKER_RESTART_SECONDS)
+        spawned = self._spawn(shard_id)
+        # Runs submitted from here on go to the new worker, all earlier ones
+        # of this shard are failed
+        with self._lock:
+            if self._closing:
+                spawned[0].terminate()
+                return
+            lost = [
+                (job_id, loop, future)
+                for job_id, (loop, future, shard) in self._pending.items()
+                if shard == shard_id
+            ]
+            for job_id, _, _ in lost:
+                del self._pending[job_id]
+                self._on_node.pop(job_id, None)
+            (
+                self._processes[shard_id],
+                self._requests[shard_id],
+                self._responses[shard_id],
+            ) = spawned
+            self._readers[shard_id] = self._start_reader(shard_id)
+        for _, loop, future in lost:
+            loop.call_soon_threadsafe(self._resolve, future, False, error)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, ok: bool, payload: Any) -> None:
+        if future.done():
+            return
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    async def _call(
+        self,
+        shard: int,
+        make_item: Callable[[str], Any],
+        on_node: Optional[Callable[[str], None]] = None,
+    ) -> Any:
+        if not self._started:
+            self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._pending[job_id] = (loop, future, shard)
+            if on_node is not None:
+                self._on_node[job_id] = on_node
+            self._requests[shard].put(make_item(job_id))
+        return await future
+
+    async def run(
+        self,
+        state,
+        thread_id: str,
+        on_node: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        return await self._call(
+            shard_for(thread_id, self.num_workers),
+            lambda job_id: (job_id, state, thread_id, on_node is not None),
+            on_node,
+        )
+
+    async def diagnostics(self, command: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Run a diagnostics.apply command in every worker and return each
+        shard's report, or its error.
+        """
+        if not self._started:
+            self.start()
+        results = await asyncio.gather(
+            *(
+                self._call(
+                    shard, lambda job_id: {"job_id": job_id, "diagnostics": command}
+                )
+                for shard in range(self.num_workers)
+            ),
+            return_exceptions=True,
+        )
+        return [
+            (
+                {"shard": shard, **result}
+                if isinstance(result, dict)
+                else {"shard": shard, "error": str(result)}
+            )
+            for shard, result in enumerate(results)
+        ]
+
+    def close(self, timeout: float = 10.0) -> None:
+        if not self._started:
+            return
+        with self._lock:
+            self._closing = True
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for responses in self._responses:
+            responses.put(None)
+        for reader in self._readers:
+            reader.join(timeout)
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._on_node.clear()
+        for loop, future, _ in pending:
+            loop.call_soon_threadsafe(
+                self._resolve, future, False, "Workflow pool closed"
+            )
+        self._processes, self._requests, self._responses, self._readers = [], [], [], []
+        self._started = False
@@ -0,0 +1,41 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+import sharding
+from sharding import ShardedWorkflowPool
+
+
+def make_crashing_runner():
+    async def run(state, thread_id, on_node=None):
+        if state == "crash":
+            os._exit(3)
+        return {"pid": os.getpid(), "thread_id": thread_id}
+
+    return run
+
+
+def test_crashed_worker_fails_its_runs_and_is_restarted(monkeypatch):
+    monkeypatch.setattr(sharding, "WORKER_POLL_SECONDS", 0.1)
+    monkeypatch.setattr(sharding, "WORKER_RESTART_SECONDS", 0)
+    pool = ShardedWorkflowPool(1, factory=make_crashing_runner).start()
+
+    async def run():
+        first = await pool.run("ok", "t1")
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="exited with code 3"):
+            await asyncio.wait_for(pool.run("crash", "t2"), 30)
+        failed_after = time.monotonic() - start
+        second = await asyncio.wait_for(pool.run("ok", "t3"), 30)
+        return first, second, failed_after
+
+    try:
+        first, second, failed_after = asyncio.run(run())
+    finally:
+        pool.close()
+
+    assert failed_after < 10
+    assert second["thread_id"] == "t3"
+    assert second["pid"] != first["pid"]
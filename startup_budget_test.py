@@ -0,0 +1,25 @@
+import json
+import statistics
+
+import pytest
+
+from benchmarks.startup_budget import BUDGET_PATH, loaded_forbidden, measure
+
+with open(BUDGET_PATH) as f:
+    BUDGET = json.load(f)
+
+
+@pytest.mark.parametrize("module", sorted(BUDGET["modules"]))
+def test_import_stays_within_budget(module):
+    # Median of fresh interpreters, as benchmarks/startup_budget.py measures
+    samples, modules = [], []
+    for _ in range(3):
+        cumulative, modules = measure(module)
+        samples.append(cumulative)
+    took = statistics.median(samples)
+
+    assert took <= BUDGET["modules"][module], (
+        f"import {module} took {took / 1000:.1f} ms, "
+        f"budget {BUDGET['modules'][module] / 1000:.1f} ms"
+    )
+    assert loaded_forbidden(modules, BUDGET["forbidden"]) == []
@@ -1,107 +1,657 @@
-from typing import TypedDict, Annotated, List
+from typing import TypedDict, Annotated, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
+import importlib
+import logging
+import operator
+import time
+import uuid
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
-from dataclasses import dataclass
-import logging
-
-from agent_drafter.agent import (
-    make_agent_email_drafter,
-    DrafterDeps,
-    Founder,
-    Startup,
-    VCPartner,
+import blob_store
+import diagnostics
+import log
+from blob_store import BlobRef
+import metrics
+import node_memo
+from deadline import (
+    DeadlineExceeded,
+    StepTimeout,
+    deadline_from_seconds,
+    deadline_scope,
+    expired,
+    with_deadline,
 )
-from agent_email_finder.agent import make_agent_email_finder, EmailFinderDeps
-from agent_intro_generator.agent import make_agent_intro_generator, IntroGeneratorDeps
-from agent_introducer_finder.agent import (
-    make_agent_introducer_finder,
-    IntroducerFinderDeps,
+from model_routing import (
+    DEFAULT_PROFILE,
+    FALLBACK_MODEL,
+    get_model,
+    model_name_for,
+    validate_profile,
 )
+from models import DrafterDeps, Founder, ResearchContext, Startup, VCPartner
+from serialization import CheckpointSerializer
+
+logger = log.get_logger(__name__)
+
+
+def append(current: list, update: list) -> list:
+    # LangGraph saves checkpoints in the background from a shallow copy of
+    # the channel values, so the list cannot be extended in place; it is
+    # only copied when there is something to append
+    if not update:
+        return current
+    return current + list(update)
+
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+def merge(current: dict, update: dict) -> dict:
+    if not update:
+        return current
+    return {**current, **update}
 
 
 class VCOutreachWorkflowState(TypedDict):
-    messages: Annotated[List[bytes], lambda x, y: x + y]
+    messages: Annotated[List[bytes], append]
     startup: Startup
     vc_partner: VCPartner
     founder_email: str
     founder_password: str
     mutual_connections: List[dict]
     selected_mutual_connection: dict
+    # Mutual connections from best to worst introducer, with their scores
+    introducer_ranking: List[dict]
     found_email: str
-    generated_intro: str
-    cold_email: str
-
-
-def get_vc_outreach_workflow(model_name="o3-mini"):
-    agent_email_finder = make_agent_email_finder(model_name=model_name)
-    agent_intro_generator = make_agent_intro_generator(model_name=model_name)
-    agent_email_drafter = make_agent_email_drafter(model_name=model_name)
-    agent_introducer_finder = make_agent_introducer_finder(model_name=model_name)
+    # Why found_email may be wrong or is missing, e.g. an address off the
+    # fund's domain or a lookup whose answers never passed validation
+    email_warning: str
+    # Large texts and research findings are kept in the blob store and held
+    # in the state as BlobRefs, see blob_store.deref
+    generated_intro: Union[str, BlobRef]
+    # One {"name", "linkedin_url", "intro"} per introducer, best first; the
+    # first intro is also generated_intro
+    generated_intros: Union[List[dict], BlobRef]
+    # How many of the best-ranked connections get an intro
+    intro_count: int
+    cold_email: Union[str, BlobRef]
+    outputs: List[str]
+    skipped_nodes: Annotated[List[dict], append]
+    completed_nodes: Annotated[List[str], append]
+    # Nodes skipped because their output was not requested or their inputs
+    # were missing, i.e. LLM calls the request did not need
+    llm_calls_avoided: int
+    # Nodes skipped or cancelled because the deadline ran out
+    deadline_skipped: int
+    deadline_at: Optional[float]
+    deadline_exceeded: bool
+    research_context: Annotated[Dict[str, BlobRef], merge]
+    research_calls: Annotated[int, operator.add]
+    research_reused: Annotated[int, operator.add]
+    model_profile: Optional[str]
+    routing: Annotated[List[dict], append]
+    # "cprofile" or "pyinstrument" to profile this run, see diagnostics.py
+    profile: Optional[str]
+    # One {"node", "hit", "key"} per memoized node run, see NODE_INPUTS
+    node_cache: Annotated[List[dict], append]
+    # Ignore memoized node outputs and run every node again
+    recompute: bool
+
+
+# Results a caller can ask for; an empty selection means all of them
+OUTPUTS = ("email", "intro", "cold_email", "connections")
+
+# Agent nodes in execution order, each one costs at least one LLM call
+AGENT_NODES = [
+    "node_introducer_finder",
+    "node_email_finder",
+    "node_intro_generator",
+    "node_email_drafter",
+]
+
+# Agent name of each node, used to pick its model from the request's profile
+NODE_AGENTS = {
+    "node_introducer_finder": "introducer_finder",
+    "node_email_finder": "email_finder",
+    "node_intro_generator": "intro_generator",
+    "node_email_drafter": "email_drafter",
+}
+
+# State fields each node reads (dotted paths for single attributes). A
+# node's output is memoized on a hash of these, so a re-run recomputes only
+# the nodes whose inputs changed. The introducer ranking reads the startup
+# too but is cheap, so it is redone after every scrape, memoized or not.
+NODE_INPUTS = {
+    "node_introducer_finder": (
+        "vc_partner.linkedin_url",
+        "founder_email",
+        "founder_password",
+        "mutual_connections",
+        "model_profile",
+    ),
+    "node_email_finder": ("vc_partner", "research_context", "model_profile"),
+    "node_intro_generator": (
+        "startup",
+        "vc_partner",
+        "mutual_connections",
+        "selected_mutual_connection",
+        "introducer_ranking",
+        "intro_count",
+        "research_context",
+        "model_profile",
+    ),
+    "node_email_drafter": (
+        "startup",
+        "vc_partner",
+        "research_context",
+        "model_profile",
+    ),
+}
+
+# Nodes whose output depends on LinkedIn or the web as well as their
+# inputs; their memoized outputs expire after NODE_MEMO_TTL_SECONDS
+NODE_MEMO_TTL = {
+    "node_introducer_finder": node_memo.NODE_MEMO_TTL_SECONDS,
+    "node_email_finder": node_memo.NODE_MEMO_TTL_SECONDS,
+}
+
+# Update fields that count the work of the run that produced an output;
+# they are not replayed with a memoized output
+MEMO_EXCLUDED_FIELDS = ("routing", "research_calls", "research_reused")
+
+# Most intros a request can ask for, see intro_count
+MAX_INTRO_COUNT = 10
+
+# Skip reasons for nodes that never started, or were cancelled mid-run,
+# because the request deadline ran out
+DEADLINE_EXCEEDED = "deadline exceeded"
+CANCELLED_AT_DEADLINE = "cancelled at deadline"
+DEADLINE_REASONS = (DEADLINE_EXCEEDED, CANCELLED_AT_DEADLINE)
+# Skip reason for a node cut short by a step's own timeout (e.g. a browser
+# step, MCP_STEP_TIMEOUT), which is not the request deadline
+STEP_TIMED_OUT = "step timed out"
+# Recorded by node_introducer_finder when it runs without scraping
+CONNECTIONS_KNOWN = "mutual connections already known"
+
+
+# Fields that accumulate through reducers; an empty update is a no-op
+ACCUMULATED_FIELDS = {
+    "messages",
+    "skipped_nodes",
+    "completed_nodes",
+    "research_context",
+    "research_calls",
+    "research_reused",
+    "routing",
+    "node_cache",
+}
+
+
+def delta(state: VCOutreachWorkflowState, update: dict) -> dict:
+    """
+    Drop the parts of a node's update that would not change the state, so
+    only real changes get a new channel version and are checkpointed.
+    """
+    return {
+        key: value
+        for key, value in update.items()
+        if (value if key in ACCUMULATED_FIELDS else state.get(key) != value)
+    }
+
+
+def requested_outputs(state: VCOutreachWorkflowState) -> set:
+    return set(state.get("outputs") or OUTPUTS)
+
+
+def skip_reason(node: str, state: VCOutreachWorkflowState) -> Optional[str]:
+    """
+    Return why a node should not run for this state, or None if it should.
+    """
+    outputs = requested_outputs(state)
+    if node == "node_introducer_finder":
+        if not outputs & {"connections", "intro"}:
+            return "connections not requested"
+        if state.get("mutual_connections"):
+            return None
+        if not state.get("founder_email") or not state.get("founder_password"):
+            return "missing LinkedIn credentials"
+        if not state["vc_partner"].linkedin_url:
+            return "missing VC LinkedIn URL"
+    elif node == "node_email_finder":
+        if "email" not in outputs:
+            return "email not requested"
+    elif node == "node_intro_generator":
+        if "intro" not in outputs:
+            return "intro not requested"
+        if not state.get("selected_mutual_connection"):
+            return "no mutual connection"
+    elif node == "node_email_drafter":
+        if "cold_email" not in outputs:
+            return "cold_email not requested"
+    if expired(state.get("deadline_at")):
+        return DEADLINE_EXCEEDED
+    return None
+
+
+def introducers(state: VCOutreachWorkflowState) -> List[dict]:
+    """
+    The connections to write intros from: the intro_count best-ranked ones,
+    starting with the selected mutual connection.
+    """
+    mutual_connections = state.get("mutual_connections") or []
+    ranked = [
+        mutual_connections[entry["position"]]
+        for entry in (state.get("introducer_ranking") or [])[
+            : state.get("intro_count") or 1
+        ]
+    ]
+    return ranked or [state["selected_mutual_connection"]]
+
+
+def route_after(node: Optional[str]) -> Tuple[Callable, List[str]]:
+    """
+    Build the conditional edge leaving `node` (None for START): go to the
+    next agent node that should run, or straight to node_finish.
+    """
+    later = AGENT_NODES[AGENT_NODES.index(node) + 1 :] if node else AGENT_NODES
+
+    def route(state: VCOutreachWorkflowState) -> str:
+        for candidate in later:
+            if skip_reason(candidate, state) is None:
+                return candidate
+        return "node_finish"
+
+    return route, later + ["node_finish"]
+
+
+def with_node_deadline(node: str, func: Callable) -> Callable:
+    """
+    Run a node under the request deadline stored in the state. A node that
+    runs out of time is cancelled and recorded as skipped so the workflow can
+    still finish with whatever the other nodes produced.
+    """
+
+    async def run(state: VCOutreachWorkflowState):
+        with log.span(f"workflow.{node}") as span, deadline_scope(
+            state.get("deadline_at")
+        ):
+            try:
+                update = await with_deadline(func(state), node)
+            except DeadlineExceeded as e:
+                logger.warning("%s cancelled: %s", node, e)
+                span.set_attribute("skipped", CANCELLED_AT_DEADLINE)
+                return {
+                    "skipped_nodes": [{"node": node, "reason": CANCELLED_AT_DEADLINE}]
+                }
+            except StepTimeout as e:
+                logger.warning("%s gave up: %s", node, e)
+                span.set_attribute("skipped", STEP_TIMED_OUT)
+                return {"skipped_nodes": [{"node": node, "reason": STEP_TIMED_OUT}]}
+        return delta(state, {**update, "completed_nodes": [node]})
+
+    return run
+
+
+def with_memo(
+    node: str,
+    func: Callable,
+    model_override: Optional[str] = None,
+    finish: Optional[Callable] = None,
+) -> Callable:
+    """
+    Serve a node's output from node_memo when the fields it reads
+    (NODE_INPUTS) and the model it is routed to are the same as in an
+    earlier run (within NODE_MEMO_TTL), and store it otherwise.
+    `finish(state, update)` runs after both hits and misses.
+    """
+    fields = NODE_INPUTS[node]
+    max_age = NODE_MEMO_TTL.get(node)
+
+    async def run(state: VCOutreachWorkflowState):
+        update = None
+        if node_memo.NODE_MEMO:
+            model = model_name_for(
+                state.get("model_profile"), NODE_AGENTS[node], model_override
+            )
+            key = node_memo.input_key(node, state, fields, model=model)
+            if not state.get("recompute"):
+                update = node_memo.load(key, max_age)
+            hit = update is not None
+            if hit:
+                logger.info("%s inputs unchanged, reusing its output", node)
+            else:
+                update = await func(state)
+                node_memo.store(
+                    key,
+                    {
+                        field: value
+                        for field, value in update.items()
+                        if field not in MEMO_EXCLUDED_FIELDS
+                    },
+                )
+            metrics.incr(f"node_memo.{node}.{'hits' if hit else 'misses'}")
+            update = {
+                **update,
+                "node_cache": [{"node": node, "hit": hit, "key": key[:12]}],
+            }
+        else:
+            update = await func(state)
+        return finish(state, update) if finish else update
+
+    return run
+
+
+def rank_introducers(state: VCOutreachWorkflowState, update: dict) -> dict:
+    from introducer_ranking import rank_connections
+
+    # Ask the connection most likely to make a strong intro
+    mutual_connections = update["mutual_connections"]
+    ranking = rank_connections(
+        mutual_connections, state["vc_partner"], state.get("startup")
+    )
+    if ranking:
+        logger.info(
+            "Selected %s as introducer (score %.3f)",
+            ranking[0]["name"],
+            ranking[0]["score"],
+        )
+    return {
+        **update,
+        "selected_mutual_connection": (
+            mutual_connections[ranking[0]["position"]] if ranking else None
+        ),
+        "introducer_ranking": ranking,
+    }
+
+
+def run_research(state: VCOutreachWorkflowState) -> ResearchContext:
+    return ResearchContext(
+        findings={
+            key: blob_store.deref(ref)
+            for key, ref in (state.get("research_context") or {}).items()
+        }
+    )
+
+
+def research_update(state: VCOutreachWorkflowState, research: ResearchContext) -> dict:
+    # Only findings that are new or changed in this node are written back
+    known = state.get("research_context") or {}
+    refs = {key: blob_store.put(value) for key, value in research.findings.items()}
+    return {
+        "research_context": {
+            key: ref for key, ref in refs.items() if known.get(key) != ref
+        },
+        "research_calls": research.calls,
+        "research_reused": research.reused,
+    }
+
+
+async def run_routed(
+    node: str,
+    agent,
+    state: VCOutreachWorkflowState,
+    deps,
+    model_override: Optional[str] = None,
+):
+    """
+    Run a node's agent on the model its request profile assigns to it (or
+    on `model_override`) and return the result with a routing record (the
+    model that answered, latency, token usage and retries for results that
+    failed validation).
+    """
+    agent_name = NODE_AGENTS[node]
+    profile = state.get("model_profile") or DEFAULT_PROFILE
+    model_name = model_name_for(profile, agent_name, model_override)
+    from output_validation import validation_retries
+
+    start = time.perf_counter()
+    result = await agent.run(deps=deps, model=get_model(model_name, agent_name))
+    elapsed = time.perf_counter() - start
+    usage = result.usage()
+    retries, retry_seconds = validation_retries(result.all_messages())
+    decision = {
+        "node": node,
+        "profile": profile,
+        # A hedged model may have answered with a fallback, see hedging.py
+        "model": answered_by(result.all_messages()) or model_name,
+        "routed_model": model_name,
+        "seconds": round(elapsed, 3),
+        "requests": usage.requests,
+        "request_tokens": usage.request_tokens or 0,
+        "response_tokens": usage.response_tokens or 0,
+        "validation_retries": retries,
+        "validation_retry_seconds": round(retry_seconds, 3),
+    }
+    metrics.observe(f"routing.{profile}.{agent_name}.seconds", elapsed)
+    metrics.incr(f"routing.{profile}.{agent_name}.tokens", usage.total_tokens or 0)
+    if retries:
+        metrics.incr(f"validation.{agent_name}.retries", retries)
+        metrics.observe(f"validation.{agent_name}.retry_seconds", retry_seconds)
+        logger.info(
+            "%s result failed validation %s times, retries took %.2f s",
+            node,
+            retries,
+            retry_seconds,
+        )
+    logger.info(
+        "Routed %s to %s (%s profile) in %.2f s", node, model_name, profile, elapsed
+    )
+    return result, decision
+
+
+def answered_by(messages) -> Optional[str]:
+    # model_name of the last response, i.e. of the model that gave the result
+    responses = [m for m in messages if isinstance(getattr(m, "model_name", None), str)]
+    return responses[-1].model_name if responses else None
+
+
+def lazy_agent(module_name: str, factory_name: str, **kwargs) -> Callable:
+    """
+    Return a getter that imports the agent module and builds the agent on the
+    first call, so pydantic_ai, firecrawl and mcp are not loaded at import time.
+    """
+    agent = None
+
+    def get():
+        nonlocal agent
+        if agent is None:
+            module = importlib.import_module(module_name)
+            agent = getattr(module, factory_name)(**kwargs)
+        return agent
+
+    return get
+
+
+def get_vc_outreach_workflow(model_name: Optional[str] = None):
+    # Each run uses the models of its model_profile; a model_name given here
+    # overrides the profile for every agent
+    # Agents are always run with the routed model; this is only their default
+    agent_model = model_name or FALLBACK_MODEL
+    agent_email_finder = lazy_agent(
+        "agent_email_finder.agent", "make_agent_email_finder", model_name=agent_model
+    )
+    agent_intro_generator = lazy_agent(
+        "agent_intro_generator.agent",
+        "make_agent_intro_generator",
+        model_name=agent_model,
+    )
+    agent_intro_batch_generator = lazy_agent(
+        "agent_intro_generator.agent",
+        "make_agent_intro_batch_generator",
+        model_name=agent_model,
+    )
+    agent_email_drafter = lazy_agent(
+        "agent_drafter.agent", "make_agent_email_drafter", model_name=agent_model
+    )
+    agent_introducer_finder = lazy_agent(
+        "agent_introducer_finder.agent",
+        "make_agent_introducer_finder",
+        model_name=agent_model,
+    )
 
     async def node_introducer_finder(state: VCOutreachWorkflowState):
         logger.info("Running introducer finder node")
 
-        deps = IntroducerFinderDeps(
-            founder_email=state["founder_email"],
-            founder_password=state["founder_password"],
-            vc_linkedin_url=state["vc_partner"].linkedin_url,
-        )
+        # Connections supplied by the caller (or by an earlier run of this
+        # thread) are reused as-is and no browser is started
+        mutual_connections = state.get("mutual_connections") or []
+        skipped_nodes = []
+        routing = []
+        if mutual_connections:
+            logger.info("Using %s known mutual connections", len(mutual_connections))
+            skipped_nodes.append(
+                {
+                    "node": "node_introducer_finder",
+                    "reason": CONNECTIONS_KNOWN,
+                }
+            )
+        else:
+            from agent_introducer_finder.agent import IntroducerFinderDeps
 
-        result = await agent_introducer_finder.run(deps=deps)
-        mutual_connections = result.data
+            deps = IntroducerFinderDeps(
+                founder_email=state["founder_email"],
+                founder_password=state["founder_password"],
+                vc_linkedin_url=state["vc_partner"].linkedin_url,
+            )
 
-        logger.info(f"Found {len(mutual_connections)} mutual connections")
+            result, routed = await run_routed(
+                "node_introducer_finder",
+                agent_introducer_finder(),
+                state,
+                deps,
+                model_name,
+            )
+            mutual_connections = [connection.model_dump() for connection in result.data]
+            routing.append(routed)
 
-        # Select the first mutual connection as default if available
-        selected_mutual_connection = (
-            mutual_connections[0] if mutual_connections else None
-        )
+            logger.info("Found %s mutual connections", len(mutual_connections))
 
         return {
             "mutual_connections": mutual_connections,
-            "selected_mutual_connection": selected_mutual_connection,
+            "skipped_nodes": skipped_nodes,
+            "routing": routing,
         }
 
     async def node_email_finder(state: VCOutreachWorkflowState):
         logger.info("Running email finder node")
+        from agent_email_finder.agent import EmailFinderDeps
 
+        research = run_research(state)
         deps = EmailFinderDeps(
             vc_partner=state["vc_partner"],
+            research=research,
         )
 
-        result = await agent_email_finder.run(deps=deps)
-        found_email = result.data
+        from pydantic_ai.exceptions import UnexpectedModelBehavior
 
-        logger.info(f"Found VC email: {found_email}")
+        from output_validation import email_domain_problem
 
-        return {"found_email": found_email}
+        try:
+            result, routed = await run_routed(
+                "node_email_finder", agent_email_finder(), state, deps, model_name
+            )
+        except UnexpectedModelBehavior as e:
+            # Every answer failed validation: finish without an email
+            # instead of failing the whole request
+            logger.warning("Email lookup gave no valid address: %s", e)
+            metrics.incr("validation.email_finder.failed")
+            return {
+                "found_email": "",
+                "email_warning": f"No valid email found: {e}",
+                **research_update(state, research),
+            }
+        found_email = result.data.email
+        warning = email_domain_problem(found_email, state["vc_partner"].fund_website)
+        if warning:
+            logger.warning("Keeping email %s", warning)
+
+        logger.info("Found VC email: %s", found_email)
+
+        return {
+            "found_email": found_email,
+            "email_warning": warning or "",
+            "routing": [routed],
+            **research_update(state, research),
+        }
 
     async def node_intro_generator(state: VCOutreachWorkflowState):
         logger.info("Running intro generator node")
-
-        mutual_connection_name = (
-            state["selected_mutual_connection"]["name"]
-            if state["selected_mutual_connection"]
-            else ""
+        from agent_intro_generator.agent import (
+            INTRO_BATCH_SIZE,
+            IntroBatchDeps,
+            IntroGeneratorDeps,
         )
 
-        deps = IntroGeneratorDeps(
-            startup=state["startup"],
-            vc_partner=state["vc_partner"],
-            mutual_connection=mutual_connection_name,
+        # The intro generator has no research tool of its own, it only uses
+        # what earlier nodes found
+        research = run_research(state)
+        if research.get(state["vc_partner"]):
+            research.reused += 1
+
+        connections = introducers(state)
+        if len(connections) > 1:
+            # One call writes the intros of up to INTRO_BATCH_SIZE
+            # connections, sharing the startup and partner context
+            batches = [
+                connections[i : i + INTRO_BATCH_SIZE]
+                for i in range(0, len(connections), INTRO_BATCH_SIZE)
+            ]
+            results = await asyncio.gather(
+                *(
+                    run_routed(
+                        "node_intro_generator",
+                        agent_intro_batch_generator(),
+                        state,
+                        IntroBatchDeps(
+                            startup=state["startup"],
+                            vc_partner=state["vc_partner"],
+                            mutual_connections=batch,
+                            research=research,
+                        ),
+                        model_name,
+                    )
+                    for batch in batches
+                )
+            )
+            texts = [intro.intro for result, _ in results for intro in result.data]
+            routing = [routed for _, routed in results]
+        else:
+            deps = IntroGeneratorDeps(
+                startup=state["startup"],
+                vc_partner=state["vc_partner"],
+                mutual_connection=connections[0]["name"],
+                research=research,
+            )
+            result, routed = await run_routed(
+                "node_intro_generator",
+                agent_intro_generator(),
+                state,
+                deps,
+                model_name,
+            )
+            texts = [result.data]
+            routing = [routed]
+
+        generated_intros = [
+            {
+                "name": connection["name"],
+                "linkedin_url": connection.get("linkedin_url", ""),
+                "intro": text,
+            }
+            for connection, text in zip(connections, texts)
+        ]
+        logger.info(
+            "Generated %s intros in %s calls, first: %s...",
+            len(generated_intros),
+            len(routing),
+            texts[0][:100],
         )
 
-        result = await agent_intro_generator.run(deps=deps)
-        generated_intro = result.data
-
-        logger.info(f"Generated intro: {generated_intro[:100]}...")
-
-        return {"generated_intro": generated_intro}
+        return {
+            "generated_intro": blob_store.put(texts[0]),
+            "generated_intros": blob_store.put(generated_intros),
+            "routing": routing,
+            **research_update(state, research),
+        }
 
     async def node_email_drafter(state: VCOutreachWorkflowState):
         logger.info("Running email drafter node")
@@ -109,79 +659,263 @@ def get_vc_outreach_workflow(model_name="o3-mini"):
         # Update the VC partner with the found email if needed
         vc_partner = state["vc_partner"]
 
-        deps = DrafterDeps(startup=state["startup"], vc_partner=vc_partner)
+        research = run_research(state)
+        deps = DrafterDeps(
+            startup=state["startup"], vc_partner=vc_partner, research=research
+        )
 
-        result = await agent_email_drafter.run(deps=deps)
+        result, routed = await run_routed(
+            "node_email_drafter", agent_email_drafter(), state, deps, model_name
+        )
         cold_email = result.data
 
-        logger.info(f"Drafted cold email: {cold_email[:100]}...")
+        logger.info("Drafted cold email: %s...", cold_email[:100])
 
-        return {"cold_email": cold_email}
+        return {
+            "cold_email": blob_store.put(cold_email),
+            "routing": [routed],
+            **research_update(state, research),
+        }
 
     async def node_finish(state: VCOutreachWorkflowState):
         logger.info("Finishing workflow")
+
+        # Nodes that neither completed nor recorded a skip were routed around
+        recorded = set(state.get("completed_nodes") or []) | {
+            skipped["node"] for skipped in state.get("skipped_nodes") or []
+        }
+        skipped_nodes = [
+            {"node": node, "reason": skip_reason(node, state) or DEADLINE_EXCEEDED}
+            for node in AGENT_NODES
+            if node not in recorded
+        ]
+        all_skipped = (state.get("skipped_nodes") or []) + skipped_nodes
+        # A node that ran on known connections still ran, and one cut by the
+        # deadline or a step timeout was needed, so none of them counts as
+        # an avoided LLM call
+        deadline_skipped = sum(
+            1 for skipped in all_skipped if skipped["reason"] in DEADLINE_REASONS
+        )
+        llm_calls_avoided = sum(
+            1
+            for skipped in all_skipped
+            if skipped["reason"]
+            not in DEADLINE_REASONS + (CONNECTIONS_KNOWN, STEP_TIMED_OUT)
+        )
+        deadline_exceeded = deadline_skipped > 0
+        logger.info("Skipped %s LLM-backed nodes: %s", len(all_skipped), all_skipped)
+        logger.info(
+            "Research calls: %s, reused: %s",
+            state.get("research_calls", 0),
+            state.get("research_reused", 0),
+        )
+
         logger.info(
-            f"VC Partner: {state['vc_partner'].name} from {state['vc_partner'].fund_name}"
+            "VC Partner: %s from %s",
+            state["vc_partner"].name,
+            state["vc_partner"].fund_name,
         )
-        logger.info(f"Email: {state['found_email']}")
+        logger.info("Email: %s", state.get("found_email", ""))
 
-        if state["selected_mutual_connection"]:
+        if state.get("selected_mutual_connection"):
             logger.info(
-                f"Selected Mutual Connection: {state['selected_mutual_connection']['name']}"
+                "Selected Mutual Connection: %s",
+                state["selected_mutual_connection"]["name"],
             )
 
-        logger.info("-------- Warm Introduction --------")
-        logger.info(state["generated_intro"])
-        logger.info("-------- Cold Email --------")
-        logger.info(state["cold_email"])
+        # Full texts only at DEBUG, long ones are truncated by the log pipeline
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Warm introduction:\n%s",
+                blob_store.deref(state.get("generated_intro", "")),
+            )
+            logger.debug(
+                "Cold email:\n%s", blob_store.deref(state.get("cold_email", ""))
+            )
 
-        return state
+        return delta(
+            state,
+            {
+                "skipped_nodes": skipped_nodes,
+                "llm_calls_avoided": llm_calls_avoided,
+                "deadline_skipped": deadline_skipped,
+                "deadline_exceeded": deadline_exceeded,
+            },
+        )
 
     builder = StateGraph(VCOutreachWorkflowState)
 
     # Add nodes
-    builder.add_node("node_introducer_finder", node_introducer_finder)
-    builder.add_node("node_email_finder", node_email_finder)
-    builder.add_node("node_intro_generator", node_intro_generator)
-    builder.add_node("node_email_drafter", node_email_drafter)
+    nodes = {
+        "node_introducer_finder": with_memo(
+            "node_introducer_finder",
+            node_introducer_finder,
+            model_name,
+            finish=rank_introducers,
+        ),
+        "node_email_finder": with_memo(
+            "node_email_finder", node_email_finder, model_name
+        ),
+        "node_intro_generator": with_memo(
+            "node_intro_generator", node_intro_generator, model_name
+        ),
+        "node_email_drafter": with_memo(
+            "node_email_drafter", node_email_drafter, model_name
+        ),
+    }
+    for node in AGENT_NODES:
+        builder.add_node(node, with_node_deadline(node, nodes[node]))
     builder.add_node("node_finish", node_finish)
 
-    # Add edges
-    builder.add_edge(START, "node_introducer_finder")
-    builder.add_edge("node_introducer_finder", "node_email_finder")
-    builder.add_edge("node_email_finder", "node_intro_generator")
-    builder.add_edge("node_intro_generator", "node_email_drafter")
-    builder.add_edge("node_email_drafter", "node_finish")
+    # Add edges: every step routes to the next node that still has work to do
+    for node in [None] + AGENT_NODES:
+        route, destinations = route_after(node)
+        builder.add_conditional_edges(node or START, route, destinations)
     builder.add_edge("node_finish", END)
 
-    memory = MemorySaver()
+    memory = MemorySaver(serde=CheckpointSerializer())
     graph = builder.compile(checkpointer=memory)
 
     return graph
 
 
-# Example usage:
-# workflow = get_vc_outreach_workflow()
-# config = VCOutreachWorkflowState(
-#     messages=[],
-#     startup=Startup(
-#         vision="To revolutionize the way people interact with AI",
-#         company_name="AI Innovations",
-#         founders=[Founder(name="Jane Doe", background="Ex-Google AI researcher")],
-#         product_description="An AI platform that learns from user behavior"
-#     ),
-#     vc_partner=VCPartner(
-#         name="John Smith",
-#         fund_name="Tech Ventures",
-#         fund_website="https://techventures.com",
-#         linkedin_url="https://linkedin.com/in/johnsmith"
-#     ),
-#     founder_email="founder@example.com",
-#     founder_password="securepassword",
-#     mutual_connections=[],
-#     selected_mutual_connection=None,
-#     found_email="",
-#     generated_intro="",
-#     cold_email=""
+def state_from_request(
+    data: dict, default_deadline_seconds=None
+) -> Tuple[VCOutreachWorkflowState, str]:
+    """
+    Build the initial workflow state and thread_id from a request payload
+    (see fetch_readme.md). Raises ValueError for unknown outputs.
+    """
+    # Which results to produce; nodes for anything else are skipped
+    outputs = data.get("outputs") or list(OUTPUTS)
+    unknown_outputs = [o for o in outputs if o not in OUTPUTS]
+    if unknown_outputs:
+        raise ValueError(
+            f"Unknown outputs {unknown_outputs}. Choose from {list(OUTPUTS)}."
+        )
+
+    intro_count = int(data.get("intro_count") or 1)
+    if not 1 <= intro_count <= MAX_INTRO_COUNT:
+        raise ValueError(f"intro_count must be between 1 and {MAX_INTRO_COUNT}.")
+
+    # A mutual connection named by the caller is used as-is instead of scraping LinkedIn
+    mutual_connection = data.get("mutual_connection", "")
+    mutual_connections = (
+        [{"name": mutual_connection, "linkedin_url": ""}] if mutual_connection else []
+    )
+
+    state = {
+        "messages": [],
+        "startup": Startup.from_dict(data.get("startup", {})),
+        "vc_partner": VCPartner.from_dict(data.get("vc_partner", {})),
+        "founder_email": data.get("founder_email", ""),
+        "founder_password": data.get("founder_password", ""),
+        "mutual_connections": mutual_connections,
+        "selected_mutual_connection": None,
+        "introducer_ranking": [],
+        "found_email": "",
+        "email_warning": "",
+        "generated_intro": "",
+        "generated_intros": [],
+        "intro_count": intro_count,
+        "cold_email": "",
+        "outputs": outputs,
+        "skipped_nodes": [],
+        "completed_nodes": [],
+        "llm_calls_avoided": 0,
+        "deadline_skipped": 0,
+        "deadline_at": deadline_from_seconds(
+            data.get("deadline_seconds", default_deadline_seconds)
+        ),
+        "deadline_exceeded": False,
+        "research_context": {},
+        "research_calls": 0,
+        "research_reused": 0,
+        "model_profile": validate_profile(data.get("model_profile")),
+        "routing": [],
+        "profile": diagnostics.validate_profiler(data.get("profile")),
+        "node_cache": [],
+        "recompute": bool(data.get("recompute")),
+    }
+    thread_id = str(data.get("thread_id") or uuid.uuid4())
+    return state, thread_id
+
+
+def make_workflow_runner(model_name: Optional[str] = None):
+    workflow = get_vc_outreach_workflow(model_name=model_name)
+    # Threads are never evicted from MemorySaver, so this grows with traffic
+    diagnostics.register_probe(
+        "workflow.checkpoint_threads", lambda: len(workflow.checkpointer.storage)
+    )
+
+    async def run(
+        state: VCOutreachWorkflowState,
+        thread_id: str,
+        on_node: Optional[Callable[[str], None]] = None,
+    ) -> dict:
+        config = {"configurable": {"thread_id": thread_id}}
+        async with diagnostics.profile_run(state.get("profile"), thread_id) as profile:
+            with log.span("workflow.run", thread_id=thread_id):
+                if on_node is None:
+                    await workflow.ainvoke(state, config)
+                else:
+                    # Same run, streamed so progress can be reported per node
+                    async for update in workflow.astream(
+                        state, config, stream_mode="updates"
+                    ):
+                        for node in update:
+                            on_node(node)
+
+        final_state = workflow.get_state(config)
+        state_dict = final_state[0] if isinstance(final_state, tuple) else final_state
+
+        return {
+            "found_email": state_dict.get("found_email", ""),
+            "email_warning": state_dict.get("email_warning", ""),
+            "generated_intro": blob_store.deref(state_dict.get("generated_intro", "")),
+            "generated_intros": blob_store.deref(
+                state_dict.get("generated_intros", [])
+            ),
+            "cold_email": blob_store.deref(state_dict.get("cold_email", "")),
+            "mutual_connections": state_dict.get("mutual_connections", []),
+            "introducer_ranking": state_dict.get("introducer_ranking", []),
+            "skipped_nodes": state_dict.get("skipped_nodes", []),
+            "llm_calls_avoided": state_dict.get("llm_calls_avoided", 0),
+            "deadline_skipped": state_dict.get("deadline_skipped", 0),
+            "deadline_exceeded": state_dict.get("deadline_exceeded", False),
+            "research_calls": state_dict.get("research_calls", 0),
+            "research_reused": state_dict.get("research_reused", 0),
+            "routing": state_dict.get("routing", []),
+            "node_cache": state_dict.get("node_cache", []),
+            "profile_path": profile["path"],
+        }
+
+    return run
+
+
+# Example usage (state_from_request fills in every other state field):
+# run = make_workflow_runner()
+# state, thread_id = state_from_request(
+#     {
+#         "startup": {
+#             "vision": "To revolutionize the way people interact with AI",
+#             "company_name": "AI Innovations",
+#             "founders": [
+#                 {"name": "Jane Doe", "background": "Ex-Google AI researcher"}
+#             ],
+#             "product_description": "An AI platform that learns from user behavior",
+#         },
+#         "vc_partner": {
+#             "name": "John Smith",
+#             "fund_name": "Tech Ventures",
+#             "fund_website": "https://techventures.com",
+#             "linkedin_url": "https://linkedin.com/in/johnsmith",
+#         },
+#         "founder_email": "founder@example.com",
+#         "founder_password": "securepassword",
+#         "outputs": ["email", "cold_email"],
+#         "deadline_seconds": 120,
+#         "model_profile": "fast",
+#     }
 # )
-# result = await workflow.invoke(config)
+# result = await run(state, thread_id)
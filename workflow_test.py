@@ -6,18 +6,13 @@ import uuid
 import dotenv
 from pydantic_ai import RunContext
 
+import blob_store
 import log
 from agent_introducer_finder.agent import (
     IntroducerFinderDeps,
     make_agent_introducer_finder,
 )
-from workflow import (
-    Founder,
-    Startup,
-    VCPartner,
-    get_vc_outreach_workflow,
-    VCOutreachWorkflowState,
-)
+from workflow import get_vc_outreach_workflow, state_from_request
 
 dotenv.load_dotenv()
 
@@ -44,34 +39,35 @@ def run_workflow():
         )
         return
 
-    # Example startup and VC data
-    state = VCOutreachWorkflowState(
-        messages=[],
-        startup=Startup(
-            vision="To revolutionize healthcare with AI-powered diagnostics",
-            company_name="MediScan AI",
-            founders=[
-                Founder(name="Alex Johnson", background="PhD in ML, ex-Google Health"),
-                Founder(
-                    name="Sasha Lee",
-                    background="Ex-CTO at HealthTech, MD from Stanford",
-                ),
-            ],
-            product_description="An AI diagnostic tool that analyzes medical images with 98% accuracy, helping doctors detect diseases earlier and more reliably.",
-        ),
-        vc_partner=VCPartner(
-            name="Doszhan Zhussupov",
-            fund_name="Insight Ventures",
-            fund_website="https://insightventures.com",
-            linkedin_url="https://www.linkedin.com/in/doszhan-zhussupov/",
-        ),
-        founder_email=founder_email,
-        founder_password=founder_password,
-        mutual_connections=[],
-        selected_mutual_connection=None,
-        found_email="",
-        generated_intro="",
-        cold_email="",
+    # Example startup and VC data, built into a state like a real request
+    state, thread_id = state_from_request(
+        {
+            "thread_id": thread_id,
+            "startup": {
+                "vision": "To revolutionize healthcare with AI-powered diagnostics",
+                "company_name": "MediScan AI",
+                "founders": [
+                    {
+                        "name": "Alex Johnson",
+                        "background": "PhD in ML, ex-Google Health",
+                    },
+                    {
+                        "name": "Sasha Lee",
+                        "background": "Ex-CTO at HealthTech, MD from Stanford",
+                    },
+                ],
+                "product_description": "An AI diagnostic tool that analyzes medical images with 98% accuracy, helping doctors detect diseases earlier and more reliably.",
+            },
+            "vc_partner": {
+                "name": "Doszhan Zhussupov",
+                "fund_name": "Insight Ventures",
+                "fund_website": "https://insightventures.com",
+                "linkedin_url": "https://www.linkedin.com/in/doszhan-zhussupov/",
+            },
+            "founder_email": founder_email,
+            "founder_password": founder_password,
+            "model_profile": os.getenv("MODEL_PROFILE", "quality"),
+        }
     )
 
     workflow = get_vc_outreach_workflow()
@@ -84,9 +80,9 @@ def run_workflow():
 
     # Print the final outputs
     print("\n===== WORKFLOW RESULTS =====")
-    print(f"VC Email: {state_dict['found_email']}")
+    print(f"VC Email: {state_dict.get('found_email', '')}")
 
-    if state_dict["selected_mutual_connection"]:
+    if state_dict.get("selected_mutual_connection"):
         print(
             f"\nSelected Mutual Connection: {state_dict['selected_mutual_connection']['name']}"
         )
@@ -95,9 +91,15 @@ def run_workflow():
         )
 
     print("\n----- WARM INTRODUCTION -----")
-    print(state_dict["generated_intro"])
+    print(blob_store.deref(state_dict.get("generated_intro", "")))
     print("\n----- COLD EMAIL -----")
-    print(state_dict["cold_email"])
+    print(blob_store.deref(state_dict.get("cold_email", "")))
+    print(f"\nLLM calls avoided: {state_dict.get('llm_calls_avoided', 0)}")
+    print(f"Cut by the deadline: {state_dict.get('deadline_skipped', 0)}")
+    print(
+        f"Research calls: {state_dict.get('research_calls', 0)}, "
+        f"reused: {state_dict.get('research_reused', 0)}"
+    )
 
 
 @log.add_logger(logger)
@@ -128,14 +130,18 @@ def test_introducer_finder():
     # Run the agent
     result = asyncio.run(agent.run(deps=deps))
 
-    logger.info(f"Found {len(result.data)} mutual LinkedIn connections")
+    logger.info("Found %s mutual LinkedIn connections", len(result.data))
     for idx, connection in enumerate(result.data[:5]):  # Show first 5 connections
         logger.info(
-            f"Connection {idx+1}: {connection['name']} - {connection['linkedin_url']}"
+            "Connection %s: %s - %s",
+            idx + 1,
+            connection.name,
+            connection.linkedin_url,
         )
 
 
 if __name__ == "__main__":
+    log.configure_tracing()
     # Uncomment the function you want to test
     run_workflow()
     # test_introducer_finder()